@@ -10,7 +10,7 @@ numeric_feature_choices = tuple(
 
 class ConfigForm(forms.Form):
     data_name = forms.CharField(
-        label="Name of dataset in /data (.csv)",
+        label="Name of dataset in /data (.csv, .parquet)",
         max_length=100,
         initial="peptides.csv",
         widget=forms.TextInput(attrs={"class": "form-control"}),
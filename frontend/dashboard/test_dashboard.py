@@ -1,12 +1,19 @@
+import io
+import json
 import pytest
 import pandas as pd
+import pyarrow as pa
+from django.core.files.uploadedfile import SimpleUploadedFile
 
 from frontend.dashboard.utils import (
     load_data,
     get_params,
     get_match_for_seq,
+    save_plot_config,
 )
 from frontend.dashboard.views import index
+from pepsipy import Calculator
+from tests.constants import PEPTIDES
 from frontend.dashboard.forms import (
     ThreeLetterCodeForm,
     MolecularFormulaForm,
@@ -87,3 +94,162 @@ def test_get_match_for_seq():
     }
     assert (1, expected_match) == get_match_for_seq(data, "PEPTIDE")
     assert (0, {}) == get_match_for_seq(data, "PEP")
+
+
+def test_api_features_json(client):
+    body = {
+        "sequences": ["PEPTIDE", "pepTIDE", "FSGVPDR"],
+        "feature_params": {"gravy": True},
+    }
+    response = client.post("/api/features", body, content_type="application/json")
+    assert 200 == response.status_code
+    res = response.json()
+    assert ["Sequence", "GRAVY"] == res["columns"]
+    assert ["PEPTIDE", "PEPTIDE", "FSGVPDR"] == res["data"]["Sequence"]
+    assert -1.414 == res["data"]["GRAVY"][0]
+
+
+def test_api_features_ndjson(client):
+    lines = [
+        {"feature_params": {"molecular_weight": True}},
+        {"sequence": "PEPTIDE"},
+        {"sequence": "FSGVPDR"},
+    ]
+    response = client.post(
+        "/api/features?format=ndjson&batch_size=1",
+        "\n".join(json.dumps(line) for line in lines),
+        content_type="application/x-ndjson",
+    )
+    assert 200 == response.status_code
+    rows = [
+        json.loads(line) for line in b"".join(response.streaming_content).splitlines()
+    ]
+    assert 2 == len(rows)
+    assert {"Sequence": "PEPTIDE", "Molecular weight": 799.83} == rows[0]
+
+
+def test_api_features_arrow(client):
+    body = {"sequences": ["PEPTIDE", "FSGVPDR"], "feature_params": {"seq_length": True}}
+    response = client.post(
+        "/api/features?format=arrow&batch_size=1", body, content_type="application/json"
+    )
+    assert 200 == response.status_code
+    table = pa.ipc.open_stream(
+        io.BytesIO(b"".join(response.streaming_content))
+    ).read_all()
+    assert [7, 7] == table.column("Sequence length").to_pylist()
+
+
+def test_api_features_invalid(client):
+    body = {"sequences": ["PEPTIDE", "PEPTIDEX"]}
+    response = client.post("/api/features", body, content_type="application/json")
+    assert 400 == response.status_code
+    assert ["PEPTIDEX"] == response.json()["invalid"]
+    response = client.post("/api/features", "foo", content_type="text/plain")
+    assert 400 == response.status_code
+    assert "Unsupported content type" in response.json()["error"]
+
+
+def test_plot(client, tmp_path, settings):
+    (tmp_path / "plots").mkdir()
+    settings.TMP_DIR = tmp_path
+    calc = Calculator(dataset=PEPTIDES, feature_params={"gravy": True})
+    calc.get_features()
+    calc.save_features(tmp_path / "features.parquet")
+    params = {
+        "hydropathy_profile": True,
+        "titration_curve": False,
+        "compare_feature": True,
+        "compare_feature_a": "GRAVY",
+        "compare_feature_group_by": "Group",
+    }
+    assert ([0], [1]) == save_plot_config("PEPTIDE", "metadata.csv", params)
+    assert ([], [0]) == save_plot_config("", "metadata.csv", params)
+
+    save_plot_config("PEPTIDE", "metadata.csv", params)
+    response = client.get("/plot/1")
+    assert 200 == response.status_code
+    assert "Distribution of GRAVY" in response.json()["layout"]["title"]["text"]
+    assert (tmp_path / "plots" / "plot_1.json").exists()
+    assert 404 == client.get("/plot/2").status_code
+
+
+def test_plotly_js_matches_plotly():
+    from pathlib import Path
+    from django.contrib.staticfiles import finders
+    import plotly
+
+    # Lazily loaded plots are rendered by the bundled plotly.js, which must match the one of the plotly package
+    path = finders.find("js/plotly-3.0.1.min.js")
+    assert path is not None
+    bundled = Path(plotly.__file__).parent / "package_data" / "plotly.min.js"
+    assert Path(path).read_bytes() == bundled.read_bytes()
+
+
+def test_upload_data(client, tmp_path, settings):
+    settings.PROJECT_DIR = str(tmp_path)
+    settings.UPLOAD_DIR = tmp_path / "data" / "uploads"
+    content = (
+        b"Sample,Sequence,Intensity\nS1,PEPTIDE,1.0\nS2,PEPTIDE,2.0\nS2,FSGVPDR,3.0\n"
+    )
+
+    response = client.post(
+        "/upload_data", {"file": SimpleUploadedFile("peptides.csv", content)}
+    )
+    assert 200 == response.status_code
+    res = response.json()
+    assert {"rows": 3, "sequences": 2} == {k: res[k] for k in ("rows", "sequences")}
+    assert ["S1", "S2", "S2"] == load_data(res["name"])["Sample"].tolist()
+
+    # Same content is registered only once
+    response = client.post(
+        "/upload_data", {"file": SimpleUploadedFile("copy.csv", content)}
+    )
+    assert res["name"] == response.json()["name"]
+    assert 1 == len(list(settings.UPLOAD_DIR.glob("*.parquet")))
+    assert not list(settings.UPLOAD_DIR.glob("*.csv"))
+
+
+def test_upload_data_invalid(client, tmp_path, settings):
+    settings.UPLOAD_DIR = tmp_path / "uploads"
+    content = b"Sample,Sequence\nS1,PEPTIDE\nS2,PEPTIDEX\n"
+    response = client.post(
+        "/upload_data", {"file": SimpleUploadedFile("peptides.csv", content)}
+    )
+    assert 400 == response.status_code
+    assert ["PEPTIDEX"] == response.json()["invalid"]
+    assert not list(settings.UPLOAD_DIR.glob("*"))
+
+
+@pytest.mark.parametrize(
+    "content, error",
+    [
+        (b"Sample,Peptide\nS1,PEPTIDE\n", "Column 'Sequence'"),
+        (b"Sample,Sequence,Intensity\nS1,PEPTIDE,high\n", "could not be converted"),
+    ],
+)
+def test_upload_data_rejected(client, tmp_path, settings, content, error):
+    settings.UPLOAD_DIR = tmp_path / "uploads"
+    response = client.post(
+        "/upload_data", {"file": SimpleUploadedFile("peptides.csv", content)}
+    )
+    assert 400 == response.status_code
+    assert error in response.json()["error"]
+    assert not list(settings.UPLOAD_DIR.glob("*"))
+
+
+def test_upload_data_types(client, tmp_path, settings):
+    settings.PROJECT_DIR = str(tmp_path)
+    settings.UPLOAD_DIR = tmp_path / "data" / "uploads"
+    # Integer-like values in the first rows, floats and missing values later on
+    rows = [f"{i},PEPTIDE,{i}" for i in range(100_000)] + ["S1,FSGVPDR,"]
+    content = "Sample,Sequence,Intensity\n" + "\n".join(rows) + "\n1,PEPTIDE,1.5\n"
+    response = client.post(
+        "/upload_data",
+        {"file": SimpleUploadedFile("peptides.csv", content.encode())},
+    )
+    assert 200 == response.status_code
+    df = load_data(response.json()["name"])
+    assert "S1" == df["Sample"].iloc[-2]
+    assert 1.5 == df["Intensity"].iloc[-1]
+    assert df["Intensity"].isna().sum() == 1
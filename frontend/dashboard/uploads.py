@@ -0,0 +1,191 @@
+import csv
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+from pepsipy.constants import AA_LETTERS
+
+# Columns with a fixed type in the Parquet copy, all other column types are inferred by pyarrow
+STRING_COLUMNS = ("Sample", "Protein ID", "Sequence")
+FLOAT_COLUMNS = ("Intensity", "PEP")
+
+
+class UploadedDataset(UploadedFile):
+    """
+    Dataset that was streamed to disk and registered by DatasetUploadHandler.
+        digest: SHA-256 hash of the uploaded content, used as the dataset identifier
+        path: Location of the columnar (Parquet) copy of the dataset, None if the dataset is invalid
+        num_rows: Number of data rows in the uploaded file
+        sequences: Distinct sequences found in the column 'Sequence'
+        invalid: Distinct sequences containing invalid amino acid symbols
+        error: Reason why the dataset could not be registered (e.g. missing column 'Sequence'), None if it was registered
+    """
+
+    def __init__(
+        self, digest, path, name, size, num_rows, sequences, invalid, error=None
+    ):
+        super().__init__(file=None, name=name, size=size)
+        self.digest = digest
+        self.path = path
+        self.num_rows = num_rows
+        self.sequences = sequences
+        self.invalid = invalid
+        self.error = error
+
+    @property
+    def data_name(self) -> str:
+        """
+        Name of the dataset relative to the project's data folder, as expected by load_data().
+        """
+        return self.path.relative_to(Path(settings.PROJECT_DIR) / "data").as_posix()
+
+
+class DatasetUploadHandler(FileUploadHandler):
+    """
+    Streams an uploaded CSV file to disk in chunks instead of keeping it in memory.
+    While receiving the chunks, the content is hashed and all sequences are validated and deduplicated.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        upload_dir = Path(settings.UPLOAD_DIR)
+        upload_dir.mkdir(parents=True, exist_ok=True)
+        self.file = tempfile.NamedTemporaryFile(
+            dir=upload_dir, suffix=".csv", delete=False
+        )
+        self.hash = hashlib.sha256()
+        self.rest = b""
+        self.seq_index = None
+        self.num_rows = -1  # Header is not counted
+        self.sequences = set()
+        self.invalid = set()
+        self.error = None
+
+    def receive_data_chunk(self, raw_data, start):
+        # The rest of a rejected upload is discarded
+        if self.error:
+            return None
+        self.file.write(raw_data)
+        self.hash.update(raw_data)
+        # Only complete lines are parsed, the rest is kept for the next chunk
+        lines = (self.rest + raw_data).split(b"\n")
+        self.rest = lines.pop()
+        self._parse_lines(lines)
+        return None
+
+    def file_complete(self, file_size):
+        if self.rest.strip() and not self.error:
+            self._parse_lines([self.rest])
+        self.file.close()
+        digest = self.hash.hexdigest()
+        path = None
+        # Datasets with invalid sequences or without sequences are not registered
+        if self.invalid or self.error:
+            Path(self.file.name).unlink()
+        else:
+            try:
+                path = register_dataset(
+                    Path(self.file.name),
+                    digest,
+                    name=self.file_name,
+                    num_rows=self.num_rows,
+                    num_sequences=len(self.sequences),
+                )
+            except ValueError as e:
+                self.error = str(e)
+        return UploadedDataset(
+            digest=digest,
+            path=path,
+            name=self.file_name,
+            size=file_size,
+            num_rows=self.num_rows,
+            sequences=self.sequences,
+            invalid=self.invalid,
+            error=self.error,
+        )
+
+    def _parse_lines(self, lines: list):
+        """
+        Collects the distinct values of the column 'Sequence' from complete CSV lines.
+        Uploads whose header has no column 'Sequence' are rejected.
+        """
+        for row in csv.reader(line.decode("utf-8").rstrip("\r") for line in lines):
+            if not row:
+                continue
+            self.num_rows += 1
+            if self.num_rows == 0:
+                if "Sequence" not in row:
+                    self.error = "Column 'Sequence' could not be found in dataset."
+                    return
+                self.seq_index = row.index("Sequence")
+                continue
+            if self.seq_index >= len(row):
+                continue
+            seq = row[self.seq_index]
+            if seq not in self.sequences:
+                self.sequences.add(seq)
+                if not seq or set(seq) - AA_LETTERS:
+                    self.invalid.add(seq)
+
+
+def register_dataset(
+    csv_path: Path, digest: str, name: str, num_rows: int, num_sequences: int
+) -> Path:
+    """
+    Converts an uploaded CSV file once into Parquet and registers it under its content hash.
+    If a dataset with the same content was uploaded before, the existing copy is reused.
+    Returns the path of the Parquet file. Raises a ValueError if a column does not match its type.
+        csv_path: Path of the uploaded CSV file, which is deleted afterwards
+        digest: SHA-256 hash of the file content
+        name: Original file name
+        num_rows: Number of data rows
+        num_sequences: Number of distinct sequences
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    import pyarrow.parquet as pq
+
+    upload_dir = Path(settings.UPLOAD_DIR)
+    path = upload_dir / f"{digest}.parquet"
+    # Types are otherwise inferred from the first block only, which may not fit later rows
+    column_types = {
+        **{col: pa.string() for col in STRING_COLUMNS},
+        **{col: pa.float64() for col in FLOAT_COLUMNS},
+    }
+    try:
+        if not path.exists():
+            tmp_path = path.with_suffix(".tmp")
+            try:
+                reader = pv.open_csv(
+                    csv_path,
+                    convert_options=pv.ConvertOptions(column_types=column_types),
+                )
+                with pq.ParquetWriter(tmp_path, reader.schema) as writer:
+                    for batch in reader:
+                        writer.write_batch(batch)
+            except pa.ArrowInvalid as e:
+                tmp_path.unlink(missing_ok=True)
+                raise ValueError(f"Dataset could not be converted: {e}") from e
+            os.replace(tmp_path, path)
+    finally:
+        csv_path.unlink()
+
+    registry_path = upload_dir / "registry.json"
+    registry = {}
+    if registry_path.exists():
+        with open(registry_path) as f:
+            registry = json.load(f)
+    registry[digest] = {
+        "name": name,
+        "rows": num_rows,
+        "sequences": num_sequences,
+    }
+    with open(registry_path, "w") as f:
+        json.dump(registry, f, indent=2)
+    return path
@@ -4,5 +4,8 @@ from . import views
 urlpatterns = [
     path("", views.index, name="index"),
     path("download_data", views.download_data, name="download_data"),
+    path("plot/<int:index>", views.plot, name="plot"),
     path("download_plots", views.download_plots, name="download_plots"),
+    path("upload_data", views.upload_data, name="upload_data"),
+    path("api/features", views.api_features, name="api_features"),
 ]
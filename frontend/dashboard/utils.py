@@ -1,5 +1,9 @@
-from django.http import QueryDict
+from django.http import HttpRequest, QueryDict
+import io
+import json
 import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
 from pathlib import Path
 import os
 from typing import Any
@@ -12,16 +16,22 @@ from .forms import (
     RaincloudForm,
     MannWhitneyForm,
 )
+from pepsipy import Calculator
 from pepsipy.features import FEATURES
+from pepsipy.plots import PLOTS
+
+API_BATCH_SIZE = 10000
 
 
 def load_data(name: str) -> pd.DataFrame:
     """
-    Loads a CSV file from the project's data folder and
-    returns its content as a pandas DataFrame.
+    Loads a CSV or Parquet file (e.g., an uploaded dataset) from the project's
+    data folder and returns its content as a pandas DataFrame.
     """
     data_path = Path(settings.PROJECT_DIR) / "data" / name
     try:
+        if data_path.suffix == ".parquet":
+            return pd.read_parquet(data_path)
         return pd.read_csv(data_path)
     except FileNotFoundError as e:
         raise FileNotFoundError(f"The file {name} could not be found at {data_path}.")
@@ -144,3 +154,138 @@ def get_paired_list(dict: dict) -> list:
     """
     items = list(dict.items())
     return [items[i : i + 2] for i in range(0, len(items), 2)]
+
+
+def parse_api_request(request: HttpRequest) -> tuple[pd.Series, dict]:
+    """
+    Reads the sequences and feature parameters from the body of an API request.
+    Supports JSON objects like {"sequences": [...], "feature_params": {...}} and NDJSON streams,
+    where each line contains an object with the key "sequence". Feature parameters can be given in NDJSON
+    by an optional first line {"feature_params": {...}}.
+        request: POST request with content type application/json or application/x-ndjson
+    """
+    sequences = []
+    params = {}
+    try:
+        if request.content_type == "application/x-ndjson":
+            for line in request:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "feature_params" in record:
+                    params = record["feature_params"]
+                else:
+                    sequences.append(record["sequence"])
+        elif request.content_type == "application/json":
+            body = json.loads(request.body)
+            sequences = body["sequences"]
+            params = body.get("feature_params") or {}
+        else:
+            raise ValueError(f"Unsupported content type: {request.content_type}.")
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError(f"Malformed request body: {e}") from None
+    if not sequences:
+        raise ValueError("No sequences were given.")
+    return pd.Series(sequences, name="Sequence").str.upper(), params
+
+
+def compute_batches(
+    sequences: pd.Series, params: dict, batch_size: int = API_BATCH_SIZE
+):
+    """
+    Computes the selected features for consecutive batches of sequences and yields one pandas DataFrame per batch.
+        sequences: pandas Series containing amino acid sequences
+        params: Feature parameters, see Calculator.set_feature_params()
+        batch_size: Maximum number of sequences per batch
+    """
+    for start in range(0, len(sequences), batch_size):
+        batch = sequences.iloc[start : start + batch_size].to_frame()
+        calc = Calculator(dataset=batch, feature_params=params)
+        yield calc.get_features()
+
+
+def to_arrow_stream(batches):
+    """
+    Serializes batches of computed features into the Arrow IPC streaming format and yields the encoded bytes per batch.
+    Requires the optional dependency pyarrow.
+        batches: Iterable of pandas DataFrames with identical columns
+    """
+    import pyarrow as pa
+
+    sink = io.BytesIO()
+    writer = None
+    for batch in batches:
+        if writer is None:
+            schema = pa.Schema.from_pandas(batch, preserve_index=False)
+            writer = pa.ipc.new_stream(sink, schema)
+        writer.write_table(
+            pa.Table.from_pandas(batch, schema=schema, preserve_index=False)
+        )
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    if writer is not None:
+        writer.close()
+        yield sink.getvalue()
+
+
+def save_plot_config(seq: str, metadata_name: str, params: dict) -> tuple[list, list]:
+    """
+    Stores everything needed to render the selected plots later on demand in the temporary directory.
+    Returns the indices of the selected peptide and dataset plots.
+        seq: Peptide sequence of interest
+        metadata_name: Name of the metadata file in /data
+        params: Plot parameters, see Calculator.set_plot_params()
+    """
+    plots = [
+        key
+        for key, plot in PLOTS.items()
+        if params.get(key) and (seq or not plot.seq_based)
+    ]
+    config = {
+        "seq": seq,
+        "metadata_name": metadata_name,
+        "params": params,
+        "plots": plots,
+    }
+    with open(settings.TMP_DIR / "plots.json", "w") as f:
+        json.dump(config, f)
+    peptide_plots = [i for i, key in enumerate(plots) if PLOTS[key].seq_based]
+    data_plots = [i for i, key in enumerate(plots) if not PLOTS[key].seq_based]
+    return peptide_plots, data_plots
+
+
+def get_plot(index: int) -> go.Figure:
+    """
+    Renders a single plot selected in the last calculation. Requires a configuration saved by save_plot_config().
+    Rendered figures are cached as JSON in the temporary directory.
+        index: Position of the plot in the list of selected plots
+    """
+    cache = settings.TMP_DIR / "plots" / f"plot_{index}.json"
+    if cache.exists():
+        return pio.from_json(cache.read_text())
+    with open(settings.TMP_DIR / "plots.json") as f:
+        config = json.load(f)
+    key = config["plots"][index]
+
+    # Select only the requested plot
+    params = {k: v for k, v in config["params"].items() if k not in PLOTS}
+    params[key] = True
+    calc = Calculator(seq=config["seq"], plot_params=params)
+    if not PLOTS[key].seq_based:
+        calc.setup(metadata=load_data(config["metadata_name"]))
+        calc.load_features(settings.TMP_DIR / "features.parquet")
+    fig = calc.get_plots()[0]
+    cache.write_text(fig.to_json())
+    return fig
+
+
+def get_num_plots() -> int:
+    """
+    Returns the number of plots selected in the last calculation.
+    """
+    path = settings.TMP_DIR / "plots.json"
+    if not path.exists():
+        return 0
+    with open(path) as f:
+        return len(json.load(f)["plots"])
@@ -1,12 +1,21 @@
 import zipfile
 import pandas as pd
 from django.shortcuts import render
-from django.http import FileResponse, JsonResponse
-from pathlib import Path
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import require_POST
 
 from frontend.project import settings
 from pepsipy import Calculator
+from pepsipy.utils import get_invalid_seq
 
+from .uploads import DatasetUploadHandler
 from .forms import ConfigForm, FORM_TO_FEATURE_FUNCTION, FORM_TO_PLOT_FUNCTION
 from .utils import (
     load_data,
@@ -15,6 +24,13 @@ from .utils import (
     clear_tmp,
     make_forms,
     get_paired_list,
+    parse_api_request,
+    compute_batches,
+    to_arrow_stream,
+    API_BATCH_SIZE,
+    save_plot_config,
+    get_plot,
+    get_num_plots,
 )
 
 
@@ -25,8 +41,8 @@ def index(request):
     computed_peptide_features = {}
     paired_peptide_features = list()
     num_matches = 0
-    html_peptide_plots = []
-    html_data_plots = []
+    peptide_plots = []
+    data_plots = []
     feature_forms = []
     plot_forms = []
     results_ready = False
@@ -56,10 +72,10 @@ def index(request):
         # Compute features
         calc.set_feature_params(**get_params(feature_forms, FORM_TO_FEATURE_FUNCTION))
         computed_features = calc.get_features()
-        computed_features.to_csv(settings.TMP_DIR / "features.csv", index=False)
+        calc.save_features(settings.TMP_DIR / "features.csv")
 
         if calc.seq != "":
-            # Filter data for peptide of interest
+            # Filter data for peptide of interest, a single scan is cheaper than building an index for one lookup
             num_matches, computed_peptide_features = get_match_for_seq(
                 computed_features, calc.seq
             )
@@ -70,22 +86,13 @@ def index(request):
                 computed_peptide_features = res.iloc[0].to_dict()
             paired_peptide_features = get_paired_list(computed_peptide_features)
 
-        # Generate plots
-        calc.set_plot_params(**get_params(plot_forms, FORM_TO_PLOT_FUNCTION))
-        peptide_plots, data_plots = calc.get_plots(as_tuple=True)
-        i = 1
-        for plot in peptide_plots:
-            plot.write_image(
-                settings.TMP_DIR / "plots" / f"plot_{i}.png", format="png", scale=3
-            )
-            html_peptide_plots.append(plot.to_html(config={"responsive": True}))
-            i += 1
-        for plot in data_plots:
-            plot.write_image(
-                settings.TMP_DIR / "plots" / f"plot_{i}.png", format="png", scale=3
-            )
-            html_data_plots.append(plot.to_html(config={"responsive": True}))
-            i += 1
+        # Plots are rendered lazily by plot() when they are shown
+        calc.save_features(settings.TMP_DIR / "features.parquet")
+        peptide_plots, data_plots = save_plot_config(
+            seq=calc.seq,
+            metadata_name=config_form.cleaned_data["metadata_name"],
+            params=get_params(plot_forms, FORM_TO_PLOT_FUNCTION),
+        )
         results_ready = True
 
     context = {
@@ -97,8 +104,8 @@ def index(request):
         "seq": seq,
         "paired_peptide_features": paired_peptide_features,
         "num_matches": num_matches,
-        "peptide_plots": html_peptide_plots,
-        "data_plots": html_data_plots,
+        "peptide_plots": peptide_plots,
+        "data_plots": data_plots,
     }
     return render(request, "index.html", context)
 
@@ -112,11 +119,103 @@ def download_data(request):
     )
 
 
+def plot(request, index):
+    if not 0 <= index < get_num_plots():
+        raise Http404(f"Plot {index} is not available.")
+    return HttpResponse(get_plot(index).to_json(), content_type="application/json")
+
+
 def download_plots(request):
     path = settings.TMP_DIR / "plots.zip"
     with zipfile.ZipFile(path, "w") as zipf:
-        for file in Path(settings.TMP_DIR / "plots").glob("*"):
+        # PNGs are only rendered once they are requested for download
+        for i in range(get_num_plots()):
+            file = settings.TMP_DIR / "plots" / f"plot_{i + 1}.png"
+            if not file.exists():
+                get_plot(i).write_image(file, format="png", scale=3)
             zipf.write(file, arcname=file.name)
     return FileResponse(
         open(path, "rb"), content_type="application/zip", filename="plots.zip"
     )
+
+
+@csrf_exempt
+@require_POST
+def api_features(request):
+    """
+    Computes features for a batch of sequences sent as JSON or NDJSON. See parse_api_request() for the expected body.
+    The query parameter 'format' selects the response: 'json' (columnar, default), 'ndjson' (streamed rows)
+    or 'arrow' (streamed Arrow IPC). The query parameter 'batch_size' sets the number of sequences computed at once.
+    """
+    output = request.GET.get("format", "json")
+    try:
+        batch_size = int(request.GET.get("batch_size", API_BATCH_SIZE))
+        if batch_size < 1:
+            raise ValueError(f"Batch size must be positive, got {batch_size}.")
+        if output not in ("json", "ndjson", "arrow"):
+            raise ValueError(f"Unknown format: {output}")
+        sequences, params = parse_api_request(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    invalid = get_invalid_seq(sequences)
+    if not invalid.empty:
+        return JsonResponse(
+            {
+                "error": f"Found {len(invalid)} invalid amino acid sequences.",
+                "invalid": invalid.unique().tolist(),
+            },
+            status=400,
+        )
+
+    batches = compute_batches(sequences, params, batch_size)
+    if output == "json":
+        features = pd.concat(batches, ignore_index=True)
+        return JsonResponse(
+            {"columns": list(features.columns), "data": features.to_dict("list")}
+        )
+    elif output == "ndjson":
+        return StreamingHttpResponse(
+            (batch.to_json(orient="records", lines=True) for batch in batches),
+            content_type="application/x-ndjson",
+        )
+    else:
+        return StreamingHttpResponse(
+            to_arrow_stream(batches),
+            content_type="application/vnd.apache.arrow.stream",
+        )
+
+
+@csrf_exempt
+@require_POST
+def upload_data(request):
+    """
+    Streams an uploaded dataset (field 'file') to disk and registers it under its content hash.
+    Returns the name to be used as dataset name in the configuration.
+    """
+    # Upload handlers must be replaced before the CSRF check reads the request body
+    request.upload_handlers = [DatasetUploadHandler(request)]
+    return _upload_data(request)
+
+
+@csrf_protect
+def _upload_data(request):
+    dataset = request.FILES.get("file")
+    if dataset is None:
+        return JsonResponse({"error": "No file was uploaded."}, status=400)
+    if dataset.error:
+        return JsonResponse({"error": dataset.error}, status=400)
+    if dataset.invalid:
+        return JsonResponse(
+            {
+                "error": f"Found {len(dataset.invalid)} invalid amino acid sequences.",
+                "invalid": sorted(dataset.invalid),
+            },
+            status=400,
+        )
+    return JsonResponse(
+        {
+            "name": dataset.data_name,
+            "rows": dataset.num_rows,
+            "sequences": len(dataset.sequences),
+        }
+    )
@@ -16,6 +16,7 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 PROJECT_DIR = Path(__file__).resolve().parent.parent.parent
 TMP_DIR = BASE_DIR / "tmp"
+UPLOAD_DIR = PROJECT_DIR / "data" / "uploads"
 
 
 # Quick-start development settings - unsuitable for production
@@ -8,4 +8,39 @@ document.addEventListener('DOMContentLoaded', () => {
         .forEach(cb => cb.checked = checked);
     })
   );
+
+  // Fetch and render plots once they scroll into view
+  const observer = new IntersectionObserver((entries, obs) => {
+    entries.forEach(entry => {
+      if (!entry.isIntersecting) return;
+      const el = entry.target;
+      obs.unobserve(el);
+      fetch(el.dataset.url)
+        .then(response => response.json())
+        .then(fig => {
+          el.textContent = '';
+          Plotly.newPlot(el, fig.data, fig.layout, {responsive: true});
+        })
+        .catch(() => el.textContent = 'Plot could not be loaded.');
+    });
+  }, {rootMargin: '200px'});
+  document.querySelectorAll('.js-lazy-plot').forEach(el => observer.observe(el));
+
+  // Upload datasets and fill in the registered name
+  document.querySelectorAll('.js-upload-dataset').forEach(input =>
+    input.addEventListener('change', () => {
+      const body = new FormData();
+      body.append('file', input.files[0]);
+      const csrf = input.closest('form').querySelector('[name=csrfmiddlewaretoken]').value;
+      fetch(input.dataset.url, {method: 'POST', body, headers: {'X-CSRFToken': csrf}})
+        .then(response => response.json())
+        .then(res => {
+          if (res.error) {
+            alert(res.error);
+          } else {
+            document.getElementById(input.dataset.target).value = res.name;
+          }
+        });
+    })
+  );
 });
\ No newline at end of file
@@ -1,3 +1,22 @@
-from .api import Calculator
+__all__ = ["Calculator", "read_fasta", "read_psm", "read_mztab", "digest_fasta"]
 
-__all__ = ["Calculator"]
+# Public names and the modules they are imported from on first access
+_LAZY_IMPORTS = {
+    "Calculator": "api",
+    "read_fasta": "io",
+    "read_psm": "io",
+    "read_mztab": "io",
+    "digest_fasta": "digest",
+}
+
+
+def __getattr__(name: str):
+    """
+    Imports the public API lazily, so importing pepsipy stays cheap.
+    """
+    if name in _LAZY_IMPORTS:
+        from importlib import import_module
+
+        module = import_module(f".{_LAZY_IMPORTS[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,322 @@
-# ─────────────────────────────────────────────────────
-#                     PLAYGROUND
-#   This file is just an experimental sandbox and is
-#   not part of the implementation.
-#
-#   To run this code, execute python -m pepsipy.
-# ──────────────────────────────────────────────────────
+"""
+Command-line interface of PEPSIPy for computing features and plots without writing any code.
 
-from pepsipy import Calculator
+    pepsipy features INPUT --out OUT.parquet [--features gravy ...] [--jobs N] [--chunksize M] [--digest trypsin]
+    pepsipy plots [--dataset INPUT] [--metadata META] [--seq SEQ] --out DIR [--plots hydropathy_profile ...]
+    pepsipy hello
 
-Calculator.hello_pepsi()
+Run `python -m pepsipy --help` for all options.
+"""
+
+import argparse
+import inspect
+from pathlib import Path
+import sys
+import time
+from typing import Iterator
+
+import pandas as pd
+
+from pepsipy.api import Calculator
+from pepsipy.digest import ENZYMES, digest_fasta
+from pepsipy.features import FEATURES
+from pepsipy.io import read_fasta, read_mztab
+
+
+def _read_chunks(path: Path, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Reads a CSV, TSV, Parquet, FASTA or mzTab file in chunks of at most chunksize rows.
+    """
+    suffixes = [s for s in path.suffixes if s != ".gz"]
+    if suffixes and suffixes[-1] in (".fasta", ".fa", ".faa"):
+        yield from read_fasta(path, chunksize=chunksize)
+    elif suffixes and suffixes[-1] == ".mztab":
+        yield from read_mztab(path, chunksize=chunksize)
+    elif path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        sep = "\t" if path.suffix in (".tsv", ".txt") else ","
+        yield from pd.read_csv(path, sep=sep, chunksize=chunksize)
+
+
+class _ChunkWriter:
+    """
+    Appends computed chunks to a CSV or Parquet file, depending on the file extension.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.writer = None
+        self.schema = None
+
+    def write(self, chunk: pd.DataFrame):
+        if self.path.suffix == ".parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self.writer is None:
+                self.schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                self.writer = pq.ParquetWriter(self.path, self.schema)
+            self.writer.write_table(
+                pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False)
+            )
+        else:
+            chunk.to_csv(
+                self.path,
+                mode="a" if self.writer else "w",
+                header=not self.writer,
+                index=False,
+            )
+            self.writer = True
+
+    def close(self):
+        if self.path.suffix == ".parquet" and self.writer is not None:
+            self.writer.close()
+
+
+def _parse_param(pair: str) -> tuple[str, bool | int | float | str]:
+    """
+    Converts a parameter given as KEY=VALUE into its key and a bool, int, float or str value.
+    Used as argparse type, so malformed parameters are reported as usage error.
+    """
+    key, sep, val = pair.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(
+            f"Parameter must be given as KEY=VALUE: {pair}"
+        )
+    if val.lower() in ("true", "false"):
+        return key, val.lower() == "true"
+    for convert in (int, float):
+        try:
+            return key, convert(val)
+        except ValueError:
+            pass
+    return key, val
+
+
+def _parse_params(pairs: list[str]) -> dict:
+    """
+    Converts parameters given as KEY=VALUE into a dictionary with bool, int, float or str values.
+    """
+    return dict(_parse_param(pair) for pair in pairs)
+
+
+def _param_names(method) -> set[str]:
+    """
+    Returns the names of the parameters of a Calculator.set_*_params() method.
+    """
+    return set(inspect.signature(method).parameters) - {"self"}
+
+
+def _feature_params(features: list[str], params: dict) -> dict:
+    """
+    Selects the given features (all if None) together with their parameters.
+    """
+    selected = {f: True for f in features} if features else {"select_all": True}
+    return {**selected, **params}
+
+
+def _log(msg: str):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def run_features(args: argparse.Namespace):
+    """
+    Computes features on a dataset chunk by chunk and writes them to a file.
+    """
+    calc = Calculator()
+    calc.feature_params = _feature_params(args.features, dict(args.param))
+
+    if args.signature_cache and Path(args.signature_cache).exists():
+        calc.load_signature_cache(args.signature_cache)
+
+    writer = _ChunkWriter(Path(args.out))
+    num_rows = 0
+    start = time.perf_counter()
+    try:
+        if args.digest:
+            chunks = digest_fasta(
+                args.input,
+                enzyme=args.digest,
+                missed_cleavages=args.missed_cleavages,
+                min_length=args.min_length,
+                max_length=args.max_length,
+                chunksize=args.chunksize,
+            )
+        else:
+            chunks = _read_chunks(Path(args.input), args.chunksize)
+        for i, chunk in enumerate(calc.stream_features(chunks, jobs=args.jobs)):
+            writer.write(chunk)
+            num_rows += len(chunk)
+            elapsed = time.perf_counter() - start
+            _log(f"Chunk {i + 1}: {num_rows} rows in {elapsed:.2f} s")
+    finally:
+        writer.close()
+    if args.signature_cache:
+        calc.save_signature_cache(args.signature_cache)
+    elapsed = time.perf_counter() - start
+    _log(
+        f"Computed features for {num_rows} rows in {elapsed:.2f} s "
+        f"({num_rows / max(elapsed, 1e-9):.0f} rows/s). Results were saved to '{args.out}'."
+    )
+
+
+def run_plots(args: argparse.Namespace):
+    """
+    Generates plots for a sequence of interest and/or a dataset and saves them to a directory.
+    """
+    from pepsipy.plots import PLOTS
+
+    calc = Calculator(seq=args.seq)
+    feature_keys = _param_names(Calculator.set_feature_params)
+    params = {k: v for k, v in args.param if k not in feature_keys}
+    if args.plots:
+        params.update({p: True for p in args.plots})
+    else:
+        # Select all plots that can be generated with the given inputs
+        params.update(
+            {
+                key: bool(args.seq) if plot.seq_based else bool(args.dataset)
+                for key, plot in PLOTS.items()
+                if plot.default
+            }
+        )
+    calc.plot_params = params
+
+    start = time.perf_counter()
+    if args.dataset:
+        dataset = pd.concat(_read_chunks(Path(args.dataset), args.chunksize))
+        calc.setup(dataset=dataset, metadata=pd.read_csv(args.metadata))
+        calc.feature_params = _feature_params(
+            args.features, {k: v for k, v in args.param if k in feature_keys}
+        )
+        calc.get_features()
+        _log(f"Computed features in {time.perf_counter() - start:.2f} s")
+    peptide_plots, data_plots = calc.get_plots(as_tuple=True)
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    for i, plot in enumerate(peptide_plots + data_plots):
+        path = out / f"plot_{i + 1}.{args.format}"
+        if args.format == "html":
+            plot.write_html(path)
+        else:
+            plot.write_image(path, format=args.format, scale=3)
+    _log(
+        f"Generated {len(peptide_plots) + len(data_plots)} plots in "
+        f"{time.perf_counter() - start:.2f} s. Plots were saved to '{out}'."
+    )
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(
+        prog="pepsipy", description="Compute peptide features and plots."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    features = subparsers.add_parser(
+        "features",
+        help="Compute features on a dataset (CSV, TSV, Parquet, FASTA or mzTab).",
+    )
+    features.add_argument("input", help="Dataset containing the column 'Sequence'")
+    features.add_argument("--out", required=True, help="Output file (.csv or .parquet)")
+    features.add_argument(
+        "--features",
+        nargs="+",
+        choices=FEATURES.keys(),
+        help="Features to compute. All features are computed if omitted.",
+    )
+    features.add_argument(
+        "--param",
+        nargs="*",
+        default=[],
+        type=_parse_param,
+        help="Feature parameters as KEY=VALUE, e.g. charge_at_ph_level=7.4",
+    )
+    features.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: all cores)",
+    )
+    features.add_argument(
+        "--chunksize", type=int, default=100_000, help="Number of rows per chunk"
+    )
+    features.add_argument(
+        "--signature-cache",
+        help="File (.npz) for reusing charges and pIs of previous runs, which is created or updated",
+    )
+    features.add_argument(
+        "--digest",
+        choices=ENZYMES.keys(),
+        help="Digest the proteins of a FASTA input in silico and compute features on the distinct peptides",
+    )
+    features.add_argument(
+        "--missed-cleavages",
+        type=int,
+        default=2,
+        help="Maximum number of missed cleavages with --digest",
+    )
+    features.add_argument(
+        "--min-length", type=int, default=7, help="Minimum peptide length with --digest"
+    )
+    features.add_argument(
+        "--max-length",
+        type=int,
+        default=30,
+        help="Maximum peptide length with --digest",
+    )
+    features.set_defaults(func=run_features)
+
+    plots = subparsers.add_parser("plots", help="Generate plots and save them.")
+    plots.add_argument("--seq", help="Peptide sequence of interest")
+    plots.add_argument("--dataset", help="Dataset containing the column 'Sequence'")
+    plots.add_argument(
+        "--metadata", help="Metadata file (.csv), required with --dataset"
+    )
+    plots.add_argument("--out", required=True, help="Output directory")
+    plots.add_argument(
+        "--plots",
+        nargs="+",
+        help="Plots to generate. All plots are generated if omitted.",
+    )
+    plots.add_argument(
+        "--features",
+        nargs="+",
+        choices=FEATURES.keys(),
+        help="Features to compute on the dataset. All features are computed if omitted.",
+    )
+    plots.add_argument(
+        "--param",
+        nargs="*",
+        default=[],
+        type=_parse_param,
+        help="Plot and feature parameters as KEY=VALUE, e.g. raincloud_feature=GRAVY",
+    )
+    plots.add_argument("--format", default="png", choices=["png", "svg", "pdf", "html"])
+    plots.add_argument(
+        "--chunksize", type=int, default=100_000, help="Number of rows per chunk"
+    )
+    plots.set_defaults(func=run_plots)
+
+    hello = subparsers.add_parser("hello", help="Run the PEPSI demonstration.")
+    hello.set_defaults(func=lambda args: Calculator.hello_pepsi())
+
+    args = parser.parse_args(argv)
+    if getattr(args, "dataset", None) and not args.metadata:
+        parser.error("--metadata is required when --dataset is given.")
+    if args.command in ("features", "plots"):
+        known = _param_names(Calculator.set_feature_params)
+        if args.command == "plots":
+            known |= _param_names(Calculator.set_plot_params)
+        unknown = [key for key, _ in args.param if key not in known]
+        if unknown:
+            parser.error(f"Unknown parameters: {unknown}")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
 import pandas as pd
-import plotly.io as pio
 
 from pepsipy.features import (
+    SignatureCache,
     _compute_features,
+    _compute_feature_matrix,
+    _stream_features,
     _seq_length,
     _aa_frequency,
     _molecular_weight,
@@ -20,19 +26,23 @@ from pepsipy.features import (
     _extinction_coefficient,
     _instability_index,
 )
-from pepsipy.plots import (
-    PLOTS,
-    _generate_plots,
-    _aa_distribution,
-    _hydropathy_profile,
-    _classification,
-    _titration_curve,
-    _compare_features,
-    _compare_feature,
-    _raincloud,
-    _mann_whitney_u_test,
-)
 from pepsipy.constants import PROJECT_PATH, DATA_PATH
+from pepsipy.index import FeatureIndex
+from pepsipy.matrix import IntensityMatrix, _intensity_matrix, _normalize
+
+
+class _LazyPlot:
+    """
+    Exposes a plot function of pepsipy.plots as static method, but only imports the module (and plotly) on first access.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        from pepsipy import plots
+
+        return getattr(plots, self.name)
 
 
 class Calculator:
@@ -43,6 +53,12 @@ class Calculator:
         seq: Amino acid sequence of interest
         feature_params: Dictionary containing all available features and their associated parameters. Use set_feature_params() seperately to get an overview on all options.
         plot_params: Dictionary containing all available plots and their associated parameters. Use set_plot_params() seperately to get an overview on all options.
+        compact: If True, computed features use memory-saving dtypes (float32, small integers and categoricals for text columns). Recommended for very large datasets.
+        signature_cache: Cache of charges and pIs per composition signature, which is filled while computing features. See load_signature_cache() to reuse values of previous runs.
+        feature_index: Index over the computed features for fast queries, built on first use by query() and reset whenever the data changes
+        protein_mapping: Occurrences of the dataset's peptides in a proteome, see map_proteins()
+        intensity_matrix: Sparse sample x peptide intensity matrix of the dataset, built on first use by get_intensity_matrix() and reset whenever the data changes
+        normalized_matrices: Normalized intensity matrices by normalization and log transform, see normalize()
     """
 
     dataset: pd.DataFrame
@@ -52,7 +68,13 @@ class Calculator:
     seq: str
     feature_params: dict
     plot_params: dict
+    compact: bool
+    signature_cache: SignatureCache
     computed_features: pd.DataFrame
+    feature_index: FeatureIndex
+    protein_mapping: pd.DataFrame
+    intensity_matrix: IntensityMatrix
+    normalized_matrices: dict[tuple, IntensityMatrix]
 
     def __init__(
         self,
@@ -61,10 +83,15 @@ class Calculator:
         seq: str = None,
         feature_params: dict = None,
         plot_params: dict = None,
+        compact: bool = False,
     ):
         self.dataset = None
         self.metadata = None
         self.seq = None
+        self.feature_index = None
+        self.protein_mapping = None
+        self.intensity_matrix = None
+        self.normalized_matrices = {}
         self.setup(
             dataset=dataset,
             metadata=metadata,
@@ -72,6 +99,8 @@ class Calculator:
         )
         self.feature_params = feature_params
         self.plot_params = plot_params
+        self.compact = compact
+        self.signature_cache = SignatureCache()
         self.computed_features = None
 
     # Setup
@@ -89,7 +118,13 @@ class Calculator:
         """
         if dataset is not None:
             self.dataset = dataset
+            self.feature_index = None
+            self.protein_mapping = None
+            self.intensity_matrix = None
+            self.normalized_matrices = {}
         if metadata is not None:
+            self.intensity_matrix = None
+            self.normalized_matrices = {}
             self.metadata = metadata
             self.metadata_list = list(metadata.columns)
             self.key_metadata = metadata.columns[0]
@@ -141,16 +176,32 @@ class Calculator:
         compare_feature_a: str = "GRAVY",
         compare_feature_group_by: str = None,
         compare_feature_intensity_threshold: float = None,
+        compare_feature_precomputed: bool = False,
         raincloud: bool = False,
         raincloud_feature: str = "GRAVY",
         raincloud_group_by: str = None,
         raincloud_log_scaled: bool = True,
+        raincloud_seed: int = 0,
+        raincloud_precomputed: bool = False,
         mann_whitney: bool = False,
         mann_whitney_feature: str = "GRAVY",
         mann_whitney_group_by: str = None,
         mann_whitney_group_a: str = None,
         mann_whitney_group_b: str = None,
         mann_whitney_alternative: str = "two-sided",
+        mann_whitney_precomputed: bool = False,
+        pairwise_tests: bool = False,
+        pairwise_tests_group_by: str = None,
+        pairwise_tests_alternative: str = "two-sided",
+        pairwise_tests_correction: str = "bh",
+        volcano: bool = False,
+        volcano_group_by: str = None,
+        volcano_group_a: str = None,
+        volcano_group_b: str = None,
+        volcano_test: str = "welch",
+        volcano_correction: str = "bh",
+        volcano_alpha: float = 0.05,
+        volcano_normalization: str = None,
     ):
         """
         Selects peptide and dataset plots and their related parameters.
@@ -172,6 +223,24 @@ class Calculator:
                 msg = f"The following information is not available: {missing}. Please execute the corresponding set or get methods first."
             raise ValueError(msg)
 
+    def _merge_metadata(self) -> pd.DataFrame:
+        """
+        Joins the computed features with the metadata. Requires that get_features() has been executed first.
+        """
+        self._ensure_attrs("computed_features", "metadata")
+        metadata = self.metadata
+        if self.compact:
+            metadata = metadata.astype(
+                {
+                    col: "category"
+                    for col in metadata.columns[1:]
+                    if metadata[col].dtype == object
+                }
+            )
+        return pd.merge(
+            self.computed_features, metadata, on=self.key_metadata, how="left"
+        )
+
     # Features
     def get_features(self) -> pd.DataFrame:
         """
@@ -187,9 +256,246 @@ class Calculator:
             params=params,
             df=self.dataset,
             seq=None,
+            compact=self.compact,
+            cache=self.signature_cache,
+        )
+        self.feature_index = None
+        return self.computed_features
+
+    def get_feature_matrix(
+        self, dtype: np.dtype = np.float32, out: str | Path = None
+    ) -> tuple[np.ndarray, list[str]]:
+        """
+        Computes selected numeric features on the current dataset as a dense NumPy matrix with one row per dataset row. Requires a dataset set by setup().
+        String features are skipped and no pandas DataFrame is built, which makes this suitable for very large datasets (e.g., as input for machine learning).
+        Returns the matrix and the labels of its columns.
+        Note: If no features were explicitly selected, all available numeric features are computed with their default options.
+            dtype: NumPy dtype of the matrix
+            out: If given, the matrix is written to a memory-mapped .npy file at this path, which can be reopened with np.load(out, mmap_mode="r").
+        """
+        self._ensure_attrs("dataset")
+        if self.feature_params:
+            params = self.feature_params
+        else:
+            params = {"select_all": True}
+        return _compute_feature_matrix(
+            params=params,
+            df=self.dataset,
+            dtype=dtype,
+            out=out,
+            cache=self.signature_cache,
+        )
+
+    def stream_features(
+        self, chunks: Iterable[pd.DataFrame], jobs: int = 1
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Computes selected features on consecutive chunks of a dataset (e.g., from pd.read_csv(..., chunksize=...)) and yields the computed chunks.
+        In contrast to get_features(), the whole dataset never has to be loaded into memory. Results are not stored in computed_features.
+        Note: If no features were explicitly selected, all available features are computed with their default options.
+            chunks: Iterable of pandas DataFrames, each containing the column 'Sequence'
+            jobs: Number of worker processes computing chunks in parallel. If set to None, all available cores are used.
+        """
+        if self.feature_params:
+            params = self.feature_params
+        else:
+            params = {"select_all": True}
+        return _stream_features(
+            params=params,
+            chunks=chunks,
+            jobs=jobs,
+            compact=self.compact,
+            cache=self.signature_cache,
         )
+
+    def get_intensity_matrix(self) -> IntensityMatrix:
+        """
+        Converts the long-format dataset (one row per peptide and sample) into a sparse matrix with one row per sample and one column
+        per distinct peptide. The matrix is built once and reused until setup() changes the dataset or metadata. Requires a dataset set by setup().
+        Samples are identified by the metadata key (e.g. 'Sample') or, without metadata, by the column 'Sample'.
+        """
+        self._ensure_attrs("dataset")
+        if self.intensity_matrix is None:
+            key = self.key_metadata if self.metadata is not None else "Sample"
+            self.intensity_matrix = _intensity_matrix(self.dataset, key=key)
+        return self.intensity_matrix
+
+    def normalize(self, method: str = "median", log: str = None) -> IntensityMatrix:
+        """
+        Normalizes the intensities of each sample on the sparse intensity matrix (see get_intensity_matrix()), using only observed intensities.
+        Results are cached per method and log transform until setup() changes the dataset or metadata. Requires a dataset set by setup().
+            method: Can be "median" (each sample is scaled to the same median), "quantile" (all samples get the same distribution),
+                "tic" (total ion current, each sample is scaled to the same total intensity) or None (no normalization)
+            log: Log transform applied after the normalization, can be "log2", "log10", "ln" or None
+        """
+        key = (method, log)
+        if key not in self.normalized_matrices:
+            self.normalized_matrices[key] = _normalize(
+                self.get_intensity_matrix(), method=method, log=log
+            )
+        return self.normalized_matrices[key]
+
+    def digest_features(
+        self,
+        fasta: str | Path,
+        enzyme: str = "trypsin",
+        missed_cleavages: int = 2,
+        min_length: int = 7,
+        max_length: int = 30,
+        chunksize: int = 100_000,
+        jobs: int = 1,
+        deduplicate: bool = True,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Digests a FASTA proteome in silico and computes selected features on the distinct theoretical peptides chunk by chunk (see stream_features()).
+        Neither the proteome nor the digest is loaded into memory at once. Yields computed chunks with the columns 'Protein ID', 'Sequence' and the features.
+            fasta: Path to a (gzip-compressed) FASTA file
+            enzyme: Can be "trypsin" or "lys-c"
+            missed_cleavages: Maximum number of missed cleavage sites within a peptide
+            min_length: Minimum peptide length
+            max_length: Maximum peptide length
+            chunksize: Maximum number of peptides per chunk
+            jobs: Number of worker processes computing chunks in parallel. If set to None, all available cores are used.
+            deduplicate: If True, peptides occurring in several proteins are only computed once (see pepsipy.digest_fasta())
+        """
+        from pepsipy.digest import digest_fasta
+
+        chunks = digest_fasta(
+            fasta,
+            enzyme=enzyme,
+            missed_cleavages=missed_cleavages,
+            min_length=min_length,
+            max_length=max_length,
+            chunksize=chunksize,
+            deduplicate=deduplicate,
+        )
+        return self.stream_features(chunks, jobs=jobs)
+
+    def load_signature_cache(self, path: str | Path):
+        """
+        Loads charges and pIs per composition signature saved by save_signature_cache(), so they are not computed again.
+            path: File saved by save_signature_cache()
+        """
+        self.signature_cache = SignatureCache.load(path)
+
+    def save_signature_cache(self, path: str | Path):
+        """
+        Saves the charges and pIs per composition signature computed so far (.npz file).
+            path: Output file
+        """
+        self.signature_cache.save(path)
+
+    def save_features(
+        self, path: str | Path, format: str = None, row_group_size: int = 100_000
+    ):
+        """
+        Saves the computed features with an explicit schema, so that all dtypes are preserved. Requires that get_features() has been executed first.
+            path: Output file
+            format: Can be "parquet", "feather" or "csv". If None, the format is inferred from the file extension.
+            row_group_size: Number of rows per row group (Parquet) or record batch (Feather)
+        """
+        from pepsipy.io import save_features
+
+        self._ensure_attrs("computed_features")
+        save_features(self.computed_features, path, format, row_group_size)
+
+    def load_features(self, path: str | Path, format: str = None) -> pd.DataFrame:
+        """
+        Loads features saved by save_features() as computed features. Memory-saving dtypes (see compact) are kept.
+            path: File containing computed features
+            format: Can be "parquet", "feather" or "csv". If None, the format is inferred from the file extension.
+        """
+        from pepsipy.io import load_features
+
+        self.computed_features = load_features(path, format)
+        self.feature_index = None
         return self.computed_features
 
+    def get_feature_index(self) -> FeatureIndex:
+        """
+        Returns the index over the computed features, which is built once and reused until the data changes.
+        Requires that get_features() has been executed first.
+        """
+        self._ensure_attrs("computed_features")
+        if self.feature_index is None:
+            self.feature_index = FeatureIndex(self.computed_features)
+        return self.feature_index
+
+    def query(self, ranges: dict[str, tuple] = None, seq: str = None) -> pd.DataFrame:
+        """
+        Filters the computed features by feature ranges and/or a sequence using the feature index (see get_feature_index()).
+        Repeated queries are answered by binary search on sorted features, without scanning the whole dataset.
+        Requires that get_features() has been executed first. Returns the matching rows in dataset order.
+            ranges: Mapping of feature label to (low, high) bounds (inclusive), where None means unbounded, e.g. {"Isoelectric point": (4, 6), "GRAVY": (0, None)}
+            seq: If given, only rows containing this sequence are returned
+        """
+        return self.get_feature_index().query(ranges, seq)
+
+    def similar_peptides(
+        self, seq: str | list[str], k: int = 10, features: list[str] = None
+    ) -> pd.DataFrame:
+        """
+        Finds the peptides of the dataset that are physicochemically closest to one or many sequences, measured by the
+        Euclidean distance of their standardized numeric features. The KD-tree over the distinct sequences is built once and
+        reused until the data changes. Sequences that are not part of the dataset are computed with the current feature parameters.
+        Requires that get_features() has been executed first. Returns a table with up to k rows per sequence with the columns
+        'Query', 'Sequence', 'Distance' and the features, ordered by query and distance. A query is never returned as its own neighbour.
+            seq: One or many sequences of interest
+            k: Number of neighbours per sequence
+            features: Labels of numeric features spanning the feature space. If None, all computed numeric features are used.
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1.")
+        seqs = [seq] if isinstance(seq, str) else list(seq)
+        neighbors = self.get_feature_index().get_neighbors(features)
+
+        # Look up the features of known sequences, compute those of unknown sequences
+        values = np.full((len(seqs), len(neighbors.features)), np.nan)
+        unknown = []
+        for i, s in enumerate(seqs):
+            if s in neighbors.rows:
+                values[i] = neighbors.values[neighbors.rows[s]]
+            else:
+                unknown.append(i)
+        if unknown:
+            computed = _compute_features(
+                params=self.feature_params or {"select_all": True},
+                df=pd.DataFrame({"Sequence": [seqs[i] for i in unknown]}),
+                cache=self.signature_cache,
+            )
+            values[unknown] = computed[neighbors.features].to_numpy(dtype=np.float64)
+
+        positions, distances = neighbors.query(values, k=k, exclude=seqs)
+        query_ids, ranks = np.nonzero(positions >= 0)
+        found = positions[query_ids, ranks]
+        result = pd.DataFrame(
+            {
+                "Query": np.asarray(seqs, dtype=object)[query_ids],
+                "Sequence": neighbors.sequences[found],
+                "Distance": distances[query_ids, ranks],
+            }
+        )
+        result[neighbors.features] = neighbors.values[found]
+        return result
+
+    def map_proteins(
+        self, fasta: str | Path, cache_dir: str | Path = None
+    ) -> pd.DataFrame:
+        """
+        Maps the peptides of the current dataset to the proteins of a FASTA proteome, independent of the column 'Protein ID'.
+        All distinct peptides are searched at once with an Aho-Corasick automaton while the FASTA file is streamed once.
+        Requires a dataset set by setup(). Returns one row per occurrence with the columns 'Sequence', 'Protein ID', 'Start' and 'End' (1-based, inclusive),
+        which is also stored as protein_mapping.
+            fasta: Path to a (gzip-compressed) FASTA file
+            cache_dir: If given, the mapping is stored in this directory and reused for the same peptides and FASTA content
+        """
+        from pepsipy.proteins import _map_peptides
+
+        self._ensure_attrs("dataset")
+        peptides = self.dataset["Sequence"].dropna().unique()
+        self.protein_mapping = _map_peptides(peptides, fasta, cache_dir=cache_dir)
+        return self.protein_mapping
+
     def get_peptide_features(self) -> pd.DataFrame:
         """
         Computes selected features on the current peptide sequence of interest. Requires a sequence set by setup().
@@ -223,6 +529,115 @@ class Calculator:
     extinction_coefficient = staticmethod(_extinction_coefficient)
     instability_index = staticmethod(_instability_index)
 
+    # Statistics
+    def pairwise_tests(
+        self,
+        group_by: str = "Group",
+        features: list[str] = None,
+        alternative: str = "two-sided",
+        correction: str = "bh",
+    ) -> pd.DataFrame:
+        """
+        Performs Mann-Whitney U tests on every numeric feature between every pair of groups and corrects the p-values for multiple testing.
+        Requires that get_features() has been executed first. Returns a table with one row per feature and pair of groups.
+            group_by: Metadata aspect (e.g. Group, Batch, ...) that peptides get grouped by
+            features: Features to be tested. If None, all computed numeric features are tested.
+            alternative: Chosen test alternative (two-sided, greater, less), referring to the first group of each pair
+            correction: Multiple testing correction over all tests, can be "bh" (Benjamini-Hochberg), "bonferroni" or "none"
+        """
+        from pepsipy.stats import _pairwise_tests
+
+        return _pairwise_tests(
+            self._merge_metadata(),
+            group_by=group_by,
+            features=features,
+            alternative=alternative,
+            correction=correction,
+        )
+
+    def differential_abundance(
+        self,
+        group_by: str = "Group",
+        group_a: str = None,
+        group_b: str = None,
+        test: str = "welch",
+        alternative: str = "two-sided",
+        correction: str = "bh",
+        log: bool = True,
+        min_observations: int = 2,
+        normalization: str = None,
+    ) -> pd.DataFrame:
+        """
+        Tests every peptide for a difference in intensity between two metadata groups, all peptides at once on the sparse intensity matrix (see get_intensity_matrix()).
+        Requires a dataset and metadata set by setup(). Returns a table indexed by 'Sequence' with group sizes and means, log2 fold change, test statistic, p-value and adjusted p-value.
+            group_by: Metadata aspect (e.g. Group, Batch, ...) that samples get grouped by
+            group_a: First group. If None, the first of exactly two groups (in sorted order) is used.
+            group_b: Second group. If None, the second of exactly two groups (in sorted order) is used.
+            test: Can be "welch" (Welch's t-test) or "mann-whitney" (Mann-Whitney U test)
+            alternative: Chosen test alternative (two-sided, greater, less), referring to group_a
+            correction: Multiple testing correction, can be "bh" (Benjamini-Hochberg), "bonferroni" or "none"
+            log: If True, intensities are log2-transformed before testing
+            min_observations: Minimum number of observed intensities per group for a peptide to be tested
+            normalization: Normalization of the intensities before testing (see normalize()), can be "median", "quantile", "tic" or None
+        """
+        from pepsipy.stats import _differential_abundance
+
+        self._ensure_attrs("metadata")
+        return _differential_abundance(
+            self.normalize(method=normalization),
+            self.metadata,
+            group_by=group_by,
+            group_a=group_a,
+            group_b=group_b,
+            test=test,
+            alternative=alternative,
+            correction=correction,
+            log=log,
+            min_observations=min_observations,
+        )
+
+    def summarize(
+        self,
+        by: str = None,
+        features: list[str] = None,
+        intensity_threshold: float = None,
+    ) -> pd.DataFrame:
+        """
+        Summarizes the computed features per sample or group, unweighted and weighted by intensity.
+        Requires that get_features() has been executed first. Returns a table indexed by group and feature.
+            by: Column the peptides get grouped by, e.g. a metadata aspect like 'Group'. If None, the metadata key (e.g. 'Sample') is used.
+            features: Features to be summarized. If None, all computed numeric features are summarized.
+            intensity_threshold: Peptides with intensities below this threshold are not included
+        """
+        from pepsipy.stats import _summarize
+
+        self._ensure_attrs("computed_features")
+        if by is None:
+            self._ensure_attrs("key_metadata")
+            by = self.key_metadata
+        if by in self.computed_features.columns:
+            df = self.computed_features
+        else:
+            df = self._merge_metadata()
+        return _summarize(
+            df, by=by, features=features, intensity_threshold=intensity_threshold
+        )
+
+    def protein_rollup(self, features: list[str] = None) -> pd.DataFrame:
+        """
+        Aggregates the computed peptide features and intensities per protein, including shared peptides.
+        Peptides are assigned by protein_mapping if map_proteins() was executed, otherwise by the column 'Protein ID' (proteins separated by ';').
+        Requires that get_features() has been executed first. Returns a table indexed by 'Protein ID' with peptide counts, intensity,
+        coverage (only with protein_mapping) and the mean, intensity-weighted mean, std, min and max of each feature.
+            features: Features to be aggregated. If None, all computed numeric features are aggregated.
+        """
+        from pepsipy.proteins import _protein_rollup
+
+        self._ensure_attrs("computed_features")
+        return _protein_rollup(
+            self.computed_features, mapping=self.protein_mapping, features=features
+        )
+
     # Plots
     def get_plots(self, as_tuple: bool = False) -> list | tuple:
         """
@@ -230,15 +645,14 @@ class Calculator:
         Note: If no plots were explicitly selected, all available plots are computed with their default options.
             as_tuple: If set to True, the peptide and dataset plots are returned seperated as tuple.
         """
-        if self.plot_params:
-            params = self.plot_params
-        else:
-            params = {"select_all": True}
+        from pepsipy.plots import PLOTS, _generate_plots
+
+        params = self._get_plot_params()
 
         selected = [
             feature
             for key, feature in PLOTS.items()
-            if params.get(key) or params.get("select_all")
+            if params.get(key) or (params.get("select_all") and feature.default)
         ]
         has_seq_based = any(f.seq_based for f in selected)
         has_dataset_based = any(not f.seq_based for f in selected)
@@ -246,12 +660,16 @@ class Calculator:
         if has_seq_based:
             self._ensure_attrs("seq")
         if has_dataset_based:
-            self._ensure_attrs("computed_features", "metadata")
-            current_features = pd.merge(
-                self.computed_features, self.metadata, on=self.key_metadata, how="left"
-            )
+            current_features = self._merge_metadata()
         else:
             current_features = self.dataset
+        if params.get("volcano"):
+            params = {**params, "volcano_sample_key": self.key_metadata}
+            # Same intensities as differential_abundance(), if only features were loaded they are taken from them
+            if self.dataset is not None:
+                params["volcano_matrix"] = self.normalize(
+                    method=params.get("volcano_normalization")
+                )
 
         plot_tuple = _generate_plots(
             df=current_features,
@@ -264,18 +682,57 @@ class Calculator:
             plots = [plot for sublist in plot_tuple for plot in sublist]
             return plots
 
-    aa_distribution = staticmethod(_aa_distribution)
-    hydropathy_profile = staticmethod(_hydropathy_profile)
-    classification = staticmethod(_classification)
-    titration_curve = staticmethod(_titration_curve)
-    compare_features = staticmethod(_compare_features)
-    compare_feature = staticmethod(_compare_feature)
-    raincloud = staticmethod(_raincloud)
-    mann_whitney_u_test = staticmethod(_mann_whitney_u_test)
+    def _get_plot_params(self) -> dict:
+        return self.plot_params if self.plot_params else {"select_all": True}
+
+    def get_batch_plots(self, seqs: list[str]) -> dict[str, list]:
+        """
+        Generates the selected sequence-based plots for many sequences at once, which is much faster than generating them one by one.
+        Returns a dictionary which maps each sequence to its list of plots.
+        Note: If no plots were explicitly selected, all available sequence-based plots are computed with their default options.
+            seqs: Sequences of interest
+        """
+        from pepsipy.plots import _generate_batch_plots
+
+        return _generate_batch_plots(list(seqs), self._get_plot_params())
+
+    def export_batch_plots(
+        self,
+        seqs: list[str],
+        out: str | Path,
+        format: str = "png",
+        jobs: int = 1,
+    ) -> list[Path]:
+        """
+        Generates the selected sequence-based plots for many sequences and writes them to files named <sequence>_<plot>.<format>.
+        Returns the paths of all written files.
+            seqs: Sequences of interest
+            out: Output directory
+            format: Can be "png", "svg", "pdf", "html" or "json"
+            jobs: Number of worker processes writing the files. If None, all available cores are used.
+        """
+        from pepsipy.plots import _export_batch_plots
+
+        return _export_batch_plots(
+            list(seqs), self._get_plot_params(), out, format=format, jobs=jobs
+        )
+
+    aa_distribution = _LazyPlot("_aa_distribution")
+    hydropathy_profile = _LazyPlot("_hydropathy_profile")
+    classification = _LazyPlot("_classification")
+    titration_curve = _LazyPlot("_titration_curve")
+    compare_features = _LazyPlot("_compare_features")
+    compare_feature = _LazyPlot("_compare_feature")
+    raincloud = _LazyPlot("_raincloud")
+    mann_whitney_u_test = _LazyPlot("_mann_whitney_u_test")
+    pairwise_tests_heatmap = _LazyPlot("_pairwise_tests_heatmap")
+    volcano_plot = _LazyPlot("_volcano_plot")
 
     # Demonstration: Hello PEPSI!
     @staticmethod
     def hello_pepsi():
+        import plotly.io as pio
+
         print("✨ Hello PEPSI! ✨")
         # Load data
         dataset = pd.read_csv(DATA_PATH / "peptides.csv")
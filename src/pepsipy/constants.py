@@ -184,6 +184,11 @@ CHARGE_CLASS_PER_AA = {
     "D": "Charged",
 }
 
+# pKa values of the Bjellqvist scale as used by modlamp for the net charge
+# https://doi.org/10.1002/elps.1150141163
+POSITIVE_PKS = {"Nterm": 9.38, "K": 10.67, "R": 12.10, "H": 6.04}
+NEGATIVE_PKS = {"Cterm": 2.15, "D": 3.71, "E": 4.15, "C": 8.14, "Y": 10.10}
+
 # <---- MISCELLANEOUS ---->
 
 COLORS = [
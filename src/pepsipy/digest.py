@@ -0,0 +1,100 @@
+import re
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+
+from pepsipy.constants import AA_LETTERS
+from pepsipy.io import _iter_fasta, _parse_fasta_id, _to_dataset
+
+# Cleavage rules as zero-width patterns matching between two residues
+ENZYMES = {
+    # C-terminal to K and R, but not before P
+    "trypsin": re.compile(r"(?<=[KR])(?!P)"),
+    # C-terminal to K
+    "lys-c": re.compile(r"(?<=K)"),
+}
+
+
+def _digest_protein(
+    protein: str,
+    enzyme: str = "trypsin",
+    missed_cleavages: int = 2,
+    min_length: int = 7,
+    max_length: int = 30,
+) -> Iterator[str]:
+    """
+    Yields the peptides of an in-silico digestion of a protein sequence in order of their start position.
+    Peptides containing symbols other than the 20 standard amino acids are skipped.
+        protein: Protein sequence
+        enzyme: Can be "trypsin" or "lys-c"
+        missed_cleavages: Maximum number of missed cleavage sites within a peptide
+        min_length: Minimum peptide length
+        max_length: Maximum peptide length
+    """
+    if enzyme not in ENZYMES:
+        raise ValueError(f"Unknown enzyme: {enzyme}. Choose one of {list(ENZYMES)}.")
+    sites = sorted(
+        {0, len(protein), *(m.start() for m in ENZYMES[enzyme].finditer(protein))}
+    )
+    for i, start in enumerate(sites[:-1]):
+        for end in sites[i + 1 : i + missed_cleavages + 2]:
+            if end - start > max_length:
+                break
+            if end - start >= min_length:
+                peptide = protein[start:end]
+                if not set(peptide) - AA_LETTERS:
+                    yield peptide
+
+
+def digest_fasta(
+    path: str | Path,
+    enzyme: str = "trypsin",
+    missed_cleavages: int = 2,
+    min_length: int = 7,
+    max_length: int = 30,
+    chunksize: int = 100_000,
+    deduplicate: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """
+    Digests all proteins of a FASTA file in silico while streaming it and yields the distinct peptides in chunks with the
+    columns 'Protein ID' (first protein containing the peptide) and 'Sequence', which can be passed to Calculator.stream_features().
+    Only the current chunk and a 64-bit hash of each distinct peptide seen so far are kept in memory, i.e. about 70 bytes
+    per distinct peptide independent of its length. Without deduplication, memory is bounded by the chunk size.
+        path: Path to a (gzip-compressed) FASTA file
+        enzyme: Can be "trypsin" or "lys-c"
+        missed_cleavages: Maximum number of missed cleavage sites within a peptide
+        min_length: Minimum peptide length
+        max_length: Maximum peptide length
+        chunksize: Maximum number of peptides per chunk
+        deduplicate: If True, peptides already yielded for a previous protein are skipped. Peptides are compared by hash,
+            so a hash collision (probability below 1e-3 for 1e8 distinct peptides) drops a peptide.
+    """
+    if enzyme not in ENZYMES:
+        raise ValueError(f"Unknown enzyme: {enzyme}. Choose one of {list(ENZYMES)}.")
+
+    def frames():
+        seen = set()
+        batch = []
+        for header, protein in _iter_fasta(path):
+            protein_id = _parse_fasta_id(header)
+            for peptide in _digest_protein(
+                protein.upper(), enzyme, missed_cleavages, min_length, max_length
+            ):
+                if deduplicate:
+                    # Hashes are stored instead of the peptides to bound memory per peptide
+                    key = hash(peptide)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                batch.append((protein_id, peptide))
+                if len(batch) >= chunksize:
+                    yield _to_frame(batch)
+                    batch = []
+        if batch:
+            yield _to_frame(batch)
+
+    def _to_frame(batch: list) -> pd.DataFrame:
+        return _to_dataset(pd.DataFrame(batch, columns=["Protein ID", "Sequence"]))
+
+    return frames()
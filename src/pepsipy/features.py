@@ -1,13 +1,14 @@
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from functools import partial
 import os
 from pathlib import Path
 import pickle
 import string
 import sys
-from typing import Callable
+from typing import Callable, Iterable, Iterator
 
-from modlamp.descriptors import GlobalDescriptor
 import numpy as np
 import pandas as pd
 
@@ -21,6 +22,8 @@ from pepsipy.constants import (
     WATER,
     CHEMICAL_CLASS,
     CHARGE_CLASS,
+    POSITIVE_PKS,
+    NEGATIVE_PKS,
 )
 from pepsipy.utils import (
     sanitize_seq,
@@ -164,6 +167,8 @@ def _isoelectric_point(seq: str, option: str = "bjellqvist") -> float:
         return float(round(model.predict(X)[0], 2))
 
     elif option == "bjellqvist":
+        from modlamp.descriptors import GlobalDescriptor
+
         desc = GlobalDescriptor(seq)
         desc.isoelectric_point(amide=False)
         return float(round(desc.descriptor[0][0], 2))
@@ -211,11 +216,56 @@ def _charge_at_ph(seq: str, ph: float = 7.0) -> float:
         seq: Given sequence
         ph: Given ph level
     """
+    from modlamp.descriptors import GlobalDescriptor
+
     desc = GlobalDescriptor(seq)
     desc.calculate_charge(ph=ph, amide=False)
     return float(round(desc.descriptor[0][0], 2))
 
 
+def _aa_counts(seqs: list[str]) -> np.ndarray:
+    """
+    Computes the frequency of each amino acid for many sequences at once.
+    Returns an array with one row per sequence and one column per amino acid in alphabetical order.
+    Note: The input sequences must be pre-sanitized to compute only valid amino acids.
+        seqs: Given sequences
+    """
+    letters = sorted(AA_LETTERS)
+    lookup = np.full(256, -1)
+    lookup[[ord(aa) for aa in letters]] = np.arange(len(letters))
+    try:
+        residues = lookup[np.frombuffer("".join(seqs).encode("ascii"), np.uint8)]
+    except UnicodeEncodeError:
+        residues = np.array([-1])
+    if (residues < 0).any():
+        invalid = set("".join(seqs)) - AA_LETTERS
+        raise ValueError(f"Invalid amino acid symbol: {', '.join(sorted(invalid))}")
+    seq_ids = np.repeat(np.arange(len(seqs)), [len(seq) for seq in seqs])
+    counts = np.bincount(
+        seq_ids * len(letters) + residues, minlength=len(seqs) * len(letters)
+    )
+    return counts.reshape(len(seqs), len(letters))
+
+
+def _charge_from_counts(counts: dict[str, np.ndarray], ph: np.ndarray) -> np.ndarray:
+    """
+    Computes the charge like modlamp (Bjellqvist) from the counts of the ionizable amino acids,
+    for many sequences and pH levels at once. The result is rounded to 3 decimals like modlamp.
+        counts: Counts of K, R, H, D, E, C and Y, each with one value per sequence (or broadcastable against ph)
+        ph: Given ph levels
+    """
+    # Each sequence has one N- and one C-terminus
+    pos_charge = 0.0
+    for aa, pk in POSITIVE_PKS.items():
+        c_r = 10 ** (pk - ph)
+        pos_charge = pos_charge + counts.get(aa, 1.0) * (c_r / (c_r + 1.0))
+    neg_charge = 0.0
+    for aa, pk in NEGATIVE_PKS.items():
+        c_r = 10 ** (ph - pk)
+        neg_charge = neg_charge + counts.get(aa, 1.0) * (c_r / (c_r + 1.0))
+    return np.round(pos_charge - neg_charge, 3)
+
+
 def _charge_density(seq: str, ph: float = 7.0) -> float:
     """
     Computes the charge density (charge / molecular weight) of a given sequence at a given pH level.
@@ -230,6 +280,8 @@ def _boman_index(seq: str) -> float:
     Computes the boman index of a given sequence (Boman, 2003).
         seq: Given sequence
     """
+    from modlamp.descriptors import GlobalDescriptor
+
     desc = GlobalDescriptor(seq)
     desc.boman_index()
     return float(round(desc.descriptor[0][0], 2))
@@ -267,40 +319,250 @@ def _instability_index(seq: str) -> float:
     Computes the instability index based on (Guruprasad et al., 1990) of a given sequence.
         seq: Given sequence
     """
+    from modlamp.descriptors import GlobalDescriptor
+
     desc = GlobalDescriptor(seq)
     desc.instability_index()
     return float(round(desc.descriptor[0][0], 2))
 
 
+# Amino acids whose counts determine the charge and the pI (bjellqvist) of a sequence
+IONIZABLE_AAS = "DECYHKR"
+
+
+class SignatureCache:
+    """
+    Stores feature values per composition signature, i.e. the counts of the ionizable amino acids D, E, C, Y, H, K and R.
+    The charge and the pI (bjellqvist) of a sequence only depend on its signature (the termini are the same for every sequence),
+    so they are computed once per signature and broadcast to all sequences sharing it.
+    The cache can be saved and loaded to reuse the values across runs.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        # If not None, newly computed values are also recorded here (see _compute_chunk())
+        self.added = None
+
+    def __len__(self) -> int:
+        return sum(len(table) for table in self.tables.values())
+
+    def compute(self, name: str, func: Callable, sequences: pd.Series) -> np.ndarray:
+        """
+        Computes a feature for many sequences, but calls func only once per signature that is not cached yet.
+            name: Identifier of the feature including its parameters, e.g. 'charge_at_ph,ph=7.4'
+            func: Feature of a single sequence that only depends on the signature
+            sequences: Given sequences
+        """
+        sequences = list(sequences)
+        letters = sorted(AA_LETTERS)
+        counts = _aa_counts(sequences)[:, [letters.index(aa) for aa in IONIZABLE_AAS]]
+        signatures, first, inverse = np.unique(
+            counts, axis=0, return_index=True, return_inverse=True
+        )
+        table = self.tables.setdefault(name, {})
+        values = np.empty(len(signatures))
+        for i, signature in enumerate(map(tuple, signatures.tolist())):
+            value = table.get(signature)
+            if value is None:
+                value = table[signature] = func(sequences[first[i]])
+                if self.added is not None:
+                    self.added.setdefault(name, {})[signature] = value
+            values[i] = value
+        return values[inverse.reshape(-1)]
+
+    def update(self, tables: dict[str, dict]):
+        """
+        Adds values computed elsewhere, e.g. by a worker process.
+            tables: Values per signature by feature identifier, like the attribute tables
+        """
+        for name, table in tables.items():
+            self.tables.setdefault(name, {}).update(table)
+
+    def save(self, path: str | Path):
+        """
+        Saves all cached values to a NumPy .npz file.
+        """
+        arrays = {"names": np.array(list(self.tables), dtype=str)}
+        for i, table in enumerate(self.tables.values()):
+            arrays[f"signatures_{i}"] = np.array(list(table), dtype=np.int32).reshape(
+                -1, len(IONIZABLE_AAS)
+            )
+            arrays[f"values_{i}"] = np.array(list(table.values()), dtype=np.float64)
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "SignatureCache":
+        """
+        Loads cached values saved by save().
+        """
+        cache = cls()
+        with np.load(path) as data:
+            for i, name in enumerate(data["names"]):
+                signatures = map(tuple, data[f"signatures_{i}"].tolist())
+                cache.tables[str(name)] = dict(
+                    zip(signatures, data[f"values_{i}"].tolist())
+                )
+        return cache
+
+
+def _round(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    Rounds each value with Python's round(), so results are identical to the features of single sequences.
+    """
+    return np.array([round(value, ndigits) for value in values.tolist()])
+
+
+def _counts_of(sequences: pd.Series, cache: SignatureCache) -> np.ndarray:
+    return _aa_counts(list(sequences))
+
+
+def _length_of(sequences: pd.Series, counts: np.ndarray, cache: SignatureCache):
+    return counts.sum(axis=1)
+
+
+def _weight_of(sequences: pd.Series, cache: SignatureCache) -> np.ndarray:
+    return sequences.apply(_molecular_weight).to_numpy(dtype=np.float64)
+
+
+def _charge_of(
+    sequences: pd.Series, cache: SignatureCache, ph: float = 7.0
+) -> np.ndarray:
+    return cache.compute(
+        f"charge_at_ph,ph={ph}", partial(_charge_at_ph, ph=ph), sequences
+    )
+
+
+def _same(values: np.ndarray) -> np.ndarray:
+    return values
+
+
+def _aromaticity_from_counts(counts: np.ndarray, length: np.ndarray) -> np.ndarray:
+    letters = sorted(AA_LETTERS)
+    num_aromatic = counts[:, [letters.index(aa) for aa in "FYW"]].sum(axis=1)
+    return _round(num_aromatic / length, 3)
+
+
+def _aliphatic_index_from_counts(counts: np.ndarray, length: np.ndarray) -> np.ndarray:
+    letters = sorted(AA_LETTERS)
+    nA, nV, nI, nL = (counts[:, letters.index(aa)] for aa in "AVIL")
+    return _round((nA + 2.9 * nV + 3.9 * (nI + nL)) * 100.0 / length, 2)
+
+
+def _extinction_coefficient_from_counts(
+    counts: np.ndarray, oxidized: bool = False
+) -> np.ndarray:
+    letters = sorted(AA_LETTERS)
+    extinction = (
+        counts[:, letters.index("W")] * 5500 + counts[:, letters.index("Y")] * 1490
+    )
+    if oxidized:
+        extinction += (counts[:, letters.index("C")] // 2) * 125
+    return extinction
+
+
+def _charge_density_from(charge: np.ndarray, weight: np.ndarray) -> np.ndarray:
+    return _round(charge / weight, 5)
+
+
+@dataclass
+class Intermediate:
+    # Computes the intermediate on a pandas Series of distinct sequences from the values of its dependencies
+    method: Callable
+    depends: tuple[str, ...] = ()
+    # Parameters taken from the kwargs of dependent features, with their defaults
+    defaults: dict = field(default_factory=dict)
+
+
+# Intermediates that are computed once per run and shared by all features depending on them
+INTERMEDIATES = {
+    "counts": Intermediate(_counts_of),
+    "length": Intermediate(_length_of, ("counts",)),
+    "weight": Intermediate(_weight_of),
+    "charge": Intermediate(_charge_of, defaults={"ph": 7.0}),
+}
+
+
 @dataclass
 class Feature:
     label: str
     numeric: bool
     method: Callable
     param_map: dict = None
+    dtype: str = "float64"
+    compact_dtype: str = "float32"
+    # Returns True if the feature with the given kwargs only depends on the composition signature (see SignatureCache)
+    signature_based: Callable[[dict], bool] = None
+    # Intermediates (see INTERMEDIATES) the feature is computed from on many sequences at once
+    depends: tuple[str, ...] = ()
+    # Computes the feature from the values of its intermediates and the kwargs not consumed by them
+    combine: Callable = None
 
 
 FEATURES = {
-    "molecular_weight": Feature("Molecular weight", True, _molecular_weight),
-    "three_letter_code": Feature("Three letter code", False, _three_letter_code),
-    "molecular_formula": Feature("Molecular formula", False, _molecular_formula),
-    "seq_length": Feature("Sequence length", True, _seq_length),
-    "aromaticity": Feature("Aromaticity", True, _aromaticity),
-    "aliphatic_index": Feature("Aliphatic index", True, _aliphatic_index),
+    "molecular_weight": Feature(
+        "Molecular weight", True, _molecular_weight, depends=("weight",), combine=_same
+    ),
+    "three_letter_code": Feature(
+        "Three letter code",
+        False,
+        _three_letter_code,
+        dtype="string",
+        compact_dtype="category",
+    ),
+    "molecular_formula": Feature(
+        "Molecular formula",
+        False,
+        _molecular_formula,
+        dtype="string",
+        compact_dtype="category",
+    ),
+    "seq_length": Feature(
+        "Sequence length",
+        True,
+        _seq_length,
+        dtype="int64",
+        compact_dtype="int32",
+        depends=("length",),
+        combine=_same,
+    ),
+    "aromaticity": Feature(
+        "Aromaticity",
+        True,
+        _aromaticity,
+        depends=("counts", "length"),
+        combine=_aromaticity_from_counts,
+    ),
+    "aliphatic_index": Feature(
+        "Aliphatic index",
+        True,
+        _aliphatic_index,
+        depends=("counts", "length"),
+        combine=_aliphatic_index_from_counts,
+    ),
     "charge_at_ph": Feature(
-        "Charge", True, _charge_at_ph, {"charge_at_ph_level": "ph"}
+        "Charge",
+        True,
+        _charge_at_ph,
+        {"charge_at_ph_level": "ph"},
+        depends=("charge",),
+        combine=_same,
     ),
     "charge_density": Feature(
         "Charge density",
         True,
         _charge_density,
         {"charge_density_level": "ph"},
+        depends=("charge", "weight"),
+        combine=_charge_density_from,
     ),
     "isoelectric_point": Feature(
         "Isoelectric point",
         True,
         _isoelectric_point,
         {"isoelectric_point_option": "option"},
+        signature_based=lambda kwargs: kwargs.get("option", "bjellqvist")
+        == "bjellqvist",
     ),
     "gravy": Feature("GRAVY", True, _gravy),
     "extinction_coefficient": Feature(
@@ -308,21 +570,89 @@ FEATURES = {
         True,
         _extinction_coefficient,
         {"extinction_coefficient_oxidized": "oxidized"},
+        dtype="int64",
+        compact_dtype="int32",
+        depends=("counts",),
+        combine=_extinction_coefficient_from_counts,
     ),
     "boman_index": Feature("Boman index", True, _boman_index),
     "instability_index": Feature("Instability index", True, _instability_index),
 }
 
 
+def _evaluate_features(
+    params: dict,
+    sequences: pd.Series,
+    numeric_only: bool = False,
+    cache: SignatureCache = None,
+) -> dict[str, np.ndarray | pd.Series]:
+    """
+    Computes the selected features (feature = True) on a pandas Series of distinct sequences.
+    Returns a mapping of feature label to the values of all sequences.
+    The intermediates the features depend on form a dependency graph, which is evaluated once per call,
+    so each intermediate (e.g. the residue counts or the charge at a given pH) is shared by all dependent features.
+        params: Feature parameters, see API class 'Calculator'
+        sequences: Distinct sequences
+        numeric_only: If True, only numeric features are computed
+        cache: Cache for features that only depend on the composition signature. If None, an empty cache is used.
+    """
+    if cache is None:
+        cache = SignatureCache()
+    computed = {}
+
+    def resolve(name: str, kwargs: dict):
+        intermediate = INTERMEDIATES[name]
+        node_kwargs = {
+            k: kwargs.get(k, default) for k, default in intermediate.defaults.items()
+        }
+        node = (name, *sorted(node_kwargs.items()))
+        if node not in computed:
+            inputs = [resolve(dep, kwargs) for dep in intermediate.depends]
+            computed[node] = intermediate.method(
+                sequences, *inputs, cache=cache, **node_kwargs
+            )
+        return computed[node]
+
+    select_all = params.get("select_all")
+    values = {}
+    for key, feature in FEATURES.items():
+        if not (params.get(key) or select_all):
+            continue
+        if numeric_only and not feature.numeric:
+            continue
+        kwargs = (
+            extract_related_kwargs(feature.param_map, params)
+            if feature.param_map
+            else {}
+        )
+        if feature.depends:
+            inputs = [resolve(dep, kwargs) for dep in feature.depends]
+            consumed = {
+                k for dep in feature.depends for k in INTERMEDIATES[dep].defaults
+            }
+            values[feature.label] = feature.combine(
+                *inputs, **{k: v for k, v in kwargs.items() if k not in consumed}
+            )
+            continue
+        func = feature.method if not kwargs else partial(feature.method, **kwargs)
+        if feature.signature_based and feature.signature_based(kwargs):
+            name = ",".join([key, *(f"{k}={v}" for k, v in sorted(kwargs.items()))])
+            values[feature.label] = cache.compute(name, func, sequences)
+        else:
+            values[feature.label] = sequences.apply(func)
+    return values
+
+
 def _compute_features(
     params: dict,
     df: pd.DataFrame = None,
     seq: str = None,
+    compact: bool = False,
+    cache: "SignatureCache" = None,
 ) -> pd.DataFrame:
     """
     Computes all selected features on a pandas DataFrame. See API class 'Calculator' for more information.
     """
-    select_all = params.get("select_all")
     # On single sequence or dataset
     if seq is not None:
         df = pd.DataFrame({"Sequence": [seq]})
@@ -330,27 +660,13 @@ def _compute_features(
     else:
         sequences = get_distinct_seq(df)
 
-    # Feature mappings as (label, function call with optional params)
-    mappings = {}
-    for key, feature in FEATURES.items():
-        kwargs = (
-            extract_related_kwargs(feature.param_map, params)
-            if feature.param_map
-            else {}
-        )
-        func = feature.method if not kwargs else partial(feature.method, **kwargs)
-        mappings[key] = (feature.label, func)
-    # Filter selected features (feature = True)
-    chosen_features = {
-        col: func
-        for feature, (col, func) in mappings.items()
-        if params.get(feature) or select_all
-    }
-
     # Compute features
-    for feature, func in chosen_features.items():
-        sequences[feature] = sequences["Sequence"].apply(func)
+    values = _evaluate_features(params, sequences["Sequence"], cache=cache)
+    for feature, feature_values in values.items():
+        sequences[feature] = feature_values
 
+    if compact:
+        return _compact_merge(df, sequences)
     merged = pd.merge(
         df,
         sequences,
@@ -358,3 +674,137 @@ def _compute_features(
         how="left",
     )
     return merged
+
+
+def _compact_merge(df: pd.DataFrame, sequences: pd.DataFrame) -> pd.DataFrame:
+    """
+    Broadcasts features computed per distinct sequence to all rows of a dataset using memory-saving dtypes (see Feature.compact_dtype).
+    Text columns of the dataset and string features are stored as categoricals, so each distinct value is kept only once.
+    """
+    codes = pd.Categorical(df["Sequence"], categories=sequences["Sequence"]).codes
+    compact_dtypes = {f.label: f.compact_dtype for f in FEATURES.values()}
+    result = {}
+    for col in df.columns:
+        if col == "Sequence":
+            result[col] = pd.Categorical.from_codes(codes, sequences["Sequence"])
+        elif df[col].dtype == object or df[col].dtype == "string":
+            result[col] = df[col].astype("category")
+        else:
+            result[col] = df[col]
+    for col in sequences.columns.drop("Sequence"):
+        dtype = compact_dtypes[col]
+        if dtype == "category":
+            value_codes, values = pd.factorize(sequences[col])
+            result[col] = pd.Categorical.from_codes(value_codes[codes], values)
+        else:
+            result[col] = sequences[col].to_numpy(dtype=dtype)[codes]
+    return pd.DataFrame(result, index=df.index)
+
+
+def _compute_feature_matrix(
+    params: dict,
+    df: pd.DataFrame,
+    dtype: np.dtype = np.float32,
+    out: str | Path = None,
+    chunksize: int = 1_000_000,
+    cache: "SignatureCache" = None,
+) -> tuple[np.ndarray, list[str]]:
+    """
+    Computes all selected numeric features on a pandas DataFrame and writes them into a dense matrix with one row
+    per dataset row. Returns the matrix and its column labels. See API class 'Calculator' for more information.
+    """
+    codes, uniques = pd.factorize(df["Sequence"])
+    if (codes < 0).any():
+        raise ValueError("The column 'Sequence' must not contain missing values.")
+
+    # Compute features once per distinct sequence
+    values = _evaluate_features(
+        params, pd.Series(uniques), numeric_only=True, cache=cache
+    )
+    table = np.empty((len(uniques), len(values)), dtype=dtype)
+    for j, feature_values in enumerate(values.values()):
+        table[:, j] = np.asarray(feature_values, dtype=np.float64)
+
+    shape = (len(df), len(values))
+    if out is not None:
+        matrix = np.lib.format.open_memmap(out, mode="w+", dtype=dtype, shape=shape)
+    else:
+        matrix = np.empty(shape, dtype=dtype)
+    # Broadcast to all rows chunk by chunk to bound temporary memory
+    for start in range(0, len(df), chunksize):
+        matrix[start : start + chunksize] = table[codes[start : start + chunksize]]
+    if isinstance(matrix, np.memmap):
+        matrix.flush()
+    return matrix, list(values)
+
+
+# Cache of the current worker process of _stream_features()
+_worker_cache = None
+
+
+def _init_worker(cache: SignatureCache):
+    """
+    Receives a copy of the parent's cache once per worker process instead of once per chunk.
+    """
+    global _worker_cache
+    _worker_cache = cache if cache is not None else SignatureCache()
+
+
+def _compute_chunk(
+    params: dict, df: pd.DataFrame, compact: bool
+) -> tuple[pd.DataFrame, dict]:
+    """
+    Computes the features of a chunk in a worker process. Returns the features and the cache values that were newly computed
+    for this chunk, so that the parent process can add them to its cache.
+    """
+    _worker_cache.added = {}
+    try:
+        features = _compute_features(
+            params=params, df=df, compact=compact, cache=_worker_cache
+        )
+        return features, _worker_cache.added
+    finally:
+        _worker_cache.added = None
+
+
+def _stream_features(
+    params: dict,
+    chunks: Iterable[pd.DataFrame],
+    jobs: int = 1,
+    compact: bool = False,
+    cache: "SignatureCache" = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Computes all selected features chunk by chunk and yields the computed chunks in input order.
+    If more than one job is given, chunks are computed in parallel worker processes. At most two chunks per worker are
+    held in memory at the same time. Each worker process gets a copy of the cache once and returns the values it newly computes
+    with every chunk, which are added to the given cache.
+    See API class 'Calculator' for more information.
+    """
+    if jobs is None:
+        jobs = os.cpu_count()
+    if jobs == 1:
+        if cache is None:
+            cache = SignatureCache()
+        for chunk in chunks:
+            yield _compute_features(
+                params=params, df=chunk, compact=compact, cache=cache
+            )
+        return
+
+    def collect(future) -> pd.DataFrame:
+        features, added = future.result()
+        if cache is not None:
+            cache.update(added)
+        return features
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(cache,)
+    ) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_compute_chunk, params, chunk, compact))
+            if len(pending) >= 2 * jobs:
+                yield collect(pending.popleft())
+        while pending:
+            yield collect(pending.popleft())
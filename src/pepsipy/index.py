@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+from pepsipy.features import FEATURES
+
+
+class NeighborIndex:
+    """
+    KD-tree over the standardized numeric features of all distinct sequences for nearest-neighbour queries.
+    Each feature is scaled to zero mean and unit variance, so all features contribute equally to the Euclidean distance.
+    Sequences with missing values in any of the features are not indexed.
+        df: pandas DataFrame containing computed features and the column 'Sequence'
+        features: Labels of the numeric features spanning the feature space
+    """
+
+    def __init__(self, df: pd.DataFrame, features: list[str]):
+        from sklearn.neighbors import KDTree
+
+        missing = [f for f in features if f not in df.columns]
+        if missing:
+            raise ValueError(
+                f"Features {missing} could not be found in dataset. Please make sure to compute them first."
+            )
+        distinct = df[["Sequence", *features]].drop_duplicates("Sequence")
+        values = distinct[features].to_numpy(dtype=np.float64, na_value=np.nan)
+        complete = ~np.isnan(values).any(axis=1)
+        values = values[complete]
+        self.features = list(features)
+        self.sequences = distinct["Sequence"].to_numpy(dtype=object)[complete]
+        self.rows = {seq: i for i, seq in enumerate(self.sequences)}
+        self.values = values
+        self.mean = values.mean(axis=0) if len(values) else np.zeros(len(features))
+        std = values.std(axis=0) if len(values) else np.ones(len(features))
+        self.std = np.where(std > 0, std, 1.0)
+        self.tree = KDTree((values - self.mean) / self.std)
+
+    def query(
+        self, values: np.ndarray, k: int = 10, exclude: list[str] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the k nearest indexed sequences for many points of the feature space at once.
+        Returns the positions of the neighbours (see sequences) and their distances, each with one row per point.
+        If fewer sequences are available, the missing neighbours get the position -1 and the distance NaN.
+            values: Feature values with one row per point and one column per feature
+            k: Number of neighbours per point
+            exclude: Sequence to be excluded from the neighbours of each point, e.g. the point's own sequence
+        """
+        num_points = len(values)
+        positions = np.full((num_points, k), -1)
+        distances = np.full((num_points, k), np.nan)
+        if num_points == 0 or len(self.sequences) == 0:
+            return positions, distances
+        # One more neighbour is needed if the excluded sequence is found
+        num_neighbors = min(k + 1, len(self.sequences))
+        found_distances, found = self.tree.query(
+            (np.asarray(values, dtype=np.float64) - self.mean) / self.std,
+            k=num_neighbors,
+        )
+        for i in range(num_points):
+            keep = np.ones(num_neighbors, dtype=bool)
+            if exclude is not None and exclude[i] in self.rows:
+                keep = found[i] != self.rows[exclude[i]]
+            num = min(k, keep.sum())
+            positions[i, :num] = found[i][keep][:num]
+            distances[i, :num] = found_distances[i][keep][:num]
+        return positions, distances
+
+
+class FeatureIndex:
+    """
+    Index over computed features for fast queries on large datasets.
+    Each numeric feature is sorted once (on first use), so the rows within a range are found by binary search.
+    Several ranges are intersected by starting from the most selective one and checking only its rows against the others,
+    so a query costs time proportional to the number of candidate rows instead of the dataset size.
+    Sequences are looked up by a hash index that maps each distinct sequence to its rows.
+        df: pandas DataFrame containing computed features and the column 'Sequence'
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.values = {}
+        self.sorted = {}
+        self.sequences = None
+        self.neighbors = {}
+
+    def _sorted(self, feature: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the row positions ordered by a feature and the sorted values. Missing values are placed at the end.
+        """
+        if feature not in self.sorted:
+            if feature not in self.df.columns:
+                raise ValueError(f"Feature {feature} could not be found in dataset.")
+            values = self.df[feature]
+            if not pd.api.types.is_numeric_dtype(values):
+                raise ValueError(f"Feature {feature} is not numeric.")
+            values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            order = np.argsort(values, kind="stable")
+            self.values[feature] = values
+            self.sorted[feature] = (order, values[order])
+        return self.sorted[feature]
+
+    def _bounds(self, feature: str, low: float, high: float) -> tuple[int, int]:
+        """
+        Returns the slice of the sorted feature values within [low, high].
+        """
+        _, values = self._sorted(feature)
+        start = 0 if low is None else np.searchsorted(values, low, side="left")
+        # Missing values are sorted after infinity
+        end = np.searchsorted(values, np.inf if high is None else high, side="right")
+        return start, max(start, end)
+
+    def range(self, feature: str, low: float = None, high: float = None) -> np.ndarray:
+        """
+        Returns the positions (in ascending order) of all rows whose feature value lies within [low, high].
+        Rows with missing values never match.
+            feature: Label of a numeric feature, e.g. 'GRAVY'
+            low: Lower bound (inclusive). If None, there is no lower bound.
+            high: Upper bound (inclusive). If None, there is no upper bound.
+        """
+        start, end = self._bounds(feature, low, high)
+        return np.sort(self.sorted[feature][0][start:end])
+
+    def _build_sequences(self):
+        codes, uniques = pd.factorize(self.df["Sequence"])
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        self.sequences = {
+            seq: order[bounds[i] : bounds[i + 1]] for i, seq in enumerate(uniques)
+        }
+
+    def lookup(self, seq: str) -> np.ndarray:
+        """
+        Returns the positions (in ascending order) of all rows containing the given sequence.
+        """
+        if self.sequences is None:
+            self._build_sequences()
+        return self.sequences.get(seq, np.empty(0, dtype=np.intp))
+
+    def positions(self, ranges: dict[str, tuple] = None, seq: str = None) -> np.ndarray:
+        """
+        Returns the positions (in ascending order) of all rows matching every given range and the sequence.
+            ranges: Mapping of feature label to (low, high) bounds (inclusive), where None means unbounded
+            seq: If given, only rows containing this sequence match
+        """
+        ranges = dict(ranges or {})
+        bounds = {f: self._bounds(f, low, high) for f, (low, high) in ranges.items()}
+        if seq is not None:
+            positions = self.lookup(seq)
+        elif bounds:
+            # Start from the range with the fewest rows
+            feature = min(bounds, key=lambda f: bounds[f][1] - bounds[f][0])
+            positions = self.range(feature, *ranges.pop(feature))
+        else:
+            return np.arange(len(self.df))
+        for feature, (low, high) in ranges.items():
+            values = self.values[feature][positions]
+            keep = ~np.isnan(values)
+            if low is not None:
+                keep &= values >= low
+            if high is not None:
+                keep &= values <= high
+            positions = positions[keep]
+        return positions
+
+    def query(self, ranges: dict[str, tuple] = None, seq: str = None) -> pd.DataFrame:
+        """
+        Returns all rows matching every given range and the sequence, in dataset order.
+            ranges: Mapping of feature label to (low, high) bounds (inclusive), where None means unbounded
+            seq: If given, only rows containing this sequence are returned
+        """
+        return self.df.iloc[self.positions(ranges, seq)]
+
+    def get_neighbors(self, features: list[str] = None) -> NeighborIndex:
+        """
+        Returns the nearest-neighbour index over the given features, which is built once per combination of features.
+            features: Labels of numeric features. If None, all computed numeric features are used.
+        """
+        if features is None:
+            features = [
+                f.label
+                for f in FEATURES.values()
+                if f.numeric and f.label in self.df.columns
+            ]
+        key = tuple(features)
+        if key not in self.neighbors:
+            self.neighbors[key] = NeighborIndex(self.df, features)
+        return self.neighbors[key]
@@ -0,0 +1,338 @@
+import gzip
+from pathlib import Path
+from typing import Iterator, TextIO
+
+import numpy as np
+import pandas as pd
+
+from pepsipy.features import FEATURES
+
+# Columns of the peptidomic dataset and their dtypes
+DATASET_DTYPES = {
+    "Sample": "string",
+    "Protein ID": "string",
+    "Sequence": "string",
+    "Intensity": "float64",
+    "PEP": "float64",
+}
+# Mapping of MaxQuant peptides.txt columns to dataset columns
+PSM_COLUMNS = {
+    "Sequence": "Sequence",
+    "Proteins": "Protein ID",
+    "Intensity": "Intensity",
+    "PEP": "PEP",
+}
+# Mapping of mzTab PEP section columns to dataset columns
+MZTAB_COLUMNS = {
+    "sequence": "Sequence",
+    "accession": "Protein ID",
+    "best_search_engine_score[1]": "PEP",
+}
+
+
+def _open(path: str | Path) -> TextIO:
+    """
+    Opens a (gzip-compressed) text file for reading.
+    """
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt")
+    return open(path)
+
+
+def _to_dataset(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Orders the columns of a DataFrame like the peptidomic dataset and applies their dtypes.
+    """
+    columns = [col for col in DATASET_DTYPES if col in df.columns]
+    return df[columns].astype({col: DATASET_DTYPES[col] for col in columns})
+
+
+def _chunked(
+    frames: Iterator[pd.DataFrame], chunksize: int | None
+) -> pd.DataFrame | Iterator[pd.DataFrame]:
+    """
+    Returns an iterator over all chunks if a chunksize is given, otherwise one pandas DataFrame containing all chunks.
+    """
+    if chunksize is not None:
+        return frames
+    return pd.concat(frames, ignore_index=True)
+
+
+def _iter_fasta(path: str | Path) -> Iterator[tuple[str, str]]:
+    """
+    Streams the records of a FASTA file as tuples of header (without '>') and sequence.
+        path: Path to a (gzip-compressed) FASTA file
+    """
+    header = None
+    parts = []
+    with _open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(">"):
+                if header is not None:
+                    yield header, "".join(parts)
+                header = line[1:]
+                parts = []
+            else:
+                parts.append(line)
+    if header is not None:
+        yield header, "".join(parts)
+
+
+def _parse_fasta_id(header: str) -> str:
+    """
+    Extracts the identifier of a FASTA header, e.g. the accession 'P07911' of 'sp|P07911|UROM_HUMAN Uromodulin'.
+    """
+    identifier = header.split(maxsplit=1)[0] if header.strip() else ""
+    fields = identifier.split("|")
+    if len(fields) >= 3 and fields[0] in ("sp", "tr"):
+        return fields[1]
+    return identifier
+
+
+def read_fasta(
+    path: str | Path, chunksize: int = None
+) -> pd.DataFrame | Iterator[pd.DataFrame]:
+    """
+    Reads a FASTA file into a pandas DataFrame with the columns 'Protein ID' and 'Sequence'.
+        path: Path to a (gzip-compressed) FASTA file
+        chunksize: If given, an iterator over DataFrames with at most chunksize records is returned instead
+    """
+
+    def frames():
+        batch = []
+        for header, seq in _iter_fasta(path):
+            batch.append((_parse_fasta_id(header), seq.upper()))
+            if chunksize is not None and len(batch) >= chunksize:
+                yield _to_frame(batch)
+                batch = []
+        if batch or chunksize is None:
+            yield _to_frame(batch)
+
+    def _to_frame(batch: list) -> pd.DataFrame:
+        return _to_dataset(pd.DataFrame(batch, columns=["Protein ID", "Sequence"]))
+
+    return _chunked(frames(), chunksize)
+
+
+def read_psm(
+    path: str | Path, chunksize: int = None, melt_samples: bool = False
+) -> pd.DataFrame | Iterator[pd.DataFrame]:
+    """
+    Reads a tab-separated peptide table (MaxQuant peptides.txt-style) and keeps only the columns
+    'Sequence', 'Proteins', 'Intensity' and 'PEP', which are renamed to the dataset columns.
+        path: Path to the peptide table
+        chunksize: If given, an iterator over DataFrames with at most chunksize peptides is returned instead
+        melt_samples: If True, the per-sample columns 'Intensity <sample>' are converted into the long format with one row per peptide and sample (column 'Sample'). Missing intensities (0) are dropped.
+    """
+    header = pd.read_csv(path, sep="\t", nrows=0).columns
+    columns = [col for col in PSM_COLUMNS if col in header]
+    if "Sequence" not in columns:
+        raise ValueError(f"Column 'Sequence' could not be found in {path}.")
+    sample_columns = (
+        [col for col in header if col.startswith("Intensity ")] if melt_samples else []
+    )
+    dtypes = {col: DATASET_DTYPES[PSM_COLUMNS[col]] for col in columns}
+    dtypes.update({col: "float64" for col in sample_columns})
+
+    def convert(chunk: pd.DataFrame) -> pd.DataFrame:
+        chunk = chunk.rename(columns=PSM_COLUMNS)
+        if not sample_columns:
+            return _to_dataset(chunk)
+        chunk = chunk.drop(columns="Intensity", errors="ignore").melt(
+            id_vars=[PSM_COLUMNS[col] for col in columns if col != "Intensity"],
+            value_vars=sample_columns,
+            var_name="Sample",
+            value_name="Intensity",
+        )
+        chunk["Sample"] = chunk["Sample"].str.removeprefix("Intensity ")
+        return _to_dataset(chunk[chunk["Intensity"] > 0].reset_index(drop=True))
+
+    reader = pd.read_csv(
+        path,
+        sep="\t",
+        usecols=columns + sample_columns,
+        dtype=dtypes,
+        chunksize=chunksize or 100_000,
+    )
+    return _chunked((convert(chunk) for chunk in reader), chunksize)
+
+
+def read_mztab(
+    path: str | Path, chunksize: int = None
+) -> pd.DataFrame | Iterator[pd.DataFrame]:
+    """
+    Reads the peptide (PEP) section of an mzTab file in the long format with one row per peptide and study variable.
+    The columns 'sequence', 'accession' and 'best_search_engine_score[1]' are mapped to 'Sequence', 'Protein ID' and 'PEP',
+    the columns 'peptide_abundance_study_variable[n]' are mapped to 'Sample' and 'Intensity'. Peptides without abundance are dropped.
+        path: Path to a (gzip-compressed) mzTab file
+        chunksize: If given, an iterator over DataFrames built from at most chunksize peptides is returned instead
+    """
+
+    def frames():
+        header = None
+        rows = []
+        with _open(path) as f:
+            for line in f:
+                if line.startswith("PEH\t"):
+                    header = line.rstrip("\r\n").split("\t")
+                elif line.startswith("PEP\t"):
+                    if header is None:
+                        raise ValueError(f"PEP line found before PEH header in {path}.")
+                    rows.append(line.rstrip("\r\n").split("\t"))
+                    if chunksize is not None and len(rows) >= chunksize:
+                        yield _to_frame(rows, header)
+                        rows = []
+        if header is None:
+            raise ValueError(f"No peptide section (PEH) could be found in {path}.")
+        if rows or chunksize is None:
+            yield _to_frame(rows, header)
+
+    def _to_frame(rows: list, header: list) -> pd.DataFrame:
+        raw = pd.DataFrame(rows, columns=header).replace("null", np.nan)
+        abundances = [
+            col for col in header if col.startswith("peptide_abundance_study_variable[")
+        ]
+        ids = [col for col in MZTAB_COLUMNS if col in header]
+        if "sequence" not in ids:
+            raise ValueError(f"Column 'sequence' could not be found in {path}.")
+        if not abundances:
+            return _to_dataset(raw[ids].rename(columns=MZTAB_COLUMNS))
+        df = raw[ids + abundances].melt(
+            id_vars=ids,
+            value_vars=abundances,
+            var_name="Sample",
+            value_name="Intensity",
+        )
+        df = df.rename(columns=MZTAB_COLUMNS)
+        df["Sample"] = df["Sample"].str.removeprefix("peptide_abundance_")
+        return _to_dataset(df.dropna(subset=["Intensity"]).reset_index(drop=True))
+
+    return _chunked(frames(), chunksize)
+
+
+def get_feature_dtypes(columns: list[str]) -> dict[str, str]:
+    """
+    Returns the dtypes of all dataset columns and computed features (see Feature.dtype) among the given columns.
+    """
+    dtypes = {**DATASET_DTYPES, **{f.label: f.dtype for f in FEATURES.values()}}
+    return {col: dtypes[col] for col in columns if col in dtypes}
+
+
+def _is_compact(dtype, declared: str) -> bool:
+    """
+    Checks whether a column is stored with a memory-saving dtype (see Feature.compact_dtype) instead of its declared dtype.
+    """
+    if isinstance(dtype, pd.CategoricalDtype):
+        return True
+    if declared == "string" or not pd.api.types.is_numeric_dtype(dtype):
+        return False
+    return np.dtype(dtype).itemsize < np.dtype(declared).itemsize
+
+
+def _declared_dtypes(df: pd.DataFrame) -> dict[str, str]:
+    """
+    Returns the declared dtypes (see get_feature_dtypes()) of all columns of computed features that are not stored compactly.
+    """
+    return {
+        col: dtype
+        for col, dtype in get_feature_dtypes(list(df.columns)).items()
+        if not _is_compact(df[col].dtype, dtype)
+    }
+
+
+def _feature_schema(df: pd.DataFrame):
+    """
+    Builds an Arrow schema for a DataFrame of computed features. Dataset columns and features get their declared dtypes,
+    unless they use memory-saving dtypes (e.g. computed with compact=True), which are kept.
+    The column 'Sequence' is dictionary-encoded and all other columns (e.g., metadata) are inferred.
+    """
+    import pyarrow as pa
+
+    inferred = pa.Schema.from_pandas(df, preserve_index=False)
+    declared = _declared_dtypes(df)
+    fields = []
+    for field in inferred:
+        if field.name == "Sequence":
+            field = field.with_type(pa.dictionary(pa.int32(), pa.string()))
+        elif field.name in declared:
+            dtype = declared[field.name]
+            field = field.with_type(
+                pa.string()
+                if dtype == "string"
+                else pa.from_numpy_dtype(np.dtype(dtype))
+            )
+        fields.append(field)
+    return pa.schema(fields, metadata=inferred.metadata)
+
+
+def _infer_format(path: Path, format: str | None) -> str:
+    format = format or path.suffix.lstrip(".")
+    if format not in ("parquet", "feather", "csv"):
+        raise ValueError(f"Unknown format: {format}")
+    return format
+
+
+def save_features(
+    df: pd.DataFrame,
+    path: str | Path,
+    format: str = None,
+    row_group_size: int = 100_000,
+):
+    """
+    Saves computed features with an explicit schema derived from the available features, so dtypes survive a round trip.
+    Memory-saving dtypes of features computed with compact=True are kept in the file and by load_features().
+        df: pandas DataFrame containing computed features
+        path: Output file
+        format: Can be "parquet", "feather" or "csv". If None, the format is inferred from the file extension.
+        row_group_size: Number of rows per row group (Parquet) or record batch (Feather)
+    """
+    path = Path(path)
+    format = _infer_format(path, format)
+    if format == "csv":
+        df.astype(_declared_dtypes(df)).to_csv(path, index=False)
+        return
+
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, schema=_feature_schema(df), preserve_index=False)
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, path, row_group_size=row_group_size)
+    else:
+        import pyarrow.feather as feather
+
+        # Uncompressed files can be read memory-mapped
+        feather.write_feather(
+            table, path, compression="uncompressed", chunksize=row_group_size
+        )
+
+
+def load_features(path: str | Path, format: str = None) -> pd.DataFrame:
+    """
+    Loads computed features saved by save_features(). Parquet and Feather files are read memory-mapped, but copied into pandas.
+    Columns saved with memory-saving dtypes (see save_features()) keep them, all other columns get their declared dtypes.
+        path: File containing computed features
+        format: Can be "parquet", "feather" or "csv". If None, the format is inferred from the file extension.
+    """
+    path = Path(path)
+    format = _infer_format(path, format)
+    if format == "csv":
+        header = pd.read_csv(path, nrows=0).columns
+        return pd.read_csv(path, dtype=get_feature_dtypes(list(header)))
+
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, memory_map=True)
+    else:
+        import pyarrow.feather as feather
+
+        table = feather.read_table(path, memory_map=True)
+    df = table.to_pandas()
+    # Dictionary-encoded columns like 'Sequence' stay categorical
+    return df.astype(_declared_dtypes(df))
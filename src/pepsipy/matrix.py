@@ -0,0 +1,184 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+NORMALIZATIONS = ("median", "quantile", "tic")
+LOG_TRANSFORMS = {"log2": np.log2, "log10": np.log10, "ln": np.log}
+
+
+@dataclass
+class IntensityMatrix:
+    """
+    Intensities of a long-format dataset as sparse matrix with one row per sample and one column per distinct peptide.
+    Peptides that were not observed in a sample (missing or zero intensity) are not stored.
+        data: scipy.sparse CSR matrix of shape (samples, peptides)
+        samples: Identifiers of the rows, named like the metadata key (e.g. 'Sample')
+        peptides: Sequences of the columns in order of first appearance, like the distinct sequences of the computed features
+    """
+
+    data: "scipy.sparse.csr_matrix"
+    samples: pd.Index
+    peptides: pd.Index
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.data.shape
+
+    def totals(self) -> pd.Series:
+        """
+        Returns the total intensity of each sample.
+        """
+        return pd.Series(np.asarray(self.data.sum(axis=1)).ravel(), index=self.samples)
+
+    def observed(self) -> pd.Series:
+        """
+        Returns the number of observed peptides of each sample.
+        """
+        return pd.Series(np.diff(self.data.indptr), index=self.samples)
+
+    def group_codes(
+        self, metadata: pd.DataFrame, group_by: str
+    ) -> tuple[np.ndarray, pd.Index]:
+        """
+        Aligns a metadata aspect to the samples. Returns the group index of each sample (-1 if unknown) and the groups.
+            metadata: pandas DataFrame whose first column contains the sample identifiers
+            group_by: Metadata aspect (e.g. Group, Batch, ...) that samples get grouped by
+        """
+        if group_by not in metadata.columns:
+            raise ValueError(
+                f"Metadata aspect {group_by} could not be found in metadata."
+            )
+        groups = metadata.set_index(metadata.columns[0])[group_by]
+        groups = groups[~groups.index.duplicated()].reindex(self.samples)
+        codes, uniques = pd.factorize(groups, sort=True)
+        return codes, pd.Index(uniques, name=group_by)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns the matrix as dense pandas DataFrame, where unobserved intensities are missing values.
+        """
+        dense = np.full(self.shape, np.nan)
+        coo = self.data.tocoo()
+        dense[coo.row, coo.col] = coo.data
+        return pd.DataFrame(dense, index=self.samples, columns=self.peptides)
+
+
+def _intensity_matrix(df: pd.DataFrame, key: str = "Sample") -> IntensityMatrix:
+    """
+    Converts a long-format dataset into a sparse sample x peptide intensity matrix in one pass.
+    Intensities of the same peptide and sample in several rows (e.g. different proteins) are summed.
+        df: pandas DataFrame with the columns 'Sequence', 'Intensity' and the sample identifiers
+        key: Column containing the sample identifiers, usually the metadata key
+    """
+    from scipy.sparse import csr_matrix
+
+    missing = [col for col in (key, "Sequence", "Intensity") if col not in df.columns]
+    if missing:
+        raise ValueError(f"Columns {missing} could not be found in dataset.")
+    sample_codes, samples = pd.factorize(df[key], sort=True)
+    peptide_codes, peptides = pd.factorize(df["Sequence"])
+    intensities = df["Intensity"].to_numpy(dtype=np.float64, na_value=np.nan)
+    keep = (
+        (sample_codes >= 0) & (peptide_codes >= 0) & (np.nan_to_num(intensities) != 0)
+    )
+    data = csr_matrix(
+        (intensities[keep], (sample_codes[keep], peptide_codes[keep])),
+        shape=(len(samples), len(peptides)),
+    )
+    data.sum_duplicates()
+    return IntensityMatrix(
+        data=data,
+        samples=pd.Index(np.asarray(samples, dtype=object), name=key),
+        peptides=pd.Index(np.asarray(peptides, dtype=object), name="Sequence"),
+    )
+
+
+def _row_medians(data) -> np.ndarray:
+    """
+    Computes the median of the stored values of each row of a CSR matrix, NaN for empty rows.
+    """
+    rows = np.repeat(np.arange(data.shape[0]), np.diff(data.indptr))
+    order = np.lexsort((data.data, rows))
+    values = data.data[order]
+    counts = np.diff(data.indptr)
+    lower = data.indptr[:-1] + (counts - 1) // 2
+    upper = data.indptr[:-1] + counts // 2
+    medians = np.full(data.shape[0], np.nan)
+    filled = counts > 0
+    medians[filled] = (values[lower[filled]] + values[upper[filled]]) / 2
+    return medians
+
+
+def _quantile_normalize(data) -> np.ndarray:
+    """
+    Quantile-normalizes the stored values of each row of a CSR matrix. Rows may have different numbers of values,
+    so the reference distribution is the mean of all rows' quantile functions, evaluated at the relative rank of each value.
+    Returns the new values in the order of data.data.
+    """
+    counts = np.diff(data.indptr)
+    grid = np.linspace(0, 1, max(counts.max(initial=0), 2))
+    rows = [
+        np.sort(data.data[data.indptr[i] : data.indptr[i + 1]])
+        for i in range(data.shape[0])
+    ]
+    filled = [values for values in rows if len(values)]
+    if not filled:
+        return data.data.copy()
+    reference = np.mean(
+        [np.interp(grid, np.linspace(0, 1, len(values)), values) for values in filled],
+        axis=0,
+    )
+    normalized = np.empty_like(data.data)
+    for i in range(data.shape[0]):
+        start, end = data.indptr[i], data.indptr[i + 1]
+        if end == start:
+            continue
+        values = data.data[start:end]
+        sorted_values = np.sort(values)
+        # Ties get the same (average) rank
+        ranks = (
+            np.searchsorted(sorted_values, values, side="left")
+            + np.searchsorted(sorted_values, values, side="right")
+            - 1
+        ) / 2
+        fractions = ranks / max(end - start - 1, 1)
+        normalized[start:end] = np.interp(fractions, grid, reference)
+    return normalized
+
+
+def _normalize(
+    matrix: IntensityMatrix, method: str = "median", log: str = None
+) -> IntensityMatrix:
+    """
+    Normalizes the intensities of each sample (row) on the sparse matrix, only observed intensities are used and the
+    sparsity pattern is kept. Returns a new matrix.
+        matrix: Sample x peptide intensity matrix
+        method: Can be "median" (each sample is scaled to the same median), "quantile" (all samples get the same distribution),
+            "tic" (total ion current, each sample is scaled to the same total intensity) or None (no normalization)
+        log: Log transform applied after the normalization, can be "log2", "log10", "ln" or None
+    """
+    if method is not None and method not in NORMALIZATIONS:
+        raise ValueError(
+            f"Unknown normalization: {method}. Choose one of {NORMALIZATIONS}."
+        )
+    if log is not None and log not in LOG_TRANSFORMS:
+        raise ValueError(
+            f"Unknown log transform: {log}. Choose one of {list(LOG_TRANSFORMS)}."
+        )
+    data = matrix.data.copy()
+    rows = np.repeat(np.arange(data.shape[0]), np.diff(data.indptr))
+    if method == "quantile":
+        data.data = _quantile_normalize(data)
+    elif method is not None:
+        if method == "median":
+            levels = _row_medians(data)
+        else:
+            levels = np.asarray(data.sum(axis=1)).ravel()
+            levels[np.diff(data.indptr) == 0] = np.nan
+        # Scale to the median level of all samples, so intensities keep their magnitude
+        factors = np.nanmedian(levels) / levels if np.isfinite(levels).any() else levels
+        data.data = data.data * factors[rows]
+    if log is not None:
+        data.data = LOG_TRANSFORMS[log](data.data)
+    return IntensityMatrix(data=data, samples=matrix.samples, peptides=matrix.peptides)
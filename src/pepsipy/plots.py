@@ -1,11 +1,12 @@
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Callable
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from scipy.stats import mannwhitneyu
 import warnings
 
 from pepsipy.constants import (
@@ -17,16 +18,19 @@ from pepsipy.constants import (
     CHARGE_CLASS,
     CHEMICAL_CLASS_PER_AA,
     CHARGE_CLASS_PER_AA,
+    AA_LETTERS,
 )
 from pepsipy.features import (
+    _aa_counts,
+    _charge_from_counts,
     _aa_frequency,
     _aa_classification,
     _charge_at_ph,
     _seq_length,
 )
+from pepsipy.matrix import IntensityMatrix, _intensity_matrix
 from pepsipy.utils import (
     get_column_name,
-    normalize_color,
     extract_related_kwargs,
     convert_exponential_to_suffix,
 )
@@ -225,6 +229,151 @@ def _titration_curve(seq: str) -> go.Figure:
     return fig
 
 
+def _unique(columns: list) -> list:
+    """
+    Removes None and duplicates from a list of column names, keeping their order.
+    """
+    return list(dict.fromkeys(col for col in columns if col is not None))
+
+
+def _select_peptides(
+    df: pd.DataFrame, columns: list[str], intensity_threshold: float = None
+) -> pd.DataFrame:
+    """
+    Projects a DataFrame on the given columns and optionally keeps only peptides with intensities above a threshold.
+    Only the selected columns are copied, the input is never modified.
+        df: Dataframe that contains the features
+        columns: Columns needed for plotting
+        intensity_threshold: Peptides with intensities below this threshold are not included
+    """
+    if intensity_threshold is None:
+        return df[columns]
+    intensity_col = get_column_name(df, "intensity")
+    return df.loc[(df[intensity_col] > intensity_threshold).to_numpy(), columns]
+
+
+def _box_statistics(values: pd.Series, groups: pd.Series) -> pd.DataFrame:
+    """
+    Computes quartiles and whiskers of all groups at once, so box plots can be drawn from statistics instead of raw values.
+    Whiskers end at the most extreme values within 1.5 IQR of the box, as in plotly.
+    Returns a DataFrame indexed by group (in order of appearance) with the columns 'q1', 'median', 'q3', 'lowerfence' and 'upperfence'.
+        values: Numeric values without missing values
+        groups: Group of each value
+    """
+    grouped = values.groupby(groups, sort=False, observed=True)
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ["q1", "median", "q3"]
+    iqr = stats["q3"] - stats["q1"]
+    low = groups.map(stats["q1"] - 1.5 * iqr).to_numpy(dtype=float)
+    high = groups.map(stats["q3"] + 1.5 * iqr).to_numpy(dtype=float)
+    inside = (values.to_numpy() >= low) & (values.to_numpy() <= high)
+    fences = values[inside].groupby(groups[inside], sort=False, observed=True)
+    stats["lowerfence"] = fences.min()
+    stats["upperfence"] = fences.max()
+    return stats
+
+
+def _kde_curve(
+    values: np.ndarray, num_points: int = 200, num_bins: int = 1024
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Estimates the density of values with a Gaussian KDE (Scott's rule) for drawing precomputed violins.
+    The values are binned first, so the cost does not grow with the number of values.
+    Returns the evaluation grid and the density at each grid point.
+        values: Numeric values without missing values
+        num_points: Number of grid points between the minimum and maximum value
+        num_bins: Number of histogram bins the values are reduced to
+    """
+    from scipy.stats import gaussian_kde
+
+    grid = np.linspace(values.min(), values.max(), num_points)
+    counts, edges = np.histogram(values, bins=num_bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    occupied = counts > 0
+    if occupied.sum() < 2:
+        return grid, np.ones(num_points)
+    kde = gaussian_kde(
+        centers[occupied],
+        bw_method=len(values) ** (-1 / 5),
+        weights=counts[occupied],
+    )
+    return grid, kde(grid)
+
+
+def _subsample(
+    df: pd.DataFrame, max_points: int, rng: np.random.Generator
+) -> pd.DataFrame:
+    """
+    Returns at most max_points randomly chosen rows of a DataFrame, keeping their order.
+    """
+    if max_points is None or len(df) <= max_points:
+        return df
+    return df.iloc[np.sort(rng.choice(len(df), size=max_points, replace=False))]
+
+
+def _precomputed_box_plot(
+    df: pd.DataFrame,
+    feature: str,
+    group_by: str = None,
+    max_points: int = 1000,
+    seed: int = 0,
+    title: str = None,
+) -> go.Figure:
+    """
+    Creates box plots per group from precomputed statistics instead of handing every value to plotly.
+    Optionally, a random subsample of the raw values is shown next to each box.
+        df: Dataframe that contains the features
+        feature: Feature shown on the y-axis
+        group_by: Metadata aspect (e.g. Group, Batch, ...) that peptides get grouped by. If None, one box is shown.
+        max_points: Maximum number of raw values shown per group, 0 to hide them
+        seed: Seed for choosing the shown raw values
+        title: Title of the figure
+    """
+    df = df[df[feature].notna()]
+    groups = df[group_by] if group_by else pd.Series(feature, index=df.index)
+    stats = _box_statistics(df[feature], groups)
+    codes = pd.Series(pd.factorize(groups)[0], index=df.index)
+    rng = np.random.default_rng(seed)
+
+    fig = go.Figure()
+    for i, (group, row) in enumerate(stats.iterrows()):
+        color = COLORS[i % len(COLORS)]
+        fig.add_trace(
+            go.Box(
+                x=[group],
+                q1=[row["q1"]],
+                median=[row["median"]],
+                q3=[row["q3"]],
+                lowerfence=[row["lowerfence"]],
+                upperfence=[row["upperfence"]],
+                name=str(group),
+                legendgroup=str(group),
+                marker_color=color,
+            )
+        )
+        if max_points:
+            points = _subsample(df[(codes == i).to_numpy()], max_points, rng)
+            fig.add_trace(
+                go.Scatter(
+                    x=np.full(len(points), group),
+                    y=points[feature],
+                    mode="markers",
+                    marker=dict(size=4, color=color, opacity=0.4),
+                    text=points["Sequence"],
+                    hovertemplate=f"{feature}=%{{y}}<br>Sequence=%{{text}}<extra></extra>",
+                    legendgroup=str(group),
+                    showlegend=False,
+                )
+            )
+    fig.update_layout(
+        title=title,
+        xaxis_title=group_by,
+        yaxis_title=feature,
+        legend_title_text=group_by,
+    )
+    return fig
+
+
 def _compare_features(
     df: pd.DataFrame,
     feature_a: str = "Sequence length",
@@ -248,10 +397,8 @@ def _compare_features(
         raise ValueError(
             f"Feature {feature_b} could not be found in dataset. Please make sure to compute it first."
         )
-    peptides = df.copy()
-    intensity_col = get_column_name(peptides, "intensity")
-    if intensity_threshold is not None:
-        peptides = peptides[peptides[intensity_col] > intensity_threshold]
+    columns = _unique([feature_a, feature_b, group_by, "Sequence"])
+    peptides = _select_peptides(df, columns, intensity_threshold)
 
     fig = px.scatter(
         peptides,
@@ -275,6 +422,8 @@ def _compare_feature(
     feature: str = "Sequence length",
     group_by: str = None,
     intensity_threshold: float = None,
+    precomputed: bool = False,
+    max_points: int = 1000,
 ) -> go.Figure:
     """
     Creates box plots for each group to compare a feature between metadata aspect.
@@ -282,23 +431,28 @@ def _compare_feature(
         group_by: Metadata aspect (e.g. Group, Batch, ...) that peptides get grouped by
         feature: Feature to be compared
         intensity_threshold: Peptides with intensities below this threshold are not included
+        precomputed: If True, the boxes are drawn from quartiles and whiskers computed by pepsipy instead of all values, which is recommended for large datasets.
+        max_points: Maximum number of raw values shown per group if precomputed is True
     """
     if feature not in df.columns:
         raise ValueError(
             f"Feature {feature} could not be found in dataset. Please make sure to compute it first."
         )
-    peptides = df.copy()
-    intensity_col = get_column_name(peptides, "intensity")
-    if intensity_threshold is not None:
-        peptides = peptides[peptides[intensity_col] > intensity_threshold]
+    columns = _unique([feature, group_by, "Sequence"])
+    peptides = _select_peptides(df, columns, intensity_threshold)
 
+    title = f"Distribution of {feature} across each {group_by}"
+    if precomputed:
+        return _precomputed_box_plot(
+            peptides, feature, group_by, max_points=max_points, title=title
+        )
     fig = px.box(
         peptides,
         x=group_by,
         y=feature,
         color=group_by,
         color_discrete_sequence=COLORS,
-        title=f"Distribution of {feature} across each {group_by}",
+        title=title,
         hover_name="Sequence",
     )
     return fig
@@ -309,6 +463,9 @@ def _raincloud(
     group_by: str = "Group",
     feature: str = "Sequence length",
     log_scaled: bool = True,
+    seed: int = 0,
+    precomputed: bool = False,
+    max_points: int = 1000,
 ) -> go.Figure:
     """
     Creates a raincloud plot (containing half violin, box and scatter) for displaying
@@ -317,12 +474,18 @@ def _raincloud(
         group_by: Metadata aspect (e.g. Group, Batch, ...) that peptides get grouped by
         feature: Feature to be shown in scatter plot
         log_scaled: If True, the x-axis uses a logarithmic (log10) transformation of the intensity data.
+        seed: Seed for the vertical jitter of the scatter points, so that identical inputs result in identical figures
+        precomputed: If True, violins and boxes are drawn from density curves, quartiles and whiskers computed by pepsipy instead of all intensities, which is recommended for large datasets.
+            Intensities that are not finite (e.g. zero with log_scaled) are left out and groups without any intensities are not shown.
+        max_points: Maximum number of scatter points shown per group if precomputed is True
     """
     intensity_col = get_column_name(df, "intensity")
     if group_by == "Group" and group_by not in df.columns:
-        df["Group"] = "None"
-
-    groups = df[group_by].unique()
+        group_values = pd.Series("None", index=df.index)
+    else:
+        group_values = df[group_by]
+    valid = df[intensity_col].notna().to_numpy()
+    codes, groups = pd.factorize(group_values)
 
     # Sizes & spacings
     violin_width = 0.5
@@ -338,48 +501,113 @@ def _raincloud(
     max_feature_val = df[feature].max()
     colorscale = "Plasma"
 
+    rng = np.random.default_rng(seed)
+
+    shown = range(len(groups))
+    if precomputed:
+        all_intensities = df[intensity_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        if log_scaled:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                all_intensities = np.log10(all_intensities)
+        # Density and statistics can only be computed from finite values
+        valid &= np.isfinite(all_intensities)
+        shown = [i for i in shown if (valid & (codes == i)).any()]
+        stats = _box_statistics(
+            pd.Series(all_intensities[valid]),
+            pd.Series(group_values.to_numpy()[valid]),
+        )
+
+    num_rows = len(shown) or 1
     fig = make_subplots(
-        rows=len(groups),
+        rows=num_rows,
         cols=1,
         shared_xaxes=True,
         vertical_spacing=0.025,
     )
 
-    for i, group in enumerate(groups):
-        peptides = df[(df[group_by] == group) & (df[intensity_col].notna())].copy()
+    for row, i in enumerate(shown, start=1):
+        group = groups[i]
+        peptides = df.loc[(codes == i) & valid, [intensity_col, feature, "Sequence"]]
         if log_scaled:
             intensities = np.log10(peptides[intensity_col])
         else:
             intensities = peptides[intensity_col]
 
-        peptides["Color"] = peptides[feature].apply(
-            lambda x: normalize_color(x, min_feature_val, max_feature_val, colorscale)
-        )
+        if precomputed:
+            # Half violin as a filled density curve, box from quartiles and whiskers
+            grid, density = _kde_curve(intensities.to_numpy())
+            violin = go.Scatter(
+                x=np.concatenate([grid, grid[::-1]]),
+                y=np.concatenate(
+                    [density / density.max() * violin_width / 2, np.zeros(len(grid))]
+                ),
+                mode="lines",
+                fill="toself",
+                showlegend=False,
+                fillcolor=COLORS_BY_NAME["lightgray"],
+                line=dict(color=COLORS_BY_NAME["lightgray"]),
+                hoverinfo="skip",
+            )
+            box_stats = stats.loc[group]
+            box = go.Box(
+                y=[violin_box_spacing],
+                q1=[box_stats["q1"]],
+                median=[box_stats["median"]],
+                q3=[box_stats["q3"]],
+                lowerfence=[box_stats["lowerfence"]],
+                upperfence=[box_stats["upperfence"]],
+                orientation="h",
+                whiskerwidth=0.5,
+                width=box_width,
+                showlegend=False,
+                fillcolor=COLORS_BY_NAME["transparent"],
+                line=dict(color=COLORS_BY_NAME["darkgray"]),
+                hoverinfo="skip",
+            )
+            peptides = _subsample(peptides, max_points, rng)
+            intensities = intensities.loc[peptides.index]
+        else:
+            violin = go.Violin(
+                x=intensities,
+                y=np.zeros(len(intensities)),
+                orientation="h",
+                side="positive",
+                width=violin_width,
+                box_visible=False,
+                points=False,
+                showlegend=False,
+                fillcolor=COLORS_BY_NAME["lightgray"],
+                line=dict(color=COLORS_BY_NAME["lightgray"]),
+                hoverinfo="skip",
+            )
+            box = go.Box(
+                x=intensities,
+                y=np.full(len(intensities), violin_box_spacing),
+                orientation="h",
+                whiskerwidth=0.5,
+                width=box_width,
+                boxpoints=False,
+                showlegend=False,
+                fillcolor=COLORS_BY_NAME["transparent"],
+                line=dict(color=COLORS_BY_NAME["darkgray"]),
+                hoverinfo="skip",
+            )
 
-        violin_y = np.zeros(len(intensities))
-        box_y = np.full(len(intensities), violin_box_spacing)
-        scatter_y = np.random.uniform(
+        scatter_y = rng.uniform(
             low=scatter_min, high=scatter_max, size=len(intensities)
         )
-
-        violin = go.Violin(
-            x=intensities,
-            y=violin_y,
-            orientation="h",
-            side="positive",
-            width=violin_width,
-            box_visible=False,
-            points=False,
-            showlegend=False,
-            fillcolor=COLORS_BY_NAME["lightgray"],
-            line=dict(color=COLORS_BY_NAME["lightgray"]),
-            hoverinfo="skip",
-        )
         scatter = go.Scatter(
             x=intensities,
             y=scatter_y,
             mode="markers",
-            marker=dict(size=5, color=peptides["Color"]),
+            # Colors are mapped by plotly from the feature values on a shared scale
+            marker=dict(
+                size=5,
+                color=peptides[feature],
+                colorscale=colorscale,
+                cmin=min_feature_val,
+                cmax=max_feature_val,
+            ),
             showlegend=False,
             text=peptides[feature],
             customdata=np.stack(
@@ -392,25 +620,13 @@ def _raincloud(
                 f"{group_by}={group}<extra></extra>"
             ),
         )
-        box = go.Box(
-            x=intensities,
-            y=box_y,
-            orientation="h",
-            whiskerwidth=0.5,
-            width=box_width,
-            boxpoints=False,
-            showlegend=False,
-            fillcolor=COLORS_BY_NAME["transparent"],
-            line=dict(color=COLORS_BY_NAME["darkgray"]),
-            hoverinfo="skip",
-        )
-        fig.add_trace(violin, row=i + 1, col=1)
-        fig.add_trace(scatter, row=i + 1, col=1)
-        fig.add_trace(box, row=i + 1, col=1)
+        fig.add_trace(violin, row=row, col=1)
+        fig.add_trace(scatter, row=row, col=1)
+        fig.add_trace(box, row=row, col=1)
 
         # Add title & set margins by y-range
         fig.update_yaxes(
-            row=i + 1,
+            row=row,
             col=1,
             title_text=group,
             range=[
@@ -445,13 +661,15 @@ def _raincloud(
     )
     # Adjust x-axis ticks to log10
     if log_scaled:
-        valid_logscaled = np.log10(df[intensity_col].dropna())
+        with np.errstate(divide="ignore", invalid="ignore"):
+            valid_logscaled = np.log10(df[intensity_col].dropna())
+        valid_logscaled = valid_logscaled[np.isfinite(valid_logscaled)]
         min = int(np.floor(valid_logscaled.min()))
         max = int(np.ceil(valid_logscaled.max()))
         tickvals = list(range(min, max + 1))
         ticktext = [convert_exponential_to_suffix(t) for t in tickvals]
         fig.update_xaxes(
-            row=len(groups),
+            row=num_rows,
             col=1,
             tickvals=tickvals,
             ticktext=ticktext,
@@ -459,7 +677,7 @@ def _raincloud(
 
     # Show y-axis title only on last subplot
     fig.update_xaxes(
-        row=len(groups),
+        row=num_rows,
         col=1,
         title_text="Intensity (log10)" if log_scaled else "Intensity",
     )
@@ -474,6 +692,8 @@ def _mann_whitney_u_test(
     group_a: str = "",
     group_b: str = "",
     alternative: str = "two-sided",
+    precomputed: bool = False,
+    max_points: int = 1000,
 ) -> go.Figure:
     """
     Performs a Mann-Whitney U test on a feature between two groups and creates a box plot with a significance bracket and p-value.
@@ -483,6 +703,8 @@ def _mann_whitney_u_test(
         group_a: First comparison group
         group_b: Second comparison group
         alternative: Chosen test alternative (two-sided, greater, less)
+        precomputed: If True, the boxes are drawn from quartiles and whiskers computed by pepsipy instead of all values, which is recommended for large datasets.
+        max_points: Maximum number of raw values shown per group if precomputed is True
     """
     # Prepare data
     if not group_a or not group_b:
@@ -495,12 +717,10 @@ def _mann_whitney_u_test(
         warnings.warn(
             f"{group_a} and {group_b} were selected for performing Mann-Whitney U test because at least one input was empty."
         )
-        sub = df[[group_by, feature, "Sequence"]].copy()
+        mask = df[feature].notna()
     else:
-        sub = df.loc[
-            df[group_by].isin([group_a, group_b]), [group_by, feature, "Sequence"]
-        ].copy()
-    sub = sub.dropna(subset=[feature])
+        mask = df[feature].notna() & df[group_by].isin([group_a, group_b])
+    sub = df.loc[mask.to_numpy(), [group_by, feature, "Sequence"]]
     sub = sub.drop_duplicates([group_by, "Sequence"], keep="first")
     x = sub.loc[sub[group_by] == group_a, feature].to_numpy()
     y_pos = sub.loc[sub[group_by] == group_b, feature].to_numpy()
@@ -511,19 +731,27 @@ def _mann_whitney_u_test(
         )
 
     # Execute test
+    from scipy.stats import mannwhitneyu
+
     mw = mannwhitneyu(x, y_pos, alternative=alternative, method="auto")
     p = float(mw.pvalue)
 
     # Boxplot
-    fig = px.box(
-        sub,
-        x=group_by,
-        y=feature,
-        color=group_by,
-        color_discrete_sequence=COLORS,
-        title=f"Mann-Whitney U test of {feature}: {group_a} vs {group_b}",
-        hover_name="Sequence",
-    )
+    title = f"Mann-Whitney U test of {feature}: {group_a} vs {group_b}"
+    if precomputed:
+        fig = _precomputed_box_plot(
+            sub, feature, group_by, max_points=max_points, title=title
+        )
+    else:
+        fig = px.box(
+            sub,
+            x=group_by,
+            y=feature,
+            color=group_by,
+            color_discrete_sequence=COLORS,
+            title=title,
+            hover_name="Sequence",
+        )
 
     # Significance bracket
     BOX_BRACKET_GAP = 0.05
@@ -583,11 +811,130 @@ def _mann_whitney_u_test(
     return fig
 
 
+def _pairwise_tests_heatmap(
+    df: pd.DataFrame,
+    group_by: str = "Group",
+    features: list[str] = None,
+    alternative: str = "two-sided",
+    correction: str = "bh",
+) -> go.Figure:
+    """
+    Performs Mann-Whitney U tests on every numeric feature between every pair of groups and creates a heatmap of the adjusted p-values (-log10).
+        df: pandas DataFrame that contains the features
+        group_by: Metadata aspect (e.g. Group, Batch, ...) that peptides get grouped by
+        features: Features to be tested. If None, all computed numeric features are tested.
+        alternative: Chosen test alternative (two-sided, greater, less)
+        correction: Multiple testing correction, can be "bh" (Benjamini-Hochberg), "bonferroni" or "none"
+    """
+    from pepsipy.stats import _pairwise_tests
+
+    results = _pairwise_tests(
+        df,
+        group_by=group_by,
+        features=features,
+        alternative=alternative,
+        correction=correction,
+    )
+    results["Pair"] = (
+        results["Group A"].astype(str) + " vs " + results["Group B"].astype(str)
+    )
+    pvalues = results.pivot(index="Feature", columns="Pair", values="Adjusted p-value")
+    pvalues = pvalues.loc[results["Feature"].unique(), results["Pair"].unique()]
+    fig = go.Figure(
+        go.Heatmap(
+            z=-np.log10(pvalues.to_numpy()),
+            x=pvalues.columns,
+            y=pvalues.index,
+            customdata=pvalues.to_numpy(),
+            colorscale="Plasma",
+            colorbar=dict(title="-log10(p)", outlinewidth=0),
+            hovertemplate="%{y}<br>%{x}<br>Adjusted p-value=%{customdata:.3g}<extra></extra>",
+        )
+    )
+    fig.update_layout(
+        title=f"Mann-Whitney U tests across each pair of {group_by} ({correction} corrected)",
+        yaxis=dict(autorange="reversed"),
+    )
+    return fig
+
+
+def _volcano_plot(
+    df: pd.DataFrame,
+    group_by: str = "Group",
+    group_a: str = None,
+    group_b: str = None,
+    test: str = "welch",
+    correction: str = "bh",
+    alpha: float = 0.05,
+    sample_key: str = "Sample",
+    matrix: IntensityMatrix = None,
+) -> go.Figure:
+    """
+    Tests every peptide for a difference in intensity between two groups (see pepsipy.stats._differential_abundance) and
+    creates a volcano plot of the log2 fold changes and adjusted p-values (-log10). WebGL is used, so many peptides can be shown.
+        df: pandas DataFrame that contains the intensities and metadata in long format
+        group_by: Metadata aspect (e.g. Group, Batch, ...) that samples get grouped by
+        group_a: First group. If None, the first of exactly two groups is used.
+        group_b: Second group. If None, the second of exactly two groups is used.
+        test: Can be "welch" (Welch's t-test) or "mann-whitney" (Mann-Whitney U test)
+        correction: Multiple testing correction, can be "bh" (Benjamini-Hochberg), "bonferroni" or "none"
+        alpha: Significance level for the adjusted p-values
+        sample_key: Column containing the sample identifiers, usually the metadata key
+        matrix: Sample x peptide intensity matrix, e.g. normalized by Calculator.normalize(). If None, it is built from df.
+    """
+    from pepsipy.stats import _differential_abundance
+
+    if group_by not in df.columns:
+        raise ValueError(f"Metadata aspect {group_by} could not be found in dataset.")
+    metadata = df[[sample_key, group_by]].drop_duplicates(sample_key)
+    if matrix is None:
+        matrix = _intensity_matrix(df, key=sample_key)
+    results = _differential_abundance(
+        matrix,
+        metadata,
+        group_by=group_by,
+        group_a=group_a,
+        group_b=group_b,
+        test=test,
+        correction=correction,
+    )
+    results = results[results["Adjusted p-value"].notna()]
+    significant = (results["Adjusted p-value"] < alpha).to_numpy()
+    fig = go.Figure(
+        go.Scattergl(
+            x=results["Log2 fold change"].to_numpy(),
+            y=-np.log10(results["Adjusted p-value"].to_numpy()),
+            mode="markers",
+            text=results.index.to_numpy(),
+            customdata=results["Adjusted p-value"].to_numpy(),
+            marker=dict(
+                size=6,
+                color=np.where(
+                    significant, COLORS_BY_NAME["red"], COLORS_BY_NAME["lightgray"]
+                ),
+            ),
+            hovertemplate="%{text}<br>Log2 fold change=%{x:.3f}<br>Adjusted p-value=%{customdata:.3g}<extra></extra>",
+        )
+    )
+    fig.add_hline(
+        y=-np.log10(alpha), line_dash="dash", line_color=COLORS_BY_NAME["darkgray"]
+    )
+    groups = f"{group_a} vs {group_b}" if group_a is not None else group_by
+    fig.update_layout(
+        title=f"Differential abundance of peptides ({groups}, {test}, {correction} corrected)",
+        xaxis_title="Log2 fold change",
+        yaxis_title="-log10(adjusted p-value)",
+    )
+    return fig
+
+
 @dataclass
 class Plot:
     seq_based: bool
     method: Callable
     param_map: dict = None
+    # If False, the plot is only generated when explicitly selected, not by select_all
+    default: bool = True
 
 
 PLOTS = {
@@ -625,6 +972,7 @@ PLOTS = {
             "compare_feature_group_by": "group_by",
             "compare_feature_a": "feature",
             "compare_feature_intensity_threshold": "intensity_threshold",
+            "compare_feature_precomputed": "precomputed",
         },
     ),
     "raincloud": Plot(
@@ -633,6 +981,9 @@ PLOTS = {
         {
             "raincloud_feature": "feature",
             "raincloud_group_by": "group_by",
+            "raincloud_log_scaled": "log_scaled",
+            "raincloud_seed": "seed",
+            "raincloud_precomputed": "precomputed",
         },
     ),
     "mann_whitney": Plot(
@@ -644,8 +995,34 @@ PLOTS = {
             "mann_whitney_group_a": "group_a",
             "mann_whitney_group_b": "group_b",
             "mann_whitney_alternative": "alternative",
+            "mann_whitney_precomputed": "precomputed",
+        },
+    ),
+    "pairwise_tests": Plot(
+        False,
+        _pairwise_tests_heatmap,
+        {
+            "pairwise_tests_group_by": "group_by",
+            "pairwise_tests_alternative": "alternative",
+            "pairwise_tests_correction": "correction",
         },
     ),
+    "volcano": Plot(
+        False,
+        _volcano_plot,
+        {
+            "volcano_group_by": "group_by",
+            "volcano_group_a": "group_a",
+            "volcano_group_b": "group_b",
+            "volcano_test": "test",
+            "volcano_correction": "correction",
+            "volcano_alpha": "alpha",
+            "volcano_sample_key": "sample_key",
+            "volcano_matrix": "matrix",
+        },
+        # Requires exactly two groups (or group_a and group_b) and intensities
+        default=False,
+    ),
 }
 
 
@@ -657,7 +1034,7 @@ def _generate_plots(seq: str, df: pd.DataFrame, params: dict) -> list:
     data_plots = []
     select_all = params.get("select_all")
     for key, plot in PLOTS.items():
-        if params.get(key) or select_all:
+        if params.get(key) or (select_all and plot.default):
             kwargs = (
                 extract_related_kwargs(plot.param_map, params) if plot.param_map else {}
             )
@@ -668,3 +1045,200 @@ def _generate_plots(seq: str, df: pd.DataFrame, params: dict) -> list:
                 kwargs["df"] = df
                 data_plots.append(plot.method(**kwargs))
     return seq_plots, data_plots
+
+
+# Contains every amino acid, so templates built from it have all traces
+TEMPLATE_SEQ = "ACDEFGHIKLMNPQRSTVWY"
+
+
+def _titration_points(ph_vals: np.ndarray, charges: np.ndarray) -> tuple[list, list]:
+    """
+    Finds the median pH level of each integer charge of a titration curve, see _titration_curve().
+    """
+    points = []
+    for i in range(int(np.floor(charges.min())), int(np.ceil(charges.max())) + 1):
+        matched = np.isclose(charges, i, rtol=0.01)
+        if matched.any():
+            points.append((np.median(ph_vals[matched]), i))
+    return [p[0] for p in points], [p[1] for p in points]
+
+
+def _to_template(fig: go.Figure) -> dict:
+    """
+    Converts a figure into a dictionary of its traces and layout, keeping arrays as they are.
+    """
+    return {
+        "data": [trace.to_plotly_json() for trace in fig.data],
+        "layout": fig.layout.to_plotly_json(),
+    }
+
+
+def _batch_sequence_plots(seqs: list[str], params: dict) -> list[dict[str, dict]]:
+    """
+    Computes the selected sequence-based plots for many sequences. The underlying data (amino acid counts, classes,
+    hydropathy and titration curves) is computed for all sequences at once. Each figure is built only once as a template
+    from which a copy with replaced data is made per sequence.
+    Returns one dictionary per sequence, which maps the key of each plot to the figure (as dictionary if built from a template).
+        seqs: Given sequences, which must be pre-sanitized
+        params: Plot parameters, see Calculator.set_plot_params()
+    """
+    select_all = params.get("select_all")
+    selected = {
+        key: (extract_related_kwargs(plot.param_map, params) if plot.param_map else {})
+        for key, plot in PLOTS.items()
+        if plot.seq_based and (params.get(key) or select_all)
+    }
+    counts = _aa_counts(seqs)
+    lengths = counts.sum(axis=1)
+    letters = sorted(AA_LETTERS)
+    columns = {aa: i for i, aa in enumerate(letters)}
+    figures = [{} for _ in seqs]
+
+    def copy(template: dict, title: str) -> dict:
+        layout = dict(template["layout"])
+        layout["title"] = {**layout.get("title", {}), "text": title}
+        return {"data": [dict(trace) for trace in template["data"]], "layout": layout}
+
+    if "aa_distribution" in selected:
+        kwargs = selected["aa_distribution"]
+        order_by = kwargs.get("order_by", "frequency")
+        if order_by.startswith("classes"):
+            # The subplots depend on the occurring classes, so no template is used
+            for i, seq in enumerate(seqs):
+                figures[i]["aa_distribution"] = _aa_distribution(seq, **kwargs)
+        else:
+            template = _to_template(_aa_distribution(TEMPLATE_SEQ, **kwargs))
+            # Same order as the single plot
+            order = np.array([columns[aa] for aa in _aa_frequency("")])
+            for i, seq in enumerate(seqs):
+                freq = counts[i, order]
+                shown = order if kwargs.get("show_all") else order[freq > 0]
+                freq = counts[i, shown]
+                fig = copy(template, f"Amino acid frequency of sequence {seq}")
+                fig["data"][0].update(
+                    x=np.array(letters)[shown],
+                    y=freq,
+                    customdata=(freq / lengths[i] * 100).round(3)[:, None],
+                )
+                if order_by in ("hydropathy", "weight"):
+                    scale = (
+                        HYDROPATHY_INDICES if order_by == "hydropathy" else AA_WEIGHTS
+                    )
+                    xaxis = dict(fig["layout"]["xaxis"])
+                    xaxis["categoryarray"] = sorted(
+                        fig["data"][0]["x"], key=lambda aa: scale[aa]
+                    )
+                    fig["layout"]["xaxis"] = xaxis
+                figures[i]["aa_distribution"] = fig
+
+    if "classification" in selected:
+        kwargs = selected["classification"]
+        classify_by = kwargs.get("classify_by", "chemical")
+        classes = CHEMICAL_CLASS if classify_by == "chemical" else CHARGE_CLASS
+        template = _to_template(_classification(TEMPLATE_SEQ, **kwargs))
+        membership = np.zeros((len(letters), len(classes)), dtype=int)
+        for j, aminos in enumerate(classes.values()):
+            membership[[columns[aa] for aa in aminos], j] = 1
+        class_counts = counts @ membership
+        for i, seq in enumerate(seqs):
+            fig = copy(template, f"Classification ({classify_by}) of {seq}")
+            for j, trace in enumerate(fig["data"]):
+                freq = class_counts[i, j]
+                trace.update(y=[freq], customdata=[[round(freq / lengths[i] * 100, 3)]])
+            figures[i]["classification"] = fig
+
+    if "hydropathy_profile" in selected:
+        template = _to_template(_hydropathy_profile(TEMPLATE_SEQ))
+        lookup = np.zeros(256)
+        for aa, val in HYDROPATHY_INDICES.items():
+            lookup[ord(aa)] = val
+        residues = np.frombuffer("".join(seqs).encode("ascii"), np.uint8)
+        hydropathy = np.split(lookup[residues], np.cumsum(lengths)[:-1])
+        for i, seq in enumerate(seqs):
+            fig = copy(template, f"Hydropathy plot of sequence {seq}")
+            fig["data"][0].update(
+                x=np.arange(len(seq) + 1),
+                y=np.concatenate([[0.0], hydropathy[i]]),
+                customdata=np.array(["None", *seq], dtype=object)[:, None],
+            )
+            figures[i]["hydropathy_profile"] = fig
+
+    if "titration_curve" in selected:
+        template = _to_template(_titration_curve(TEMPLATE_SEQ))
+        ph_vals = np.arange(0.0, 14.0 + 0.1, 0.1)
+        ionizable = {aa: counts[:, [columns[aa]]] for aa in "KRHDECY"}
+        charges = np.round(_charge_from_counts(ionizable, ph_vals), 2)
+        for i, seq in enumerate(seqs):
+            fig = copy(template, template["layout"]["title"]["text"])
+            fig["data"][0].update(y=charges[i])
+            ph, charge = _titration_points(ph_vals, charges[i])
+            if ph:
+                fig["data"][1].update(x=ph, y=charge)
+            else:
+                fig["data"] = fig["data"][:1]
+            figures[i]["titration_curve"] = fig
+
+    # Keep the order of PLOTS
+    return [{key: fig[key] for key in selected} for fig in figures]
+
+
+def _generate_batch_plots(seqs: list[str], params: dict) -> dict[str, list]:
+    """
+    Computes all selected sequence-based plots for many sequences, see _batch_sequence_plots().
+    Returns a dictionary which maps each sequence to its list of plots.
+    """
+    figures = _batch_sequence_plots(seqs, params)
+    # The templates were validated once, so the copies are not validated again
+    return {
+        seq: [
+            fig if isinstance(fig, go.Figure) else go.Figure(fig, _validate=False)
+            for fig in figs.values()
+        ]
+        for seq, figs in zip(seqs, figures)
+    }
+
+
+def _write_figure(fig: dict | go.Figure, path: Path, format: str):
+    """
+    Writes a figure (or its dictionary) to a file.
+    """
+    import plotly.io as pio
+
+    if format == "html":
+        pio.write_html(fig, path, validate=False)
+    elif format == "json":
+        pio.write_json(fig, path, validate=False)
+    else:
+        pio.write_image(fig, path, format=format, scale=3, validate=False)
+
+
+def _export_batch_plots(
+    seqs: list[str],
+    params: dict,
+    out: str | Path,
+    format: str = "png",
+    jobs: int = 1,
+) -> list[Path]:
+    """
+    Computes all selected sequence-based plots for many sequences and writes them to files named <sequence>_<plot>.<format>.
+    Returns the paths of all written files.
+        seqs: Given sequences, which must be pre-sanitized
+        params: Plot parameters, see Calculator.set_plot_params()
+        out: Output directory
+        format: Can be "png", "svg", "pdf", "html" or "json"
+        jobs: Number of worker processes writing the files. If None, all available cores are used.
+    """
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    figs, paths = [], []
+    for seq, figures in zip(seqs, _batch_sequence_plots(seqs, params)):
+        for key, fig in figures.items():
+            figs.append(fig)
+            paths.append(out / f"{seq}_{key}.{format}")
+    formats = [format] * len(paths)
+    if jobs == 1:
+        list(map(_write_figure, figs, paths, formats))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(_write_figure, figs, paths, formats, chunksize=8))
+    return paths
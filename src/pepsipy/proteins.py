@@ -0,0 +1,303 @@
+from collections import deque
+import hashlib
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from pepsipy.io import _iter_fasta, _parse_fasta_id
+
+# Columns of the peptide-to-protein mapping and their dtypes
+MAPPING_DTYPES = {
+    "Sequence": "string",
+    "Protein ID": "string",
+    "Start": "int64",
+    "End": "int64",
+    "Protein length": "int64",
+}
+
+
+class ProteinMapper:
+    """
+    Aho-Corasick automaton over distinct peptide sequences. Every protein is scanned once, independent of the number of
+    peptides, and all occurrences of all peptides are reported.
+        peptides: Peptide sequences, duplicates are ignored
+    """
+
+    def __init__(self, peptides: Iterable[str]):
+        self.peptides = list(dict.fromkeys(peptides))
+        # Trie: transitions, failure link, peptide ending in the state and link to the next state where a peptide ends
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [-1]
+        self.output_link = [0]
+        for i, peptide in enumerate(self.peptides):
+            state = 0
+            for aa in peptide:
+                next_state = self.goto[state].get(aa)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][aa] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(-1)
+                    self.output_link.append(0)
+                state = next_state
+            self.output[state] = i
+        self.lengths = np.array([len(p) for p in self.peptides], dtype=np.int64)
+
+        # Failure links in breadth-first order
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for aa, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and aa not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(aa, 0)
+                self.fail[next_state] = target
+                self.output_link[next_state] = (
+                    target if self.output[target] >= 0 else self.output_link[target]
+                )
+
+    def iter_matches(self, protein: str) -> Iterator[tuple[int, int]]:
+        """
+        Yields (peptide index, 0-based start position) for every occurrence of every peptide in a protein sequence.
+        """
+        goto, fail, output, output_link = (
+            self.goto,
+            self.fail,
+            self.output,
+            self.output_link,
+        )
+        state = 0
+        for end, aa in enumerate(protein, start=1):
+            while state and aa not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(aa, 0)
+            match = state if output[state] >= 0 else output_link[state]
+            while match:
+                peptide = output[match]
+                yield peptide, end - len(self.peptides[peptide])
+                match = output_link[match]
+
+    def map_fasta(self, path: str | Path) -> pd.DataFrame:
+        """
+        Streams a FASTA proteome once and maps all peptides to the proteins containing them.
+        Returns one row per occurrence with the columns 'Sequence', 'Protein ID', 'Start' and 'End' (1-based, inclusive) and 'Protein length'.
+            path: Path to a (gzip-compressed) FASTA file
+        """
+        peptide_ids, protein_ids, starts = [], [], []
+        proteins, lengths = [], []
+        for header, protein in _iter_fasta(path):
+            protein_id = len(proteins)
+            proteins.append(_parse_fasta_id(header))
+            lengths.append(len(protein))
+            for peptide, start in self.iter_matches(protein.upper()):
+                peptide_ids.append(peptide)
+                protein_ids.append(protein_id)
+                starts.append(start)
+        peptide_ids = np.array(peptide_ids, dtype=np.int64)
+        protein_ids = np.array(protein_ids, dtype=np.int64)
+        starts = np.array(starts, dtype=np.int64)
+        mapping = pd.DataFrame(
+            {
+                "Sequence": np.array(self.peptides, dtype=object)[peptide_ids],
+                "Protein ID": np.array(proteins, dtype=object)[protein_ids],
+                "Start": starts + 1,
+                "End": starts + self.lengths[peptide_ids],
+                "Protein length": np.array(lengths, dtype=np.int64)[protein_ids],
+            }
+        )
+        return mapping.astype(MAPPING_DTYPES)
+
+
+def _mapping_key(peptides: list[str], path: Path) -> str:
+    """
+    Hashes the distinct peptides and the content of a FASTA file, so that a cached mapping is only reused for the same inputs.
+    """
+    digest = hashlib.sha256()
+    for peptide in sorted(peptides):
+        digest.update(peptide.encode() + b"\n")
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _map_peptides(
+    peptides: Iterable[str], fasta: str | Path, cache_dir: str | Path = None
+) -> pd.DataFrame:
+    """
+    Maps peptides to the proteins of a FASTA proteome (see ProteinMapper.map_fasta()).
+        peptides: Peptide sequences, duplicates are ignored
+        fasta: Path to a (gzip-compressed) FASTA file
+        cache_dir: If given, the mapping is stored in this directory under a hash of the peptides and the FASTA content and reused by later calls
+    """
+    peptides = list(dict.fromkeys(peptides))
+    fasta = Path(fasta)
+    if cache_dir is not None:
+        cache_dir = Path(cache_dir)
+        path = cache_dir / f"{_mapping_key(peptides, fasta)}.csv.gz"
+        if path.exists():
+            return pd.read_csv(path, dtype=MAPPING_DTYPES)
+    mapping = ProteinMapper(peptides).map_fasta(fasta)
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        mapping.to_csv(tmp_path, index=False, compression="gzip")
+        tmp_path.replace(path)
+    return mapping
+
+
+def _incidence_matrix(sequences: pd.Index, peptides: pd.Series, proteins: pd.Series):
+    """
+    Builds a sparse peptide x protein incidence matrix (CSR) from pairs of peptide and protein.
+    Returns the matrix and the protein identifiers of its columns (sorted). Pairs with unknown peptides are ignored.
+        sequences: Distinct sequences, defining the rows of the matrix
+        peptides: Peptide of each pair
+        proteins: Protein of each pair
+    """
+    from scipy.sparse import csr_matrix
+
+    rows = pd.Categorical(peptides, categories=sequences).codes
+    cols, protein_ids = pd.factorize(proteins, sort=True)
+    keep = (rows >= 0) & (cols >= 0)
+    matrix = csr_matrix(
+        (np.ones(keep.sum()), (rows[keep], cols[keep])),
+        shape=(len(sequences), len(protein_ids)),
+    )
+    # A peptide occurring several times in a protein is counted once
+    matrix.data[:] = 1.0
+    return matrix, pd.Index(protein_ids, name="Protein ID")
+
+
+def _coverage(mapping: pd.DataFrame, protein_ids: pd.Index) -> np.ndarray:
+    """
+    Computes the fraction of residues of each protein covered by at least one mapped peptide, using the positions of a mapping.
+        mapping: Peptide-to-protein mapping with the columns 'Protein ID', 'Start', 'End' and 'Protein length'
+        protein_ids: Proteins the coverage is computed for
+    """
+    intervals = mapping[["Protein ID", "Start", "End", "Protein length"]]
+    intervals = intervals.drop_duplicates().sort_values(["Protein ID", "Start"])
+    grouped = intervals.groupby("Protein ID", sort=False, observed=True)
+    # Residues already covered by previous intervals of the same protein
+    covered_until = grouped["End"].cummax().groupby(intervals["Protein ID"]).shift()
+    covered_until = covered_until.fillna(0).to_numpy()
+    new = np.clip(
+        intervals["End"].to_numpy()
+        - np.maximum(intervals["Start"].to_numpy() - 1, covered_until),
+        0,
+        None,
+    )
+    per_protein = (
+        pd.DataFrame(
+            {
+                "Protein ID": intervals["Protein ID"].to_numpy(),
+                "Covered": new,
+                "Length": intervals["Protein length"].to_numpy(),
+            }
+        )
+        .groupby("Protein ID")
+        .agg({"Covered": "sum", "Length": "first"})
+    )
+    per_protein = per_protein.reindex(protein_ids)
+    return (per_protein["Covered"] / per_protein["Length"]).to_numpy(dtype=np.float64)
+
+
+def _protein_rollup(
+    df: pd.DataFrame, mapping: pd.DataFrame = None, features: list[str] = None
+) -> pd.DataFrame:
+    """
+    Aggregates computed peptide features and intensities per protein. Peptides are assigned to proteins by a mapping
+    (see ProteinMapper.map_fasta()) or, if no mapping is given, by the column 'Protein ID', where shared peptides list
+    several proteins separated by ';'. Shared peptides count for every protein they belong to.
+    Sums over proteins are computed by products with a sparse peptide x protein incidence matrix, the feature spreads by one
+    groupby over all peptide-protein pairs. Each distinct peptide is counted once per protein, with its intensity summed over all rows.
+    Returns a table indexed by 'Protein ID' with the columns 'Peptides', 'Unique peptides' (peptides of no other protein),
+    'Intensity' (if the dataset has intensities), 'Coverage' (if a mapping is given) and for each feature its 'Mean',
+    'Weighted mean' (by intensity), 'Std', 'Min' and 'Max', e.g. 'Mean GRAVY'.
+        df: pandas DataFrame that contains the computed features
+        mapping: Peptide-to-protein mapping with the columns 'Sequence', 'Protein ID', 'Start', 'End' and 'Protein length'. If None, the column 'Protein ID' of df is used.
+        features: Features to be aggregated. If None, all computed numeric features are aggregated.
+    """
+    from pepsipy.stats import _get_numeric_features
+
+    if features is None:
+        features = _get_numeric_features(df)
+    missing = [f for f in features if f not in df.columns]
+    if missing:
+        raise ValueError(
+            f"Features {missing} could not be found in dataset. Please make sure to compute them first."
+        )
+    codes, sequences = pd.factorize(df["Sequence"])
+    keep = codes >= 0
+    codes = codes[keep]
+    num_peptides = len(sequences)
+
+    if mapping is not None:
+        pairs = mapping[["Sequence", "Protein ID"]]
+    else:
+        if "Protein ID" not in df.columns:
+            raise ValueError(
+                "Column 'Protein ID' could not be found in dataset. Please provide a mapping (see map_proteins())."
+            )
+        pairs = df[["Sequence", "Protein ID"]].dropna().drop_duplicates()
+        pairs = pairs.assign(
+            **{"Protein ID": pairs["Protein ID"].astype(str).str.split(";")}
+        ).explode("Protein ID")
+        pairs["Protein ID"] = pairs["Protein ID"].str.strip()
+        pairs = pairs[pairs["Protein ID"] != ""]
+    incidence, protein_ids = _incidence_matrix(
+        pd.Index(sequences), pairs["Sequence"], pairs["Protein ID"]
+    )
+    by_protein = incidence.T.tocsr()
+
+    # Features of the first row of each distinct peptide
+    first = np.empty(num_peptides, dtype=np.int64)
+    first[codes[::-1]] = np.flatnonzero(keep)[::-1]
+    values = df[features].to_numpy(dtype=np.float64, na_value=np.nan)[first]
+
+    result = {}
+    result["Peptides"] = by_protein @ np.ones(num_peptides)
+    num_proteins = incidence @ np.ones(len(protein_ids))
+    result["Unique peptides"] = by_protein @ (num_proteins == 1).astype(np.float64)
+    has_intensity = "Intensity" in df.columns
+    if has_intensity:
+        intensities = np.nan_to_num(
+            df["Intensity"].to_numpy(dtype=np.float64, na_value=np.nan)[keep]
+        )
+        intensities = np.bincount(codes, weights=intensities, minlength=num_peptides)
+        result["Intensity"] = by_protein @ intensities
+    if mapping is not None:
+        result["Coverage"] = _coverage(mapping, protein_ids)
+
+    # Spreads over all peptide-protein pairs
+    pairs = incidence.tocoo()
+    grouped = pd.DataFrame(values[pairs.row], columns=features).groupby(pairs.col)
+    spreads = {
+        "Mean": grouped.mean(),
+        "Std": grouped.std(),
+        "Min": grouped.min(),
+        "Max": grouped.max(),
+    }
+    for i, feature in enumerate(features):
+        for stat in ("Mean", "Weighted mean", "Std", "Min", "Max"):
+            if stat == "Weighted mean":
+                if not has_intensity:
+                    continue
+                valid = ~np.isnan(values[:, i])
+                weights = np.where(valid, intensities, 0)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    column = (by_protein @ (weights * np.nan_to_num(values[:, i]))) / (
+                        by_protein @ weights
+                    )
+            else:
+                column = spreads[stat][feature].reindex(range(len(protein_ids)))
+            result[f"{stat} {feature}"] = np.asarray(column, dtype=np.float64)
+
+    rollup = pd.DataFrame(result, index=protein_ids)
+    counts = ["Peptides", "Unique peptides"]
+    return rollup.astype({col: "int64" for col in counts})
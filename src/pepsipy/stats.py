@@ -0,0 +1,418 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from pepsipy.features import FEATURES
+from pepsipy.matrix import IntensityMatrix
+from pepsipy.utils import get_column_name
+
+CORRECTIONS = ("bh", "bonferroni", "none")
+ALTERNATIVES = ("two-sided", "greater", "less")
+TESTS = ("welch", "mann-whitney")
+
+
+def _get_numeric_features(df: pd.DataFrame) -> list[str]:
+    """
+    Returns the labels of all numeric features found in a DataFrame, in the order of FEATURES.
+    """
+    return [f.label for f in FEATURES.values() if f.numeric and f.label in df.columns]
+
+
+def _tie_term(values: np.ndarray) -> np.ndarray:
+    """
+    Computes the tie term sum(t^3 - t) of the Mann-Whitney U variance for each column at once.
+        values: 2D array with one column per feature, missing values are ignored
+    """
+    num_rows, num_cols = values.shape
+    if num_rows == 0:
+        return np.zeros(num_cols)
+    sorted_values = np.sort(values, axis=0)
+    new_run = np.ones(sorted_values.shape, dtype=bool)
+    new_run[1:] = sorted_values[1:] != sorted_values[:-1]
+    # Number the runs of equal values, unique across all columns
+    run_ids = np.cumsum(new_run, axis=0) - 1 + np.arange(num_cols) * num_rows
+    valid = ~np.isnan(sorted_values)
+    counts = np.bincount(run_ids[valid], minlength=num_rows * num_cols).astype(float)
+    return (counts**3 - counts).reshape(num_cols, num_rows).sum(axis=1)
+
+
+def _mann_whitney_u(
+    x: np.ndarray, y: np.ndarray, alternative: str = "two-sided"
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Performs the asymptotic Mann-Whitney U test (with tie and continuity correction, as scipy.stats.mannwhitneyu)
+    on all columns of two samples at once. Both samples are ranked together once.
+    Returns the U statistic of x and the p-value per column.
+        x: 2D array with one column per feature for the first sample, missing values are ignored
+        y: 2D array with one column per feature for the second sample, missing values are ignored
+        alternative: Chosen test alternative (two-sided, greater, less)
+    """
+    from scipy.stats import norm, rankdata
+
+    if alternative not in ALTERNATIVES:
+        raise ValueError(
+            f"Unknown alternative: {alternative}. Choose one of {ALTERNATIVES}."
+        )
+    values = np.concatenate([x, y])
+    ranks = rankdata(values, axis=0, nan_policy="omit")
+    n_x = np.sum(~np.isnan(x), axis=0)
+    n_y = np.sum(~np.isnan(y), axis=0)
+    n = n_x + n_y
+
+    u_x = np.nansum(ranks[: len(x)], axis=0) - n_x * (n_x + 1) / 2
+    u_y = n_x * n_y - u_x
+    mu = n_x * n_y / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma = np.sqrt(n_x * n_y / 12 * ((n + 1) - _tie_term(values) / (n * (n - 1))))
+        if alternative == "two-sided":
+            z = (np.maximum(u_x, u_y) - mu - 0.5) / sigma
+            p = 2 * norm.sf(z)
+        elif alternative == "greater":
+            p = norm.sf((u_x - mu - 0.5) / sigma)
+        else:
+            p = norm.sf((u_y - mu - 0.5) / sigma)
+    p = np.clip(p, 0, 1)
+    p[(n_x == 0) | (n_y == 0) | (sigma == 0)] = np.nan
+    return u_x, p
+
+
+def _welch_t_test(
+    x: np.ndarray, y: np.ndarray, alternative: str = "two-sided"
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Performs Welch's t-test (as scipy.stats.ttest_ind with equal_var=False) on all columns of two samples at once.
+    Returns the t statistic and the p-value per column.
+        x: 2D array with one column per variable for the first sample, missing values are ignored
+        y: 2D array with one column per variable for the second sample, missing values are ignored
+        alternative: Chosen test alternative (two-sided, greater, less)
+    """
+    from scipy.stats import t as t_dist
+
+    if alternative not in ALTERNATIVES:
+        raise ValueError(
+            f"Unknown alternative: {alternative}. Choose one of {ALTERNATIVES}."
+        )
+    n_x = np.sum(~np.isnan(x), axis=0)
+    n_y = np.sum(~np.isnan(y), axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        se_x = _nanvar(x, n_x) / n_x
+        se_y = _nanvar(y, n_y) / n_y
+        stat = (_nanmean(x, n_x) - _nanmean(y, n_y)) / np.sqrt(se_x + se_y)
+        df = (se_x + se_y) ** 2 / (se_x**2 / (n_x - 1) + se_y**2 / (n_y - 1))
+        if alternative == "two-sided":
+            p = 2 * t_dist.sf(np.abs(stat), df)
+        elif alternative == "greater":
+            p = t_dist.sf(stat, df)
+        else:
+            p = t_dist.cdf(stat, df)
+    p[(n_x < 2) | (n_y < 2)] = np.nan
+    return stat, p
+
+
+def _nanmean(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Computes the mean of each column ignoring missing values, given the number of non-missing values per column.
+    """
+    return np.nansum(values, axis=0) / np.where(counts > 0, counts, np.nan)
+
+
+def _nanvar(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Computes the sample variance of each column ignoring missing values, given the number of non-missing values per column.
+    """
+    deviations = values - _nanmean(values, counts)
+    return np.nansum(deviations**2, axis=0) / np.where(counts > 1, counts - 1, np.nan)
+
+
+def _adjust_pvalues(pvalues: np.ndarray, correction: str = "bh") -> np.ndarray:
+    """
+    Adjusts p-values for multiple testing. Missing p-values are ignored.
+        pvalues: p-values of all tests
+        correction: Can be "bh" (Benjamini-Hochberg), "bonferroni" or "none"
+    """
+    if correction not in CORRECTIONS:
+        raise ValueError(
+            f"Unknown correction: {correction}. Choose one of {CORRECTIONS}."
+        )
+    pvalues = np.asarray(pvalues, dtype=float)
+    adjusted = np.full_like(pvalues, np.nan)
+    valid = ~np.isnan(pvalues)
+    p = pvalues[valid]
+    num_tests = len(p)
+    if correction == "bonferroni":
+        adjusted[valid] = np.minimum(p * num_tests, 1)
+    elif correction == "bh":
+        order = np.argsort(p)
+        scaled = p[order] * num_tests / np.arange(1, num_tests + 1)
+        # Enforce monotonicity from the largest p-value downwards
+        scaled = np.minimum.accumulate(scaled[::-1])[::-1]
+        bh = np.empty(num_tests)
+        bh[order] = np.minimum(scaled, 1)
+        adjusted[valid] = bh
+    else:
+        adjusted[valid] = p
+    return adjusted
+
+
+def _pairwise_tests(
+    df: pd.DataFrame,
+    group_by: str = "Group",
+    features: list[str] = None,
+    alternative: str = "two-sided",
+    correction: str = "bh",
+) -> pd.DataFrame:
+    """
+    Performs Mann-Whitney U tests on every numeric feature between every pair of groups and corrects the p-values for multiple testing.
+    As in the single Mann-Whitney U test, each sequence is counted once per group. The features are extracted into one NumPy matrix,
+    which is ranked once per pair of groups for all features together.
+    Returns a table with one row per feature and pair of groups.
+        df: pandas DataFrame that contains the features and metadata
+        group_by: Metadata aspect (e.g. Group, Batch, ...) that peptides get grouped by
+        features: Features to be tested. If None, all computed numeric features are tested.
+        alternative: Chosen test alternative (two-sided, greater, less), referring to the first group of each pair
+        correction: Multiple testing correction over all tests, can be "bh" (Benjamini-Hochberg), "bonferroni" or "none"
+    """
+    if group_by not in df.columns:
+        raise ValueError(f"Metadata aspect {group_by} could not be found in dataset.")
+    if features is None:
+        features = _get_numeric_features(df)
+    missing = [f for f in features if f not in df.columns]
+    if missing:
+        raise ValueError(
+            f"Features {missing} could not be found in dataset. Please make sure to compute them first."
+        )
+    sub = df[[group_by, "Sequence", *features]].drop_duplicates([group_by, "Sequence"])
+    sub = sub[sub[group_by].notna()]
+    codes, groups = pd.factorize(sub[group_by])
+    if len(groups) < 2:
+        raise ValueError(
+            f"Not enough options for {group_by} in metadata, but 2 are required."
+        )
+    values = sub[features].to_numpy(dtype=float)
+    samples = [values[codes == i] for i in range(len(groups))]
+
+    results = []
+    for i, j in combinations(range(len(groups)), 2):
+        u, p = _mann_whitney_u(samples[i], samples[j], alternative=alternative)
+        results.append(
+            pd.DataFrame(
+                {
+                    "Feature": features,
+                    "Group A": groups[i],
+                    "Group B": groups[j],
+                    "Size A": np.sum(~np.isnan(samples[i]), axis=0),
+                    "Size B": np.sum(~np.isnan(samples[j]), axis=0),
+                    "U": u,
+                    "p-value": p,
+                }
+            )
+        )
+    results = pd.concat(results, ignore_index=True)
+    results["Adjusted p-value"] = _adjust_pvalues(results["p-value"], correction)
+    return results
+
+
+def _weighted_median(
+    values: np.ndarray, weights: np.ndarray, codes: np.ndarray, num_groups: int
+) -> np.ndarray:
+    """
+    Computes the weighted (lower) median of values for all groups at once by sorting once and searching the cumulative weights.
+        values: Values without missing values
+        weights: Non-negative weight of each value
+        codes: Group index of each value
+        num_groups: Number of groups
+    """
+    order = np.lexsort((values, codes))
+    cum_weights = np.cumsum(weights[order])
+    totals = np.bincount(codes, weights=weights, minlength=num_groups)
+    # Cumulative weight before the first value of each group
+    offsets = np.concatenate([[0], np.cumsum(totals)[:-1]])
+    idx = np.searchsorted(cum_weights, offsets + totals / 2, side="left")
+    medians = values[order][np.minimum(idx, len(values) - 1)] if len(values) else idx
+    return np.where(totals > 0, medians, np.nan)
+
+
+def _summarize(
+    df: pd.DataFrame,
+    by: str = "Sample",
+    features: list[str] = None,
+    intensity_threshold: float = None,
+) -> pd.DataFrame:
+    """
+    Summarizes the distribution of features per sample or group in one groupby pass, unweighted and weighted by intensity.
+    Returns a table indexed by group and feature with the columns 'Count', 'Intensity', 'Mean', 'Weighted mean', 'Std',
+    'Min', 'Q1', 'Median', 'Q3', 'Max' and 'Weighted median'.
+        df: pandas DataFrame that contains the features and metadata
+        by: Column the peptides get grouped by, e.g. the metadata key 'Sample' or a metadata aspect like 'Group'
+        features: Features to be summarized. If None, all computed numeric features are summarized.
+        intensity_threshold: Peptides with intensities below this threshold are not included
+    """
+    if by not in df.columns:
+        raise ValueError(f"Column {by} could not be found in dataset.")
+    if features is None:
+        features = _get_numeric_features(df)
+    missing = [f for f in features if f not in df.columns]
+    if missing:
+        raise ValueError(
+            f"Features {missing} could not be found in dataset. Please make sure to compute them first."
+        )
+    intensity_col = get_column_name(df, "intensity")
+    sub = df[[by, intensity_col, *features]]
+    if intensity_threshold is not None:
+        sub = sub[(sub[intensity_col] > intensity_threshold).to_numpy()]
+
+    codes, groups = pd.factorize(sub[by], sort=True)
+    keep = codes >= 0
+    codes = codes[keep]
+    values = sub[features].to_numpy(dtype=float)[keep]
+    intensities = np.nan_to_num(sub[intensity_col].to_numpy(dtype=float)[keep])
+    num_groups = len(groups)
+
+    grouped = pd.DataFrame(values, columns=features).groupby(codes)
+    quantiles = grouped.quantile([0.25, 0.5, 0.75])
+    stats = {
+        "Count": grouped.count(),
+        "Mean": grouped.mean(),
+        "Std": grouped.std(),
+        "Min": grouped.min(),
+        "Q1": quantiles.xs(0.25, level=1),
+        "Median": quantiles.xs(0.5, level=1),
+        "Q3": quantiles.xs(0.75, level=1),
+        "Max": grouped.max(),
+    }
+
+    # Intensity-weighted statistics, missing feature values get no weight
+    valid = ~np.isnan(values)
+    weights = np.where(valid, intensities[:, None], 0)
+    weighted = pd.DataFrame(np.where(valid, values * weights, 0), columns=features)
+    total_weights = pd.DataFrame(weights, columns=features).groupby(codes).sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stats["Weighted mean"] = weighted.groupby(codes).sum() / total_weights
+    stats["Intensity"] = total_weights
+    stats["Weighted median"] = pd.DataFrame(
+        {
+            f: _weighted_median(
+                values[valid[:, i], i],
+                weights[valid[:, i], i],
+                codes[valid[:, i]],
+                num_groups,
+            )
+            for i, f in enumerate(features)
+        }
+    )
+
+    summary = pd.concat(stats, axis=1).stack(level=1, future_stack=True)
+    summary.index = pd.MultiIndex.from_arrays(
+        [
+            groups[summary.index.get_level_values(0)],
+            summary.index.get_level_values(1),
+        ],
+        names=[by, "Feature"],
+    )
+    columns = [
+        "Count",
+        "Intensity",
+        "Mean",
+        "Weighted mean",
+        "Std",
+        "Min",
+        "Q1",
+        "Median",
+        "Q3",
+        "Max",
+        "Weighted median",
+    ]
+    summary = summary[columns].astype({"Count": "int64"})
+    return summary
+
+
+def _differential_abundance(
+    matrix: IntensityMatrix,
+    metadata: pd.DataFrame,
+    group_by: str = "Group",
+    group_a: str = None,
+    group_b: str = None,
+    test: str = "welch",
+    alternative: str = "two-sided",
+    correction: str = "bh",
+    log: bool = True,
+    min_observations: int = 2,
+    block_size: int = 50_000,
+) -> pd.DataFrame:
+    """
+    Tests every peptide for a difference in intensity between two metadata groups. All peptides are tested at once on the
+    sample x peptide intensity matrix, which is densified block by block of peptides to bound memory.
+    Unobserved intensities are treated as missing values. Peptides observed in fewer than min_observations samples of
+    either group get no p-value and are not included in the multiple testing correction.
+    Returns a table indexed by 'Sequence' with the columns 'Size A', 'Size B', 'Mean A', 'Mean B', 'Log2 fold change',
+    'Statistic', 'p-value' and 'Adjusted p-value'.
+        matrix: Sample x peptide intensity matrix, see pepsipy.matrix
+        metadata: pandas DataFrame whose first column contains the sample identifiers
+        group_by: Metadata aspect (e.g. Group, Batch, ...) that samples get grouped by
+        group_a: First group. If None, the first of exactly two groups (in sorted order) is used.
+        group_b: Second group. If None, the second of exactly two groups (in sorted order) is used.
+        test: Can be "welch" (Welch's t-test) or "mann-whitney" (Mann-Whitney U test)
+        alternative: Chosen test alternative (two-sided, greater, less), referring to group_a
+        correction: Multiple testing correction, can be "bh" (Benjamini-Hochberg), "bonferroni" or "none"
+        log: If True, intensities are log2-transformed before testing
+        min_observations: Minimum number of observed intensities per group
+        block_size: Number of peptides that are densified at once
+    """
+    if test not in TESTS:
+        raise ValueError(f"Unknown test: {test}. Choose one of {TESTS}.")
+    codes, groups = matrix.group_codes(metadata, group_by)
+    if group_a is None and group_b is None:
+        if len(groups) != 2:
+            raise ValueError(
+                f"{group_by} has {len(groups)} options in metadata. Please choose group_a and group_b."
+            )
+        group_a, group_b = groups
+    for group in (group_a, group_b):
+        if group not in groups:
+            raise ValueError(f"Option {group} could not be found for {group_by}.")
+    # Samples of both groups are selected once, so each block only slices columns
+    by_peptide = [
+        matrix.data[np.flatnonzero(codes == groups.get_loc(group))].tocsc()
+        for group in (group_a, group_b)
+    ]
+
+    num_peptides = matrix.shape[1]
+    results = {
+        key: np.full(num_peptides, np.nan)
+        for key in ("Size A", "Size B", "Mean A", "Mean B", "Statistic", "p-value")
+    }
+    for start in range(0, num_peptides, block_size):
+        block = slice(start, start + block_size)
+        samples = []
+        for group_matrix in by_peptide:
+            sub = group_matrix[:, block].tocoo()
+            dense = np.full(sub.shape, np.nan)
+            dense[sub.row, sub.col] = np.log2(sub.data) if log else sub.data
+            samples.append(dense)
+        x, y = samples
+        n_x = np.sum(~np.isnan(x), axis=0)
+        n_y = np.sum(~np.isnan(y), axis=0)
+        if test == "welch":
+            stat, p = _welch_t_test(x, y, alternative=alternative)
+        else:
+            stat, p = _mann_whitney_u(x, y, alternative=alternative)
+        p[(n_x < min_observations) | (n_y < min_observations)] = np.nan
+        results["Size A"][block] = n_x
+        results["Size B"][block] = n_y
+        results["Mean A"][block] = _nanmean(x, n_x)
+        results["Mean B"][block] = _nanmean(y, n_y)
+        results["Statistic"][block] = stat
+        results["p-value"][block] = p
+
+    table = pd.DataFrame(results, index=matrix.peptides)
+    table = table.astype({"Size A": "int64", "Size B": "int64"})
+    difference = table["Mean A"] - table["Mean B"]
+    # On log2 intensities the difference of means is the log2 fold change
+    table.insert(
+        4,
+        "Log2 fold change",
+        difference if log else np.log2(table["Mean A"] / table["Mean B"]),
+    )
+    table["Adjusted p-value"] = _adjust_pvalues(table["p-value"], correction)
+    return table
@@ -1,5 +1,4 @@
 import pandas as pd
-from plotly.colors import sample_colorscale
 
 from pepsipy.constants import AA_LETTERS
 
@@ -13,6 +12,17 @@ def sanitize_seq(seq: str) -> str:
     return "".join(res for res in seq if res in AA_LETTERS)
 
 
+def get_invalid_seq(sequences: pd.Series) -> pd.Series:
+    """
+    Returns all entries of a pandas Series that are not valid amino acid sequences according to IUPAC-IUB standard.
+    All sequences are checked at once, which makes this suitable for validating large batches.
+        sequences: pandas Series containing amino acid sequences
+    """
+    pattern = f"[{''.join(sorted(AA_LETTERS))}]+"
+    valid = sequences.astype("string").str.fullmatch(pattern).fillna(False)
+    return sequences[~valid.astype(bool)]
+
+
 def get_column_name(df: pd.DataFrame, keyword: str) -> str:
     """
     Finds the first column of a DataFrame that contains a given keyword.
@@ -42,7 +52,9 @@ def normalize_color(
         max: Maximum feature value
         colorscale: Name of a Plotly colorscale (see https://plotly.com/python/builtin-colorscales/ for more information)
     """
-    norm = (val - min) / (max - min)
+    from plotly.colors import sample_colorscale
+
+    norm = float((val - min) / (max - min))
     return sample_colorscale(colorscale, norm)[0]
 
 
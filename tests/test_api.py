@@ -1,3 +1,10 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
 import pytest
 import plotly.graph_objects as go
 
@@ -7,6 +14,36 @@ from pepsipy.plots import PLOTS
 from tests.constants import PEPTIDES, METADATA
 
 
+# Generous upper bound for importing pepsipy without plotting dependencies
+IMPORT_TIME_LIMIT = 3.0
+
+
+def test_import_time():
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "from pepsipy import Calculator\n"
+        "Calculator.gravy('PEPTIDE')\n"
+        "print(json.dumps({'time': time.perf_counter() - start, 'modules': list(sys.modules)}))"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    res = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    benchmark = json.loads(res.stdout)
+    heavy = {"plotly", "scipy", "modlamp", "sklearn"}
+    assert not heavy & {m.split(".")[0] for m in benchmark["modules"]}
+    assert benchmark["time"] < IMPORT_TIME_LIMIT
+
+
+def test_lazy_plots():
+    assert "Hydropathy" in Calculator.hydropathy_profile("PEPTIDE").layout.title.text
+
+
 def test_init():
     calc = Calculator(
         dataset=PEPTIDES,
@@ -104,7 +141,7 @@ def test_get_plots_without_params():
     calc = Calculator(dataset=PEPTIDES, metadata=METADATA, seq="SVIDQSRVLNLGPITR")
     calc.get_features()
     plots = calc.get_plots()
-    assert len(PLOTS) == len(plots)
+    assert sum(p.default for p in PLOTS.values()) == len(plots)
 
 
 def test_get_plots_as_tuple():
@@ -112,4 +149,161 @@ def test_get_plots_as_tuple():
     calc.get_features()
     plots = calc.get_plots(as_tuple=True)
     assert 2 == len(plots)
-    assert len(PLOTS) == len(plots[0] + plots[1])
+    assert sum(p.default for p in PLOTS.values()) == len(plots[0] + plots[1])
+
+
+def test_get_plots_without_params_for_other_metadata():
+    # Three groups and a metadata key other than 'Sample'
+    dataset = PEPTIDES.rename(columns={"Sample": "Run"})
+    metadata = METADATA.rename(columns={"Sample": "Run"})
+    metadata["Group"] = ["A", "B", "C", "A", "B", "C"]
+    calc = Calculator(dataset=dataset, metadata=metadata, seq="SVIDQSRVLNLGPITR")
+    calc.get_features()
+    plots = calc.get_plots()
+    assert sum(p.default for p in PLOTS.values()) == len(plots)
+
+
+def test_stream_features():
+    calc = Calculator(feature_params={"gravy": True})
+    chunks = [PEPTIDES.iloc[:4], PEPTIDES.iloc[4:]]
+    res = pd.concat(calc.stream_features(chunks, jobs=2), ignore_index=True)
+    assert PEPTIDES["Sequence"].tolist() == res["Sequence"].tolist()
+    assert -0.3 == res["GRAVY"][0]
+    assert calc.computed_features is None
+
+
+def test_get_feature_matrix(tmp_path):
+    calc = Calculator(dataset=PEPTIDES)
+    features = calc.get_features()
+    matrix, columns = calc.get_feature_matrix()
+    assert np.float32 == matrix.dtype
+    assert (
+        len(PEPTIDES),
+        len([f for f in FEATURES.values() if f.numeric]),
+    ) == matrix.shape
+    assert "Three letter code" not in columns
+    np.testing.assert_allclose(features[columns].to_numpy(), matrix, rtol=1e-6)
+
+    calc.set_feature_params(gravy=True, seq_length=True)
+    matrix, columns = calc.get_feature_matrix(dtype=np.float64, out=tmp_path / "x.npy")
+    assert ["Sequence length", "GRAVY"] == columns
+    loaded = np.load(tmp_path / "x.npy", mmap_mode="r")
+    np.testing.assert_array_equal(features[columns].to_numpy(), loaded)
+
+
+def test_get_plots_compact():
+    calc = Calculator(dataset=PEPTIDES, metadata=METADATA, compact=True)
+    calc.get_features()
+    calc.set_plot_params(
+        compare_feature=True,
+        compare_feature_group_by="Group",
+        raincloud=True,
+        raincloud_group_by="Group",
+        mann_whitney=True,
+        mann_whitney_group_by="Group",
+    )
+    assert 3 == len(calc.get_plots())
+
+
+def test_raincloud_reproducible():
+    calc = Calculator(dataset=PEPTIDES, metadata=METADATA)
+    df = calc.get_features().merge(METADATA, on="Sample")
+    fig = Calculator.raincloud(df, group_by="Group", feature="GRAVY")
+    assert (
+        fig.to_json()
+        == Calculator.raincloud(df, group_by="Group", feature="GRAVY").to_json()
+    )
+    scatter = next(trace for trace in fig.data if trace.type == "scatter")
+    assert len(scatter.marker.color) == len(scatter.x)
+    assert scatter.marker.cmin == df["GRAVY"].min()
+    assert scatter.marker.cmax == df["GRAVY"].max()
+
+
+def test_query():
+    calc = Calculator(dataset=PEPTIDES)
+    calc.set_feature_params(gravy=True, molecular_weight=True)
+    df = calc.get_features()
+    res = calc.query({"GRAVY": (0, None), "Molecular weight": (1000, 1500)})
+    expected = df[(df["GRAVY"] >= 0) & df["Molecular weight"].between(1000, 1500)]
+    pd.testing.assert_frame_equal(res, expected)
+    seq = PEPTIDES["Sequence"].iloc[0]
+    pd.testing.assert_frame_equal(calc.query(seq=seq), df[df["Sequence"] == seq])
+
+    # The index is reused until the data changes
+    index = calc.get_feature_index()
+    assert calc.get_feature_index() is index
+    calc.setup(dataset=PEPTIDES.head(3))
+    assert calc.feature_index is None
+    assert len(calc.get_features()) == len(calc.query()) == 3
+
+
+def test_similar_peptides():
+    calc = Calculator(dataset=PEPTIDES)
+    calc.set_feature_params(gravy=True, molecular_weight=True, seq_length=True)
+    df = calc.get_features()
+    features = ["GRAVY", "Molecular weight"]
+    seqs = list(df["Sequence"].unique())
+    res = calc.similar_peptides(seqs[0], k=2, features=features)
+    assert list(res.columns) == ["Query", "Sequence", "Distance", *features]
+    assert len(res) == 2 and seqs[0] not in set(res["Sequence"])
+    assert res["Distance"].is_monotonic_increasing
+
+    # Brute force over the standardized features of the distinct sequences
+    distinct = df.drop_duplicates("Sequence")
+    values = distinct[features].to_numpy()
+    scaled = (values - values.mean(axis=0)) / values.std(axis=0)
+    dist = np.linalg.norm(scaled - scaled[0], axis=1)
+    order = np.argsort(dist)[1:3]
+    assert list(res["Sequence"]) == list(distinct["Sequence"].iloc[order])
+    assert np.allclose(res["Distance"], dist[order])
+
+    # Batch queries with a sequence that is not part of the dataset
+    res = calc.similar_peptides([seqs[1], "PEPTIDE"], k=3)
+    assert list(res["Query"]) == [seqs[1]] * 3 + ["PEPTIDE"] * 3
+    assert (
+        calc.get_feature_index().get_neighbors()
+        is calc.get_feature_index().get_neighbors()
+    )
+
+
+def test_protein_rollup():
+    calc = Calculator(dataset=PEPTIDES, compact=True)
+    calc.set_feature_params(gravy=True)
+    df = calc.get_features()
+    res = calc.protein_rollup()
+    assert res["Peptides"].sum() >= df["Sequence"].nunique()
+    assert {"Intensity", "Mean GRAVY", "Weighted mean GRAVY"} <= set(res.columns)
+
+
+def test_differential_abundance():
+    calc = Calculator(dataset=PEPTIDES, metadata=METADATA)
+    res = calc.differential_abundance(group_by="Group", min_observations=1)
+    assert len(res) == PEPTIDES["Sequence"].nunique()
+    assert {"Log2 fold change", "p-value", "Adjusted p-value"} <= set(res.columns)
+
+
+def test_volcano_plot_matches_differential_abundance():
+    rng = np.random.default_rng(0)
+    runs = [f"R{i}" for i in range(6)]
+    dataset = pd.DataFrame(
+        [(run, f"PEPTIDE{'K' * i}") for run in runs for i in range(20)],
+        columns=["Run", "Sequence"],
+    )
+    dataset["Intensity"] = rng.lognormal(10, 1, len(dataset))
+    metadata = pd.DataFrame({"Run": runs, "Group": ["A", "B", "C"] * 2})
+    calc = Calculator(dataset=dataset, metadata=metadata)
+    calc.set_feature_params(gravy=True)
+    calc.set_plot_params(
+        volcano=True,
+        volcano_group_by="Group",
+        volcano_group_a="A",
+        volcano_group_b="C",
+        volcano_correction="none",
+        volcano_normalization="quantile",
+    )
+    calc.get_features()
+    (fig,) = calc.get_plots()
+    res = calc.differential_abundance(
+        group_a="A", group_b="C", correction="none", normalization="quantile"
+    )
+    assert np.allclose(np.asarray(fig.data[0].x), res["Log2 fold change"])
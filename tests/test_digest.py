@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from pepsipy import Calculator
+from pepsipy.digest import _digest_protein, digest_fasta
+
+FASTA = """>sp|P1|A
+MKRPAAKGGRSSK
+>sp|P2|B
+AAKGGRXK
+"""
+
+
+@pytest.mark.parametrize(
+    "enzyme, missed_cleavages, expected",
+    [
+        ("trypsin", 0, ["MK", "RPAAK", "GGR", "SSK"]),
+        ("trypsin", 1, ["MK", "MKRPAAK", "RPAAK", "RPAAKGGR", "GGR", "GGRSSK", "SSK"]),
+        ("lys-c", 0, ["MK", "RPAAK", "GGRSSK"]),
+    ],
+)
+def test_digest_protein(enzyme, missed_cleavages, expected):
+    res = _digest_protein(
+        "MKRPAAKGGRSSK",
+        enzyme=enzyme,
+        missed_cleavages=missed_cleavages,
+        min_length=1,
+        max_length=30,
+    )
+    assert expected == list(res)
+
+
+def test_digest_protein_bounds():
+    res = _digest_protein(
+        "MKRPAAKGGRSSKX", missed_cleavages=1, min_length=5, max_length=6
+    )
+    assert ["RPAAK", "GGRSSK"] == list(res)
+    with pytest.raises(ValueError):
+        list(_digest_protein("MK", enzyme="pepsin"))
+
+
+def test_digest_fasta(tmp_path):
+    path = tmp_path / "proteome.fasta"
+    path.write_text(FASTA)
+    chunks = list(digest_fasta(path, missed_cleavages=0, min_length=2, chunksize=3))
+    assert [3, 2] == [len(chunk) for chunk in chunks]
+    res = pd.concat(chunks, ignore_index=True)
+    # Duplicates are dropped, peptides with invalid symbols are skipped
+    assert ["MK", "RPAAK", "GGR", "SSK", "AAK"] == list(res["Sequence"])
+    assert ["P1"] * 4 + ["P2"] == list(res["Protein ID"])
+    with pytest.raises(ValueError):
+        digest_fasta(path, enzyme="pepsin")
+    res = pd.concat(
+        digest_fasta(path, missed_cleavages=0, min_length=2, deduplicate=False)
+    )
+    assert ["MK", "RPAAK", "GGR", "SSK", "AAK", "GGR"] == list(res["Sequence"])
+
+
+def test_digest_features(tmp_path):
+    path = tmp_path / "proteome.fasta"
+    path.write_text(FASTA)
+    calc = Calculator()
+    calc.set_feature_params(seq_length=True)
+    res = pd.concat(calc.digest_features(path, missed_cleavages=1, min_length=2))
+    assert ["Protein ID", "Sequence", "Sequence length"] == list(res.columns)
+    assert list(res["Sequence"].str.len()) == list(res["Sequence length"])
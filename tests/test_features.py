@@ -1,3 +1,5 @@
+import numpy as np
+import pandas as pd
 import pytest
 
 from pepsipy.features import (
@@ -18,6 +20,11 @@ from pepsipy.features import (
     _aliphatic_index,
     _extinction_coefficient,
     _instability_index,
+    _aa_counts,
+    _charge_from_counts,
+    SignatureCache,
+    INTERMEDIATES,
+    FEATURES,
 )
 from tests.constants import PEPTIDES
 
@@ -217,3 +224,111 @@ def test_extinction_efficient():
 
 def test_instability_index():
     assert type(_instability_index("PEPTIDE")) is float
+
+
+def test_compute_features_compact():
+    df = pd.concat([PEPTIDES] * 50, ignore_index=True)
+    params = {"select_all": True}
+    res = _compute_features(df=df, params=params)
+    compact = _compute_features(df=df, params=params, compact=True)
+    assert list(res.columns) == list(compact.columns)
+    assert "category" == compact["Sequence"].dtype
+    assert "category" == compact["Molecular formula"].dtype
+    assert "float32" == compact["GRAVY"].dtype
+    assert "int32" == compact["Sequence length"].dtype
+    assert "int32" == compact["Extinction coefficient"].dtype
+    assert "float64" == compact["Intensity"].dtype
+    pd.testing.assert_frame_equal(
+        res, compact.astype(res.dtypes.to_dict()), check_exact=False, rtol=1e-6
+    )
+    assert compact.memory_usage(deep=True).sum() < res.memory_usage(deep=True).sum() / 2
+
+
+def test_compute_features_compact_long_sequence():
+    # Longer than the range of int16, e.g. titin
+    df = pd.DataFrame({"Sequence": ["A" * 34350, "PEPTIDE"]})
+    res = _compute_features(df=df, params={"seq_length": True}, compact=True)
+    assert [34350, 7] == res["Sequence length"].tolist()
+
+
+def test_aa_counts():
+    counts = _aa_counts(["PEPTIDE", "KK"])
+    assert counts.shape == (2, 20)
+    assert counts[0].sum() == 7
+    assert counts[1, sorted("ACDEFGHIKLMNPQRSTVWY").index("K")] == 2
+    with pytest.raises(ValueError):
+        _aa_counts(["PEPTIDE", "PEPTIDEX"])
+
+
+def test_charge_from_counts():
+    seqs = ["PEPTIDE", "KKRHDECY", "SVIDQSRVLNLGPITR"]
+    letters = sorted("ACDEFGHIKLMNPQRSTVWY")
+    counts = _aa_counts(seqs)
+    ionizable = {aa: counts[:, [letters.index(aa)]] for aa in "KRHDECY"}
+    ph = np.array([2.0, 7.0, 7.4, 12.0])
+    charges = np.round(_charge_from_counts(ionizable, ph), 2)
+    for i, seq in enumerate(seqs):
+        assert list(charges[i]) == [_charge_at_ph(seq, p) for p in ph]
+
+
+def test_signature_cache(tmp_path):
+    seqs = pd.Series(["PEPTIDE", "EPPTIDE", "KKRHDECY", "YCEDHRKK", "GGG"])
+    calls = []
+
+    def charge(seq):
+        calls.append(seq)
+        return _charge_at_ph(seq, 7.4)
+
+    cache = SignatureCache()
+    values = cache.compute("charge", charge, seqs)
+    # Permutations share their signature
+    assert len(calls) == 3
+    assert list(values) == [_charge_at_ph(seq, 7.4) for seq in seqs]
+    assert len(cache) == 3
+
+    cache.save(tmp_path / "cache.npz")
+    loaded = SignatureCache.load(tmp_path / "cache.npz")
+    calls.clear()
+    assert list(loaded.compute("charge", charge, seqs)) == list(values)
+    assert calls == []
+
+
+def test_compute_features_signature_cache():
+    cache = SignatureCache()
+    params = {"charge_at_ph": True, "isoelectric_point": True}
+    res = _compute_features(params, PEPTIDES, cache=cache)
+    assert set(cache.tables) == {"charge_at_ph,ph=7.0", "isoelectric_point"}
+    expected = PEPTIDES["Sequence"].apply(_isoelectric_point)
+    assert list(res["Isoelectric point"]) == list(expected)
+    assert list(res["Charge"]) == list(PEPTIDES["Sequence"].apply(_charge_at_ph))
+
+
+def test_compute_features_shared_intermediates(monkeypatch):
+    calls = {name: 0 for name in INTERMEDIATES}
+    for name, intermediate in INTERMEDIATES.items():
+
+        def counted(*args, _name=name, _method=intermediate.method, **kwargs):
+            calls[_name] += 1
+            return _method(*args, **kwargs)
+
+        monkeypatch.setattr(intermediate, "method", counted)
+    params = {
+        "select_all": True,
+        "charge_at_ph_level": 7.4,
+        "extinction_coefficient_oxidized": True,
+    }
+    res = _compute_features(params, PEPTIDES)
+    # Charge is computed at pH 7.4 (charge) and 7.0 (charge density)
+    assert calls == {"counts": 1, "length": 1, "weight": 1, "charge": 2}
+
+    seqs = PEPTIDES["Sequence"]
+    expected = {
+        "Charge": seqs.apply(_charge_at_ph, ph=7.4),
+        "Charge density": seqs.apply(_charge_density),
+        "Extinction coefficient": seqs.apply(_extinction_coefficient, oxidized=True),
+    }
+    for key, feature in FEATURES.items():
+        if feature.label not in expected and feature.depends:
+            expected[feature.label] = seqs.apply(feature.method)
+    for label, values in expected.items():
+        assert list(res[label]) == list(values), label
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pepsipy.index import FeatureIndex
+
+DATA = pd.DataFrame(
+    {
+        "Sequence": ["PEPTIDE", "KLR", "PEPTIDE", "AAA", "WYW"],
+        "GRAVY": [-1.5, 0.2, -1.5, np.nan, 0.8],
+        "Molecular weight": [799.8, 401.5, 799.8, 231.3, 630.7],
+    }
+)
+
+
+def _scan(df: pd.DataFrame, ranges: dict) -> pd.DataFrame:
+    mask = np.ones(len(df), dtype=bool)
+    for feature, (low, high) in ranges.items():
+        if low is not None:
+            mask &= df[feature] >= low
+        if high is not None:
+            mask &= df[feature] <= high
+    return df[mask & df[list(ranges)].notna().all(axis=1)]
+
+
+@pytest.mark.parametrize(
+    "ranges",
+    [
+        {"GRAVY": (0, None)},
+        {"GRAVY": (None, 0.2)},
+        {"GRAVY": (None, None)},
+        {"GRAVY": (-1.5, 0.8), "Molecular weight": (400, 700)},
+        {"Molecular weight": (1000, 1500)},
+    ],
+)
+def test_query_ranges(ranges):
+    index = FeatureIndex(DATA)
+    pd.testing.assert_frame_equal(index.query(ranges), _scan(DATA, ranges))
+
+
+def test_query_random():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "Sequence": rng.choice(["PEPTIDE", "KLR", "AAA"], 1000),
+            "A": rng.normal(size=1000).round(1),
+            "B": rng.integers(0, 20, 1000),
+        }
+    )
+    index = FeatureIndex(df)
+    for low, high in rng.normal(size=(20, 2)):
+        ranges = {"A": (min(low, high), max(low, high)), "B": (5, 12)}
+        pd.testing.assert_frame_equal(index.query(ranges), _scan(df, ranges))
+
+
+def test_lookup():
+    index = FeatureIndex(DATA)
+    assert list(index.lookup("PEPTIDE")) == [0, 2]
+    assert list(index.lookup("PEP")) == []
+    res = index.query({"Molecular weight": (500, None)}, seq="WYW")
+    assert list(res.index) == [4]
+
+
+def test_query_invalid_feature():
+    index = FeatureIndex(DATA)
+    with pytest.raises(ValueError):
+        index.query({"Charge": (0, 1)})
+    with pytest.raises(ValueError):
+        index.query({"Sequence": ("A", "B")})
+
+
+def test_neighbors():
+    df = pd.DataFrame(
+        {
+            "Sequence": ["A", "B", "C", "D", "A"],
+            "GRAVY": [0.0, 1.0, 10.0, np.nan, 0.0],
+            "Charge": [0.0, 0.0, 0.0, 1.0, 0.0],
+        }
+    )
+    index = FeatureIndex(df)
+    neighbors = index.get_neighbors(["GRAVY"])
+    assert index.get_neighbors(["GRAVY"]) is neighbors
+    # D is not indexed due to a missing value
+    assert list(neighbors.sequences) == ["A", "B", "C"]
+    positions, distances = neighbors.query(np.array([[0.9], [0.0]]), k=2)
+    assert positions.tolist() == [[1, 0], [0, 1]]
+    assert distances[0, 0] == pytest.approx(0.1 / neighbors.std[0])
+    positions, distances = neighbors.query(np.array([[0.0]]), k=3, exclude=["A"])
+    assert positions.tolist() == [[1, 2, -1]]
+    assert np.isnan(distances[0, 2])
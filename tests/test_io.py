@@ -0,0 +1,132 @@
+import gzip
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pepsipy import Calculator
+from pepsipy.io import read_fasta, read_psm, read_mztab, save_features, load_features
+from tests.constants import PEPTIDES
+
+FASTA = """>sp|P07911|UROM_HUMAN Uromodulin
+SRVLNLGPITRK
+PEPTIDE
+>custom_protein
+ppppplgapppppp
+"""
+PSM = (
+    "Sequence\tLength\tProteins\tPEP\tIntensity\tIntensity S1\tIntensity S2\n"
+    "PEPTIDE\t7\tP07911\t0.01\t30.0\t10.0\t20.0\n"
+    "FSGVPDR\t7\tA6NGB9;P07911\t0.02\t5.0\t0.0\t5.0\n"
+)
+MZTAB = (
+    "MTD\tmzTab-version\t1.0.0\n"
+    "\n"
+    "PEH\tsequence\taccession\tunique\tbest_search_engine_score[1]\tpeptide_abundance_study_variable[1]\tpeptide_abundance_study_variable[2]\n"
+    "PEP\tPEPTIDE\tP07911\t1\t0.01\t10.0\tnull\n"
+    "PEP\tFSGVPDR\tA6NGB9\t1\tnull\t3.0\t4.0\n"
+)
+
+
+def test_read_fasta(tmp_path):
+    path = tmp_path / "proteome.fasta.gz"
+    with gzip.open(path, "wt") as f:
+        f.write(FASTA)
+    res = read_fasta(path)
+    assert ["P07911", "custom_protein"] == res["Protein ID"].tolist()
+    assert ["SRVLNLGPITRKPEPTIDE", "PPPPPLGAPPPPPP"] == res["Sequence"].tolist()
+    assert "string" == res["Sequence"].dtype
+    chunks = list(read_fasta(path, chunksize=1))
+    assert [1, 1] == [len(chunk) for chunk in chunks]
+
+
+def test_read_psm(tmp_path):
+    path = tmp_path / "peptides.txt"
+    path.write_text(PSM)
+    res = read_psm(path)
+    assert ["Protein ID", "Sequence", "Intensity", "PEP"] == list(res.columns)
+    assert [30.0, 5.0] == res["Intensity"].tolist()
+
+    res = read_psm(path, melt_samples=True)
+    assert ["Sample", "Protein ID", "Sequence", "Intensity", "PEP"] == list(res.columns)
+    assert [("S1", "PEPTIDE"), ("S2", "PEPTIDE"), ("S2", "FSGVPDR")] == list(
+        zip(res["Sample"], res["Sequence"])
+    )
+    assert 2 == len(list(read_psm(path, chunksize=1)))
+
+
+def test_read_mztab(tmp_path):
+    path = tmp_path / "results.mztab"
+    path.write_text(MZTAB)
+    res = read_mztab(path)
+    assert ["Sample", "Protein ID", "Sequence", "Intensity", "PEP"] == list(res.columns)
+    assert ["PEPTIDE", "FSGVPDR", "FSGVPDR"] == res["Sequence"].tolist()
+    assert ["study_variable[1]", "study_variable[1]", "study_variable[2]"] == res[
+        "Sample"
+    ].tolist()
+    assert pd.isna(res["PEP"][1])
+
+    (tmp_path / "empty.mztab").write_text("MTD\tmzTab-version\t1.0.0\n")
+    with pytest.raises(ValueError) as e:
+        read_mztab(tmp_path / "empty.mztab")
+    assert "No peptide section" in str(e.value)
+
+
+def test_readers_feed_calculator(tmp_path):
+    path = tmp_path / "proteome.fasta"
+    path.write_text(FASTA)
+    calc = Calculator(feature_params={"seq_length": True})
+    res = pd.concat(calc.stream_features(read_fasta(path, chunksize=1)))
+    assert [19, 14] == res["Sequence length"].tolist()
+
+
+@pytest.mark.parametrize("format", ["parquet", "feather", "csv"])
+def test_save_and_load_features(tmp_path, format):
+    calc = Calculator(dataset=PEPTIDES)
+    features = calc.get_features()
+    path = tmp_path / f"features.{format}"
+    calc.save_features(path)
+    res = Calculator().load_features(path)
+    assert list(features.columns) == list(res.columns)
+    assert "int64" == res["Extinction coefficient"].dtype
+    assert "float64" == res["GRAVY"].dtype
+    assert "string" == res["Molecular formula"].dtype
+    assert features["Sequence"].tolist() == res["Sequence"].tolist()
+    pd.testing.assert_series_equal(features["GRAVY"], res["GRAVY"])
+
+
+@pytest.mark.parametrize("format", ["parquet", "feather"])
+def test_save_features_compact(tmp_path, format):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    calc = Calculator(dataset=PEPTIDES, compact=True)
+    features = calc.get_features()
+    path = tmp_path / f"features.{format}"
+    calc.save_features(path)
+    if format == "parquet":
+        schema = pq.read_schema(path)
+    else:
+        schema = feather.read_table(path).schema
+    assert pa.float32() == schema.field("GRAVY").type
+    assert pa.int32() == schema.field("Sequence length").type
+    assert pa.types.is_dictionary(schema.field("Molecular formula").type)
+    res = load_features(path)
+    pd.testing.assert_series_equal(features.dtypes, res.dtypes)
+    pd.testing.assert_frame_equal(features, res, check_categorical=False)
+
+
+def test_save_features_dictionary_encoded(tmp_path):
+    import pyarrow.parquet as pq
+
+    features = Calculator(
+        dataset=PEPTIDES, feature_params={"gravy": True}
+    ).get_features()
+    save_features(features, tmp_path / "features.parquet", row_group_size=4)
+    file = pq.ParquetFile(tmp_path / "features.parquet")
+    assert "dictionary" in str(file.schema_arrow.field("Sequence").type)
+    assert 2 == file.num_row_groups
+    with pytest.raises(ValueError) as e:
+        save_features(features, tmp_path / "features.xlsx")
+    assert "Unknown format" in str(e.value)
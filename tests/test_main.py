@@ -0,0 +1,165 @@
+import pandas as pd
+import pytest
+
+from pepsipy.__main__ import main, _parse_params
+from tests.constants import PEPTIDES
+
+
+def test_parse_params():
+    params = _parse_params(["a=7.4", "b=true", "c=GRAVY", "d=3"])
+    assert {"a": 7.4, "b": True, "c": "GRAVY", "d": 3} == params
+    assert isinstance(params["d"], int)
+
+
+@pytest.mark.parametrize("suffix, jobs", [(".csv", "1"), (".parquet", "2")])
+def test_features(tmp_path, suffix, jobs):
+    out = tmp_path / f"features{suffix}"
+    main(
+        [
+            "features",
+            "tests/data/peptides.csv",
+            "--out",
+            str(out),
+            "--features",
+            "gravy",
+            "charge_at_ph",
+            "--param",
+            "charge_at_ph_level=7.4",
+            "--jobs",
+            jobs,
+            "--chunksize",
+            "3",
+        ]
+    )
+    res = pd.read_csv(out) if suffix == ".csv" else pd.read_parquet(out)
+    assert len(PEPTIDES) == len(res)
+    assert list(PEPTIDES.columns) + ["Charge", "GRAVY"] == list(res.columns)
+    assert -0.3 == res["GRAVY"][0]
+
+
+def test_features_param_without_selection(tmp_path):
+    args = ["features", "tests/data/peptides.csv", "--chunksize", "3", "--out"]
+    main(args + [str(tmp_path / "a.csv")])
+    main(args + [str(tmp_path / "b.csv"), "--param", "charge_at_ph_level=3"])
+    a, b = pd.read_csv(tmp_path / "a.csv"), pd.read_csv(tmp_path / "b.csv")
+    # All features are computed, the charge at the given pH level
+    assert list(a.columns) == list(b.columns)
+    assert (b["Charge"] > a["Charge"]).all()
+
+
+@pytest.mark.parametrize("param", ["charge_at_ph_level", "unknown=1"])
+def test_features_invalid_param(tmp_path, capsys, param):
+    args = ["features", "tests/data/peptides.csv", "--out", str(tmp_path / "a.csv")]
+    with pytest.raises(SystemExit):
+        main(args + ["--param", param])
+    assert "usage:" in capsys.readouterr().err
+
+
+def test_features_signature_cache(tmp_path):
+    from pepsipy.features import SignatureCache
+
+    cache = tmp_path / "signatures.npz"
+    args = ["features", "tests/data/peptides.csv", "--features", "charge_at_ph"]
+    args += ["--jobs", "2", "--chunksize", "3"]
+    main(args + ["--out", str(tmp_path / "a.csv"), "--signature-cache", str(cache)])
+    assert cache.exists()
+    # Values computed by the worker processes are kept
+    assert len(SignatureCache.load(cache)) == len(PEPTIDES)
+    main(args + ["--out", str(tmp_path / "b.csv"), "--signature-cache", str(cache)])
+    pd.testing.assert_frame_equal(
+        pd.read_csv(tmp_path / "a.csv"), pd.read_csv(tmp_path / "b.csv")
+    )
+
+
+def test_plots(tmp_path):
+    main(
+        [
+            "plots",
+            "--seq",
+            "PEPTIDE",
+            "--plots",
+            "hydropathy_profile",
+            "classification",
+            "--out",
+            str(tmp_path),
+            "--format",
+            "html",
+        ]
+    )
+    assert 2 == len(list(tmp_path.glob("*.html")))
+
+
+def test_plots_with_feature_params(tmp_path):
+    main(
+        [
+            "plots",
+            "--dataset",
+            "tests/data/peptides.csv",
+            "--metadata",
+            "tests/data/metadata.csv",
+            "--plots",
+            "raincloud",
+            "--features",
+            "charge_at_ph",
+            "--param",
+            "raincloud_feature=Charge",
+            "raincloud_group_by=Group",
+            "raincloud_seed=3",
+            "charge_at_ph_level=3",
+            "--out",
+            str(tmp_path),
+            "--format",
+            "html",
+        ]
+    )
+    assert 1 == len(list(tmp_path.glob("*.html")))
+
+
+def test_plots_without_selection(tmp_path):
+    # The volcano plot is not selected, although the metadata has no two groups
+    metadata = pd.read_csv("tests/data/metadata.csv")
+    metadata["Group"] = ["A", "B", "C", "A", "B", "C"]
+    metadata.to_csv(tmp_path / "metadata.csv", index=False)
+    out = tmp_path / "plots"
+    main(
+        [
+            "plots",
+            "--dataset",
+            "tests/data/peptides.csv",
+            "--metadata",
+            str(tmp_path / "metadata.csv"),
+            "--features",
+            "gravy",
+            "seq_length",
+            "molecular_weight",
+            "--out",
+            str(out),
+            "--format",
+            "html",
+        ]
+    )
+    assert len(list(out.glob("*.html"))) > 0
+
+
+def test_features_digest(tmp_path):
+    fasta = tmp_path / "proteome.fasta"
+    fasta.write_text(">P1\nMKRPAAKGGRSSK\n")
+    out = tmp_path / "digest.csv"
+    main(
+        [
+            "features",
+            str(fasta),
+            "--out",
+            str(out),
+            "--features",
+            "seq_length",
+            "--digest",
+            "trypsin",
+            "--missed-cleavages",
+            "0",
+            "--min-length",
+            "3",
+        ]
+    )
+    res = pd.read_csv(out)
+    assert ["RPAAK", "GGR", "SSK"] == list(res["Sequence"])
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pepsipy import Calculator
+from pepsipy.matrix import _intensity_matrix, _normalize
+from tests.constants import PEPTIDES, METADATA
+
+DATA = pd.DataFrame(
+    {
+        "Sample": ["S2", "S1", "S1", "S2", "S1", "S3"],
+        "Sequence": ["AAA", "CCC", "AAA", "AAA", "DDD", "CCC"],
+        "Intensity": [1.0, 2.0, 3.0, 4.0, np.nan, 0.0],
+    }
+)
+
+
+def test_intensity_matrix():
+    res = _intensity_matrix(DATA)
+    assert list(res.samples) == ["S1", "S2", "S3"]
+    assert list(res.peptides) == ["AAA", "CCC", "DDD"]
+    # Duplicates are summed, missing and zero intensities are not stored
+    expected = pd.DataFrame(
+        [[3.0, 2.0, np.nan], [5.0, np.nan, np.nan], [np.nan] * 3],
+        index=pd.Index(["S1", "S2", "S3"], name="Sample"),
+        columns=pd.Index(["AAA", "CCC", "DDD"], name="Sequence"),
+    )
+    pd.testing.assert_frame_equal(res.to_frame(), expected)
+    assert res.data.nnz == 3
+    assert list(res.totals()) == [5.0, 5.0, 0.0]
+    assert list(res.observed()) == [2, 1, 0]
+
+
+def test_intensity_matrix_pivot():
+    res = _intensity_matrix(PEPTIDES)
+    pivot = PEPTIDES.pivot_table(
+        index="Sample", columns="Sequence", values="Intensity", aggfunc="sum"
+    ).replace(0, np.nan)
+    pd.testing.assert_frame_equal(
+        res.to_frame(), pivot.reindex(columns=res.peptides), check_names=False
+    )
+
+
+def test_group_codes():
+    res = _intensity_matrix(PEPTIDES)
+    codes, groups = res.group_codes(METADATA, "Group")
+    assert list(groups) == ["Affected", "Control"]
+    expected = METADATA.set_index("Sample")["Group"].reindex(res.samples)
+    assert list(groups[codes]) == list(expected)
+    with pytest.raises(ValueError):
+        res.group_codes(METADATA, "Unknown")
+
+
+def test_calculator_intensity_matrix():
+    calc = Calculator(dataset=PEPTIDES, metadata=METADATA)
+    res = calc.get_intensity_matrix()
+    assert calc.get_intensity_matrix() is res
+    assert res.samples.name == "Sample"
+    calc.setup(dataset=PEPTIDES.head(2))
+    assert calc.get_intensity_matrix().shape == (2, 2)
+
+
+def _matrix(dense: np.ndarray):
+    from pepsipy.matrix import IntensityMatrix
+    from scipy.sparse import csr_matrix
+
+    return IntensityMatrix(
+        data=csr_matrix(np.nan_to_num(dense)),
+        samples=pd.Index([f"S{i}" for i in range(len(dense))], name="Sample"),
+        peptides=pd.Index([f"P{i}" for i in range(dense.shape[1])], name="Sequence"),
+    )
+
+
+DENSE = np.array(
+    [
+        [1.0, 2.0, 4.0, np.nan],
+        [2.0, 4.0, 8.0, 16.0],
+        [np.nan, np.nan, np.nan, np.nan],
+    ]
+)
+
+
+def test_normalize_median():
+    res = _normalize(_matrix(DENSE), method="median").to_frame().to_numpy()
+    medians = np.nanmedian(DENSE[:2], axis=1)
+    expected = DENSE[:2] * (np.median(medians) / medians)[:, None]
+    assert np.allclose(res[:2], expected, equal_nan=True)
+    assert np.isnan(res[2]).all()
+    assert np.nanmedian(res[0]) == pytest.approx(np.nanmedian(res[1]))
+
+
+def test_normalize_tic():
+    res = _normalize(_matrix(DENSE), method="tic", log="log2")
+    totals = np.nansum(DENSE[:2], axis=1)
+    expected = DENSE[:2] * (np.median(totals) / totals)[:, None]
+    assert np.allclose(res.to_frame().to_numpy()[:2], np.log2(expected), equal_nan=True)
+    # The sparsity pattern is kept
+    assert res.data.nnz == 7
+
+
+def test_normalize_quantile():
+    rng = np.random.default_rng(0)
+    dense = rng.lognormal(10, 1, size=(4, 50))
+    dense[:, 20:] *= np.arange(1, 5)[:, None]
+    res = _normalize(_matrix(dense), method="quantile").to_frame().to_numpy()
+    # All samples share the same distribution and keep the order of their values
+    sorted_res = np.sort(res, axis=1)
+    assert np.allclose(sorted_res, sorted_res[0])
+    assert np.allclose(sorted_res[0], np.sort(dense, axis=1).mean(axis=0))
+    assert (np.argsort(res, axis=1) == np.argsort(dense, axis=1)).all()
+
+
+def test_normalize_invalid():
+    with pytest.raises(ValueError):
+        _normalize(_matrix(DENSE), method="mean")
+    with pytest.raises(ValueError):
+        _normalize(_matrix(DENSE), log="log3")
+
+
+def test_calculator_normalize():
+    calc = Calculator(dataset=PEPTIDES, metadata=METADATA)
+    res = calc.normalize("tic", log="log2")
+    assert calc.normalize("tic", log="log2") is res
+    assert calc.normalize(None) is not res
+    calc.setup(dataset=PEPTIDES.head(2))
+    assert calc.normalized_matrices == {}
+    assert calc.normalize("tic").shape == (2, 2)
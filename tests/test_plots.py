@@ -0,0 +1,201 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import pytest
+
+from pepsipy import Calculator
+from pepsipy.plots import (
+    _box_statistics,
+    _kde_curve,
+    _subsample,
+    _compare_feature,
+    _raincloud,
+    _mann_whitney_u_test,
+    _pairwise_tests_heatmap,
+    _volcano_plot,
+    _compare_features,
+    _generate_plots,
+    _generate_batch_plots,
+    _export_batch_plots,
+)
+from tests.constants import PEPTIDES, METADATA
+
+DF = Calculator(dataset=PEPTIDES, metadata=METADATA).get_features().merge(METADATA)
+
+
+def test_box_statistics():
+    values = pd.Series([1.0, 2.0, 3.0, 4.0, 100.0, 5.0, 6.0, 7.0])
+    groups = pd.Series(["a"] * 5 + ["b"] * 3)
+    stats = _box_statistics(values, groups)
+    assert list(stats.index) == ["a", "b"]
+    a = values[:5]
+    assert stats.loc["a", "q1"] == np.quantile(a, 0.25)
+    assert stats.loc["a", "median"] == np.median(a)
+    assert stats.loc["a", "q3"] == np.quantile(a, 0.75)
+    # 100 is an outlier, so the whisker ends at the largest value within 1.5 IQR
+    assert stats.loc["a", "upperfence"] == 4.0
+    assert stats.loc["a", "lowerfence"] == 1.0
+    assert stats.loc["b", "upperfence"] == 7.0
+
+
+def test_kde_curve():
+    values = np.random.default_rng(0).normal(size=10_000)
+    grid, density = _kde_curve(values)
+    assert len(grid) == len(density)
+    assert abs(grid[np.argmax(density)]) < 0.3
+    assert np.isclose(np.trapezoid(density, grid), 1, atol=0.02)
+
+
+def test_subsample():
+    df = pd.DataFrame({"a": range(100)})
+    rng = np.random.default_rng(0)
+    assert _subsample(df, 200, rng) is df
+    sample = _subsample(df, 10, rng)
+    assert len(sample) == 10
+    assert sample["a"].is_monotonic_increasing
+
+
+def test_precomputed_plots():
+    fig = _compare_feature(DF, feature="GRAVY", group_by="Group", precomputed=True)
+    boxes = [trace for trace in fig.data if isinstance(trace, go.Box)]
+    assert len(boxes) == DF["Group"].nunique()
+    assert all(box.y is None and box.q1 is not None for box in boxes)
+
+    fig = _raincloud(DF, feature="GRAVY", precomputed=True, max_points=5)
+    scatters = [
+        trace
+        for trace in fig.data
+        if isinstance(trace, go.Scatter) and trace.mode == "markers"
+    ]
+    assert all(len(scatter.x) <= 5 for scatter in scatters[:-1])
+    assert not any(isinstance(trace, go.Violin) for trace in fig.data)
+
+
+def test_raincloud_precomputed_group_without_intensities():
+    df = DF.copy()
+    df.loc[df["Group"] == "Control", "Intensity"] = np.nan
+    fig = _raincloud(df, feature="GRAVY", precomputed=True)
+    boxes = [trace for trace in fig.data if isinstance(trace, go.Box)]
+    assert 1 == len(boxes)
+    assert "Affected" == fig.layout.yaxis.title.text
+
+
+def test_raincloud_precomputed_zero_intensities():
+    df = DF.copy()
+    df.loc[0, "Intensity"] = 0.0
+    fig = _raincloud(df, feature="GRAVY", precomputed=True, log_scaled=True)
+    scatters = [
+        trace
+        for trace in fig.data
+        if isinstance(trace, go.Scatter) and trace.mode == "markers"
+    ]
+    assert all(np.isfinite(scatter.x).all() for scatter in scatters[:-1])
+
+    fig = _mann_whitney_u_test(
+        DF, feature="GRAVY", group_by="Group", precomputed=True, max_points=0
+    )
+    assert all(isinstance(trace, go.Box) for trace in fig.data)
+
+
+def test_pairwise_tests_heatmap():
+    fig = _pairwise_tests_heatmap(DF, group_by="Group", features=["GRAVY", "Charge"])
+    heatmap = fig.data[0]
+    assert list(heatmap.y) == ["GRAVY", "Charge"]
+    num_groups = DF["Group"].nunique()
+    assert len(heatmap.x) == num_groups * (num_groups - 1) // 2
+
+
+@pytest.mark.parametrize(
+    "plot, kwargs",
+    [
+        (_compare_features, {"feature_a": "GRAVY", "feature_b": "Charge"}),
+        (_compare_feature, {"feature": "GRAVY", "intensity_threshold": 10}),
+        (_raincloud, {"feature": "GRAVY"}),
+        (_mann_whitney_u_test, {"feature": "GRAVY", "group_a": "A", "group_b": "B"}),
+    ],
+)
+def test_dataset_plots_memory(plot, kwargs):
+    # Wide frame of which only a few columns are plotted
+    rng = np.random.default_rng(0)
+    num_rows = 20_000
+    df = pd.DataFrame(rng.random((num_rows, 120))).add_prefix("Column ")
+    df["Sequence"] = [f"PEPTIDE{i}" for i in range(num_rows)]
+    df["Intensity"] = rng.random(num_rows) * 1e6 + 1
+    df["GRAVY"] = rng.random(num_rows)
+    df["Charge"] = rng.random(num_rows)
+    if plot is not _raincloud:
+        df["Group"] = rng.choice(["A", "B"], num_rows)
+    before = df.copy()
+
+    plot(df, **kwargs)  # Warm up imports and caches
+    tracemalloc.start()
+    plot(df, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Peak usage stays well below a full copy of the frame
+    assert peak < df.memory_usage(deep=True).sum() / 2
+    pd.testing.assert_frame_equal(df, before)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"select_all": True},
+        {
+            "aa_distribution": True,
+            "aa_distribution_order_by": "hydropathy",
+            "aa_distribution_show_all": True,
+            "classification": True,
+            "classification_classify_by": "charge",
+        },
+        {"aa_distribution": True, "aa_distribution_order_by": "classes charge"},
+    ],
+)
+def test_generate_batch_plots(params):
+    seqs = ["SVIDQSRVLNLGPITR", "KKKK", "DEHCY", "PPPPPLGAPPPPPP"]
+    batch = _generate_batch_plots(seqs, params)
+    assert list(batch) == seqs
+    for seq in seqs:
+        expected = _generate_plots(seq, None, params)[0]
+        assert len(batch[seq]) == len(expected)
+        for fig, single in zip(batch[seq], expected):
+            assert fig.layout.title.text == single.layout.title.text
+            assert fig.layout.xaxis.categoryarray == single.layout.xaxis.categoryarray
+            assert len(fig.data) == len(single.data)
+            for trace, single_trace in zip(fig.data, single.data):
+                for attr in ("x", "y", "customdata"):
+                    assert np.array_equal(
+                        np.asarray(getattr(trace, attr)),
+                        np.asarray(getattr(single_trace, attr)),
+                    )
+
+
+def test_export_batch_plots(tmp_path):
+    seqs = ["SVIDQSRVLNLGPITR", "KKKK"]
+    paths = _export_batch_plots(
+        seqs, {"hydropathy_profile": True}, tmp_path, format="json", jobs=2
+    )
+    assert paths == [tmp_path / f"{seq}_hydropathy_profile.json" for seq in seqs]
+    fig = pio.read_json(paths[1])
+    assert list(fig.data[0].y) == [0.0] + [-3.9] * 4
+
+
+def test_volcano_plot():
+    rng = np.random.default_rng(0)
+    samples = [f"S{i}" for i in range(6)]
+    df = pd.DataFrame(
+        [(s, f"PEP{i}") for s in samples for i in range(50)],
+        columns=["Sample", "Sequence"],
+    )
+    df["Intensity"] = rng.lognormal(10, 1, len(df))
+    df["Group"] = np.where(df["Sample"].isin(samples[:3]), "A", "B")
+    fig = _volcano_plot(df, alpha=0.5)
+    assert isinstance(fig.data[0], go.Scattergl)
+    assert len(fig.data[0].x) == 50
+    # Without enough observations, no peptide is tested
+    fig = _volcano_plot(DF)
+    assert len(fig.data[0].x) == 0
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pepsipy import Calculator
+from pepsipy.proteins import ProteinMapper, _map_peptides, _protein_rollup
+
+FASTA = """>sp|P07911|UROM_HUMAN Uromodulin
+SRVLNLGPITRK
+PEPTIDE
+>custom_protein
+peptidepeptide
+"""
+
+
+def _brute_force(peptides: list[str], proteins: list[str]) -> set:
+    matches = set()
+    for i, peptide in enumerate(peptides):
+        for j, protein in enumerate(proteins):
+            start = protein.find(peptide)
+            while start >= 0:
+                matches.add((i, j, start))
+                start = protein.find(peptide, start + 1)
+    return matches
+
+
+def test_iter_matches_random():
+    rng = np.random.default_rng(0)
+    proteins = ["".join(rng.choice(list("ACDE"), 200)) for _ in range(5)]
+    # Overlapping peptides, peptides contained in others and peptides without matches
+    peptides = [
+        "".join(rng.choice(list("ACDE"), rng.integers(1, 6))) for _ in range(50)
+    ]
+    peptides = list(dict.fromkeys(peptides + ["A", "AA", "AAA", "W"]))
+    mapper = ProteinMapper(peptides)
+    found = {
+        (i, j, start)
+        for j, protein in enumerate(proteins)
+        for i, start in mapper.iter_matches(protein)
+    }
+    assert found == _brute_force(peptides, proteins)
+
+
+def test_map_peptides(tmp_path):
+    path = tmp_path / "proteome.fasta"
+    path.write_text(FASTA)
+    res = _map_peptides(["PEPTIDE", "TIDE", "PEPTIDE", "KLR"], path)
+    expected = pd.DataFrame(
+        {
+            "Sequence": ["PEPTIDE", "TIDE", "PEPTIDE", "TIDE", "PEPTIDE", "TIDE"],
+            "Protein ID": ["P07911"] * 2 + ["custom_protein"] * 4,
+            "Start": [13, 16, 1, 4, 8, 11],
+            "End": [19, 19, 7, 7, 14, 14],
+            "Protein length": [19, 19, 14, 14, 14, 14],
+        }
+    ).astype({"Sequence": "string", "Protein ID": "string"})
+    pd.testing.assert_frame_equal(res, expected)
+
+
+def test_map_peptides_cache(tmp_path):
+    path = tmp_path / "proteome.fasta"
+    path.write_text(FASTA)
+    cache_dir = tmp_path / "cache"
+    res = _map_peptides(["PEPTIDE"], path, cache_dir=cache_dir)
+    assert len(list(cache_dir.iterdir())) == 1
+    pd.testing.assert_frame_equal(_map_peptides(["PEPTIDE"], path, cache_dir), res)
+    # Other peptides or another proteome are not served from the cache
+    _map_peptides(["TIDE"], path, cache_dir=cache_dir)
+    path.write_text(FASTA.replace("PEPTIDE\n", ""))
+    assert len(_map_peptides(["PEPTIDE"], path, cache_dir=cache_dir)) == 2
+    assert len(list(cache_dir.iterdir())) == 3
+
+
+def test_calculator_map_proteins(tmp_path):
+    path = tmp_path / "proteome.fasta"
+    path.write_text(FASTA)
+    calc = Calculator(dataset=pd.DataFrame({"Sequence": ["PEPTIDE", "KLR"]}))
+    res = calc.map_proteins(path)
+    assert set(res["Sequence"]) == {"PEPTIDE"}
+    assert calc.protein_mapping is res
+    calc.setup(dataset=pd.DataFrame({"Sequence": ["TIDE"]}))
+    assert calc.protein_mapping is None
+
+
+def test_protein_rollup():
+    df = pd.DataFrame(
+        {
+            "Sample": ["S1", "S2", "S1", "S1", "S2"],
+            "Protein ID": ["P1", "P1", "P1;P2", "P2", None],
+            "Sequence": ["AAA", "AAA", "CCC", "DDD", "EEE"],
+            "Intensity": [1.0, 3.0, 2.0, np.nan, 5.0],
+            "GRAVY": [1.0, 1.0, 3.0, 5.0, 0.0],
+        }
+    ).astype({"Protein ID": "category"})
+    res = _protein_rollup(df)
+    assert list(res.index) == ["P1", "P2"]
+    assert list(res["Peptides"]) == [2, 2]
+    assert list(res["Unique peptides"]) == [1, 1]
+    assert list(res["Intensity"]) == [6.0, 2.0]
+    assert list(res["Mean GRAVY"]) == [2.0, 4.0]
+    assert list(res["Weighted mean GRAVY"]) == [(4 * 1 + 2 * 3) / 6, 3.0]
+    assert list(res["Min GRAVY"]) == [1.0, 3.0]
+    assert list(res["Max GRAVY"]) == [3.0, 5.0]
+    assert res["Std GRAVY"].tolist() == pytest.approx([np.sqrt(2), np.sqrt(2)])
+    assert "Coverage" not in res.columns
+
+
+def test_protein_rollup_mapping(tmp_path):
+    path = tmp_path / "proteome.fasta"
+    path.write_text(FASTA)
+    df = pd.DataFrame({"Sequence": ["PEPTIDE", "TIDE", "SRVL"], "GRAVY": [1, 2, 3]})
+    mapping = _map_peptides(df["Sequence"], path)
+    res = _protein_rollup(df, mapping=mapping)
+    assert list(res.index) == ["P07911", "custom_protein"]
+    assert list(res["Peptides"]) == [3, 2]
+    assert list(res["Unique peptides"]) == [1, 0]
+    # SRVL (1-4) and PEPTIDE (13-19) of 19 residues, PEPTIDE twice of 14 residues
+    assert res["Coverage"].tolist() == pytest.approx([11 / 19, 1.0])
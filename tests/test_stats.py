@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import mannwhitneyu, false_discovery_control, ttest_ind
+
+from pepsipy import Calculator
+from pepsipy.stats import (
+    _tie_term,
+    _mann_whitney_u,
+    _adjust_pvalues,
+    _pairwise_tests,
+    _summarize,
+    _weighted_median,
+    _welch_t_test,
+    _differential_abundance,
+)
+from pepsipy.matrix import _intensity_matrix
+from tests.constants import PEPTIDES, METADATA
+
+
+def test_tie_term():
+    values = np.array([[1.0, 1.0], [1.0, 2.0], [2.0, np.nan], [1.0, 3.0]])
+    # Column 1: one run of 3 -> 24, column 2: no ties
+    assert list(_tie_term(values)) == [24.0, 0.0]
+
+
+@pytest.mark.parametrize("alternative", ["two-sided", "greater", "less"])
+def test_mann_whitney_u(alternative):
+    rng = np.random.default_rng(0)
+    x = rng.integers(0, 10, size=(40, 3)).astype(float)
+    y = rng.integers(2, 12, size=(30, 3)).astype(float)
+    u, p = _mann_whitney_u(x, y, alternative=alternative)
+    for i in range(3):
+        expected = mannwhitneyu(
+            x[:, i], y[:, i], alternative=alternative, method="asymptotic"
+        )
+        assert np.isclose(u[i], expected.statistic)
+        assert np.isclose(p[i], expected.pvalue)
+
+
+def test_adjust_pvalues():
+    p = np.array([0.01, 0.04, np.nan, 0.03, 0.5])
+    bh = _adjust_pvalues(p, "bh")
+    assert np.isnan(bh[2])
+    assert np.allclose(bh[~np.isnan(p)], false_discovery_control(p[~np.isnan(p)]))
+    assert np.allclose(_adjust_pvalues(p, "bonferroni")[[0, 4]], [0.04, 1.0])
+    with pytest.raises(ValueError):
+        _adjust_pvalues(p, "holm")
+
+
+def test_pairwise_tests():
+    calc = Calculator(dataset=PEPTIDES, metadata=METADATA)
+    calc.set_feature_params(gravy=True, seq_length=True, molecular_weight=True)
+    calc.get_features()
+    results = calc.pairwise_tests(group_by="Group")
+    num_groups = METADATA["Group"].nunique()
+    num_pairs = num_groups * (num_groups - 1) // 2
+    assert len(results) == 3 * num_pairs
+    assert set(results["Feature"]) == {"GRAVY", "Sequence length", "Molecular weight"}
+    assert (results["Adjusted p-value"] >= results["p-value"]).all()
+
+    # Same p-values as testing each pair and feature on its own
+    df = calc._merge_metadata()
+    row = results.iloc[0]
+    sub = df.drop_duplicates(["Group", "Sequence"])
+    expected = mannwhitneyu(
+        sub.loc[sub["Group"] == row["Group A"], row["Feature"]],
+        sub.loc[sub["Group"] == row["Group B"], row["Feature"]],
+        method="asymptotic",
+    )
+    assert np.isclose(row["p-value"], expected.pvalue)
+
+    with pytest.raises(ValueError):
+        _pairwise_tests(df, group_by="Unknown")
+    with pytest.raises(ValueError):
+        _pairwise_tests(df, features=["Aromaticity"])
+
+
+def test_summarize():
+    calc = Calculator(dataset=PEPTIDES, metadata=METADATA)
+    calc.set_feature_params(gravy=True, seq_length=True)
+    df = calc.get_features()
+    summary = calc.summarize()
+    assert summary.index.names == ["Sample", "Feature"]
+    assert len(summary) == 2 * df["Sample"].nunique()
+
+    sample = df["Sample"].iloc[0]
+    rows = df[df["Sample"] == sample]
+    gravy = summary.loc[(sample, "GRAVY")]
+    assert gravy["Count"] == len(rows)
+    assert np.isclose(gravy["Mean"], rows["GRAVY"].mean())
+    assert np.isclose(gravy["Median"], rows["GRAVY"].median())
+    assert np.isclose(
+        gravy["Weighted mean"], np.average(rows["GRAVY"], weights=rows["Intensity"])
+    )
+    assert np.isclose(gravy["Intensity"], rows["Intensity"].sum())
+
+    groups = calc.summarize(by="Group", intensity_threshold=1e6)
+    assert set(groups.index.get_level_values("Group")) <= set(METADATA["Group"])
+    assert (groups["Min"] <= groups["Weighted median"]).all()
+    assert (groups["Weighted median"] <= groups["Max"]).all()
+    with pytest.raises(ValueError):
+        _summarize(df, by="Unknown")
+
+
+def test_weighted_median():
+    values = np.array([1.0, 2.0, 3.0, 10.0, 20.0])
+    weights = np.array([1.0, 1.0, 5.0, 1.0, 0.0])
+    codes = np.array([0, 0, 0, 1, 1])
+    assert list(_weighted_median(values, weights, codes, 3)[:2]) == [3.0, 10.0]
+    assert np.isnan(_weighted_median(values, weights, codes, 3)[2])
+
+
+@pytest.mark.parametrize("alternative", ["two-sided", "greater", "less"])
+def test_welch_t_test(alternative):
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(8, 5))
+    y = rng.normal(0.5, 2, size=(6, 5))
+    x[0, 1] = y[2, 3] = np.nan
+    stat, p = _welch_t_test(x, y, alternative=alternative)
+    for j in range(5):
+        expected = ttest_ind(
+            x[:, j],
+            y[:, j],
+            equal_var=False,
+            nan_policy="omit",
+            alternative=alternative,
+        )
+        assert stat[j] == pytest.approx(expected.statistic)
+        assert p[j] == pytest.approx(expected.pvalue)
+    # Not enough values
+    _, p = _welch_t_test(x[:1], y, alternative=alternative)
+    assert np.isnan(p).all()
+
+
+@pytest.mark.parametrize("test", ["welch", "mann-whitney"])
+def test_differential_abundance(test):
+    rng = np.random.default_rng(1)
+    samples = [f"S{i}" for i in range(10)]
+    peptides = [f"PEP{i}" for i in range(30)]
+    df = pd.DataFrame(
+        [(s, p) for s in samples for p in peptides], columns=["Sample", "Sequence"]
+    )
+    df["Intensity"] = rng.lognormal(10, 1, len(df))
+    # Unobserved intensities
+    df = df.sample(frac=0.8, random_state=0)
+    metadata = pd.DataFrame({"Sample": samples, "Group": ["A"] * 4 + ["B"] * 6})
+    matrix = _intensity_matrix(df)
+    res = _differential_abundance(matrix, metadata, test=test, block_size=7)
+    assert list(res.index) == list(matrix.peptides)
+
+    dense = np.log2(matrix.to_frame())
+    a = dense.loc[["S0", "S1", "S2", "S3"]].to_numpy()
+    b = dense.loc[[f"S{i}" for i in range(4, 10)]].to_numpy()
+    for j in range(len(peptides)):
+        x, y = a[:, j][~np.isnan(a[:, j])], b[:, j][~np.isnan(b[:, j])]
+        assert (res["Size A"].iloc[j], res["Size B"].iloc[j]) == (len(x), len(y))
+        assert res["Log2 fold change"].iloc[j] == pytest.approx(x.mean() - y.mean())
+        if min(len(x), len(y)) < 2:
+            assert np.isnan(res["p-value"].iloc[j])
+            continue
+        if test == "welch":
+            expected = ttest_ind(x, y, equal_var=False).pvalue
+        else:
+            expected = mannwhitneyu(x, y, method="asymptotic").pvalue
+        assert res["p-value"].iloc[j] == pytest.approx(expected)
+    tested = res["p-value"].notna()
+    assert tested.sum() > 20
+    expected = false_discovery_control(res["p-value"][tested])
+    assert np.allclose(res["Adjusted p-value"][tested], expected)
+
+    with pytest.raises(ValueError):
+        _differential_abundance(matrix, metadata, test="anova")
+    with pytest.raises(ValueError):
+        _differential_abundance(matrix, metadata, group_a="A", group_b="C")
@@ -5,6 +5,7 @@ from plotly import exceptions
 
 from pepsipy.utils import (
     sanitize_seq,
+    get_invalid_seq,
     get_column_name,
     get_distinct_seq,
     normalize_color,
@@ -18,6 +19,11 @@ def test_sanitize_seq():
     assert "PEPTIDE" == sanitize_seq("pEPtiDe :)")
 
 
+def test_get_invalid_seq():
+    sequences = pd.Series(["PEPTIDE", "PEPTIDEX", "", None, "pEPTIDE"])
+    assert ["PEPTIDEX", "", None, "pEPTIDE"] == get_invalid_seq(sequences).tolist()
+
+
 def test_get_column_name():
     assert "Intensity" == get_column_name(PEPTIDES, "intensity")
     normalized = PEPTIDES.rename(columns={"Intensity": "Normalized intensity"})